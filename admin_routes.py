@@ -1,32 +1,43 @@
-from flask import Blueprint, request, redirect, url_for, jsonify, render_template_string, make_response, session, g
+from flask import Blueprint, request, redirect, url_for, jsonify, render_template_string, make_response, session, g, Response, stream_with_context
 from markupsafe import Markup, escape
 import os
 import json
 import time
 from models import (
     skapa_nytt_spel, suggest_teams, get_fas_minutes, save_game_data, get_next_fas,
-    avsluta_aktuell_fas, add_fashistorik_entry, avsluta_spel, init_fashistorik_v2, MAX_RUNDA, DATA_DIR, TEAMS, AKTIVITETSKORT, BACKLOG,
+    avsluta_aktuell_fas, add_fashistorik_entry, avsluta_spel, init_fashistorik_v2, MAX_RUNDA, DATA_DIR, TEAMS, BACKLOG,
     check_game_password, is_game_session_valid, create_game_session, refresh_game_session, get_phase_timer, is_declaration_period,
-    list_saved_games, clone_backlog_for_teams, game_lock_for, generate_game_id
+    list_game_summaries, clone_backlog_for_teams, game_lock_for, generate_game_id,
+    reissue_team_tokens, list_restore_points, load_restore_point
 )
+from durability import RELAXED, STRICT
+from game_locks import GameLockDeadlock, GameLockTimeout
+from live_etag import live_etag, not_modified, tagged
+from live_view import live_view
+from game_context import request_game, save_request_game
 from game_management import delete_game, nollstall_regeringsstod, load_game_data, save_checkbox_state, get_checkbox_state
-from orderkort import generate_orderkort_html, get_available_rounds
+from orderkort import generate_aktivitetskort_cards, generate_orderkort_html, get_available_rounds
+from qr_codes import qr_sheet_html
+from print_pack import print_pack_chunks
+from projector_hub import event_stream, sse_response
 from admin_helpers import add_no_cache_headers, create_team_info_js, create_compact_header, create_action_buttons, create_script_references, create_timer_controls, create_time_adjustment_modal, create_delete_game_modal, create_delete_game_button
 from gm_console import (
     add_backlog_spend,
     add_timer_seconds,
     adjust_hp,
+    append_gm_log,
     apply_activity_hp_to_backlog,
     apply_llm_hp,
     apply_llm_milestones,
     apply_new_round,
     apply_next_phase,
     apply_previous_phase,
+    apply_restore_point,
     apply_or_queue_hp,
     apply_test_orders,
     apply_undo,
     auto_submit_unsaved_orders,
-    build_live_state,
+    backlog_totals,
     build_llm_export_text,
     end_game,
     hp_delta_from_fields,
@@ -34,13 +45,14 @@ from gm_console import (
     LlmJsonSyntaxError,
     LlmSuggestionAlreadyApplied,
     push_undo,
+    reset_backlog_totals,
     reset_timer_fields,
     set_regeringsstod,
     transfer_hp,
     update_activity,
     withdraw_order,
 )
-from gm_console_ui import create_gm_console_html, live_html_fragments
+from gm_console_ui import create_gm_console_html, live_payload, parse_live_known
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -60,7 +72,12 @@ def lock_admin_game_mutation():
     if not spel_id:
         return None
     lock = game_lock_for(spel_id)
-    lock.acquire()
+    try:
+        lock.acquire(label=f"{request.method} {request.path}")
+    except (GameLockTimeout, GameLockDeadlock):
+        if request.is_json:
+            return jsonify({"success": False, "error": "Spelet är upptaget, försök igen"}), 503
+        return "Spelet är upptaget just nu. Försök igen om en stund.", 503
     g._admin_game_mutation_lock = lock
     return None
 
@@ -82,6 +99,12 @@ PASSWORD_PROTECTED_ENDPOINTS = {
     "admin.delete_game_route",
 }
 
+# Answered from the stored revision (a 304) before the game is needed, so
+# the session check must not load the game for them.
+REVISION_FIRST_ENDPOINTS = {
+    "admin.admin_live",
+}
+
 @admin_bp.before_request
 def require_admin_session_for_game_routes():
     """Block unauthenticated mutations and data leaks for a specific game."""
@@ -90,7 +113,7 @@ def require_admin_session_for_game_routes():
     spel_id = (request.view_args or {}).get("spel_id")
     if not spel_id:
         return None
-    if load_game_data(spel_id) is None:
+    if request.endpoint not in REVISION_FIRST_ENDPOINTS and request_game(spel_id) is None:
         return None
     if check_admin_session(spel_id):
         session_key = f"game_session_{spel_id}"
@@ -102,6 +125,7 @@ def require_admin_session_for_game_routes():
         or request.path.endswith("/save_checkbox")
         or request.path.endswith("/checklist_status")
         or request.path.endswith("/live")
+        or request.path.endswith("/events")
         or request.path.endswith("/order_live")
         or request.path.endswith("/test_mode")
     )
@@ -615,7 +639,7 @@ def create_orderfas_checklist(spel_id, data):
 
 def create_diplomatifas_checklist(spel_id):
     """Skapa checklista för Diplomatifas"""
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     
     checklist_html = f'''
     <div class="checklist-container border-left-info">
@@ -717,7 +741,7 @@ def create_diplomatifas_checklist(spel_id):
 
 def create_resultatfas_checklist(spel_id):
     """Skapa checklista för Resultatfas"""
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     
     checklist_html = f'''
     <div class="checklist-container border-left-info">
@@ -948,26 +972,22 @@ def create_team_overview(data):
             return "#dc3545"  # Röd
     
     # Skapa team-kort för varje lag
+    totals = backlog_totals(data)
     for lag in data["lag"]:
-        if lag in data["backlog"]:
+        if lag in totals["teams"]:
+            team_totals = totals["teams"][lag]
             team_tasks = []
-            total_estimaterade = 0
-            total_spenderade = 0
+            total_estimaterade = team_totals["public_estimated"]
+            total_spenderade = team_totals["public_spent"]
             
             for uppgift in data["backlog"][lag]:
                 # Filtrera bort återkommande uppgifter
                 is_aterkommande = "typ" in uppgift and uppgift["typ"] == "aterkommande"
                 if not is_aterkommande:
-                    if lag == "Bravo":
-                        # Bravo har faser - beräkna total progress
-                        task_estimaterade = sum(fas["estimaterade_hp"] for fas in uppgift["faser"])
-                        task_spenderade = sum(fas["spenderade_hp"] for fas in uppgift["faser"])
-                        progress_percent = min(100, (task_spenderade / task_estimaterade * 100) if task_estimaterade > 0 else 0)
-                    else:
-                        # Enkla uppgifter
-                        task_estimaterade = uppgift["estimaterade_hp"]
-                        task_spenderade = uppgift["spenderade_hp"]
-                        progress_percent = min(100, (task_spenderade / task_estimaterade * 100) if task_estimaterade > 0 else 0)
+                    task_totals = team_totals["tasks"][uppgift.get("id") or ""]
+                    task_estimaterade = task_totals["estimated"]
+                    task_spenderade = task_totals["spent"]
+                    progress_percent = min(100, (task_spenderade / task_estimaterade * 100) if task_estimaterade > 0 else 0)
                     
                     team_tasks.append({
                         "namn": uppgift["namn"],
@@ -975,9 +995,6 @@ def create_team_overview(data):
                         "spenderade": task_spenderade,
                         "estimaterade": task_estimaterade
                     })
-                    
-                    total_estimaterade += task_estimaterade
-                    total_spenderade += task_spenderade
             
             # Beräkna team-total progress
             team_progress = min(100, (total_spenderade / total_estimaterade * 100) if total_estimaterade > 0 else 0)
@@ -1101,7 +1118,7 @@ def admin_start():
     
     # Lista befintliga spel
     spel = []
-    for game in list_saved_games():
+    for game in list_game_summaries()[0]:
         spel.append({
             "id": game["id"],
             "datum": game.get("datum", ""),
@@ -1120,7 +1137,7 @@ def admin_start():
     
     return f'''
         <link href="https://fonts.googleapis.com/css2?family=Bebas+Neue&family=Inter:wght@400;600;700;800&display=swap" rel="stylesheet">
-        <link rel="stylesheet" href="/static/app.css?v=10">
+        <link rel="stylesheet" href="/static/app.css">
         <link rel="stylesheet" href="/static/print.css" media="print">
         <div class="container">
             <!-- Header Section -->
@@ -1298,7 +1315,7 @@ def admin_panel(spel_id):
     elif request.method == "POST":
         # Kontrollera lösenord
         provided_password = request.form.get("password", "").strip()
-        if not check_game_password(spel_id, provided_password):
+        if not check_game_password(spel_id, provided_password, request_game(spel_id)):
             return f'''
             <!DOCTYPE html>
             <html lang="sv">
@@ -1343,7 +1360,7 @@ def admin_panel(spel_id):
             session[session_key] = create_game_session(spel_id)
             session.permanent = True
     
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     if not data:
         return "Spelet hittades inte.", 404
     
@@ -1504,7 +1521,7 @@ def save_checkbox_state_route(spel_id):
 def checklist_status(spel_id):
     """Get current status of team orders for auto-refresh"""
     try:
-        data = load_game_data(spel_id)
+        data = request_game(spel_id)
         if not data:
             return {"error": "Game not found"}, 404
         
@@ -1527,11 +1544,14 @@ def checklist_status(spel_id):
     except Exception as e:
         return {"error": str(e)}, 500
 
+# Timer actions that change phase or round; always saved strictly.
+PHASE_ACTIONS = {"next_fas", "prev_fas", "ny_runda", "end_game"}
+
 @admin_bp.route("/admin/<spel_id>/timer", methods=["POST"])
 def admin_timer_action(spel_id):
     try:
         action = request.form.get("action")
-        data = load_game_data(spel_id)
+        data = request_game(spel_id)
         if not data:
             return "Spelet hittades inte.", 404
         now = int(time.time())
@@ -1563,7 +1583,8 @@ def admin_timer_action(spel_id):
         elif action == "end_game":
             push_undo(data, "Avsluta spel")
             data = end_game(data)
-        save_game_data(spel_id, data)
+        # Phase changes stay strict even in games that save more loosely.
+        save_request_game(spel_id, data, durability=STRICT if action in PHASE_ACTIONS else None)
         return redirect(url_for("admin.admin_panel", spel_id=spel_id))
     except Exception as e:
         print(f"Error in admin_timer_action: {e}")
@@ -1572,7 +1593,7 @@ def admin_timer_action(spel_id):
 
 @admin_bp.route("/admin/<spel_id>/undo", methods=["POST"])
 def admin_undo(spel_id):
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     if not data:
         return "Spelet hittades inte.", 404
     data, label = apply_undo(data)
@@ -1580,22 +1601,22 @@ def admin_undo(spel_id):
         log = data.setdefault("gm_log", [])
         log.append({"at": time.time(), "kind": "undo", "message": f"Ångrade: {label}"})
         data["gm_log"] = log[-50:]
-    save_game_data(spel_id, data)
+    save_request_game(spel_id, data)
     return redirect(url_for("admin.admin_panel", spel_id=spel_id))
 
 
-def _hp_live_response(spel_id, data):
-    state = build_live_state(data)
-    return jsonify({
-        "success": True,
-        "state": state,
-        "html": live_html_fragments(spel_id, state),
-    })
+def _live_response(spel_id, data):
+    """Live JSON for the console: only what changed since X-Live-Known."""
+    known = parse_live_known(request.headers.get("X-Live-Known"))
+    view = live_view(spel_id, data)
+    response = jsonify(live_payload(spel_id, view.state, known, view.parts))
+    response.vary.add("X-Live-Known")
+    return response
 
 
 @admin_bp.route("/admin/<spel_id>/hp", methods=["POST"])
 def admin_hp_live(spel_id):
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     if not data:
         if request.is_json:
             return jsonify({"success": False, "error": "Spelet hittades inte"}), 404
@@ -1635,9 +1656,9 @@ def admin_hp_live(spel_id):
         if request.is_json:
             return jsonify({"success": False, "error": str(exc)}), 400
         return str(exc), 400
-    save_game_data(spel_id, data)
+    save_request_game(spel_id, data)
     if request.is_json:
-        return _hp_live_response(spel_id, data)
+        return _live_response(spel_id, data)
     return redirect(url_for("admin.admin_panel", spel_id=spel_id))
 
 
@@ -1654,35 +1675,154 @@ def _request_enabled_flag():
 
 @admin_bp.route("/admin/<spel_id>/test_mode", methods=["POST"])
 def admin_test_mode(spel_id):
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     if not data:
         if request.is_json:
             return jsonify({"success": False, "error": "Spelet hittades inte"}), 404
         return "Spelet hittades inte.", 404
     data["test_mode"] = _request_enabled_flag()
-    save_game_data(spel_id, data)
+    save_request_game(spel_id, data)
     if request.is_json:
         return jsonify({"success": True, "test_mode": data["test_mode"]})
     return redirect(url_for("admin.admin_panel", spel_id=spel_id))
 
 
+@admin_bp.route("/admin/<spel_id>/team_tokens", methods=["POST"])
+def admin_reissue_team_tokens(spel_id):
+    """Revoke every team link and QR code of the game and issue signed ones."""
+    data = request_game(spel_id)
+    if not data:
+        return "Spelet hittades inte.", 404
+    reissue_team_tokens(spel_id, data)
+    append_gm_log(data, "order", "Nya laglänkar skapades. De gamla länkarna och QR-koderna gäller inte längre.")
+    save_request_game(spel_id, data)
+    return redirect(url_for("admin.admin_panel", spel_id=spel_id))
+
+
+@admin_bp.route("/admin/<spel_id>/qr_sheet")
+def admin_qr_sheet(spel_id):
+    """Printable page with every team's order QR code."""
+    data = request_game(spel_id)
+    if not data:
+        return "Spelet hittades inte.", 404
+    return add_no_cache_headers(make_response(qr_sheet_html(spel_id, data, request.url_root)))
+
+
+@admin_bp.route("/admin/<spel_id>/restore_points")
+def admin_restore_points(spel_id):
+    """Saved generations of the game that the GM can roll back to."""
+    data = request_game(spel_id)
+    if not data:
+        return "Spelet hittades inte.", 404
+    current = data.get("revision")
+    rows = ""
+    for point in list_restore_points(spel_id):
+        saved = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(point.saved_at))
+        if point.revision == current:
+            action = "<span class='text-muted'>Nuvarande</span>"
+        else:
+            action = (
+                f"<form method='post' action='/admin/{escape(spel_id)}/restore_points/{escape(point.name)}' "
+                f"onsubmit=\"return confirm('Återställ spelet till {saved}? Det går att ångra.');\">"
+                f"<button type='submit' class='secondary'>Återställ</button></form>"
+            )
+        rows += (
+            f"<tr><td>{saved}</td><td class='text-center'>{point.runda}</td>"
+            f"<td>{escape(point.fas)}</td><td class='text-center'>{point.revision}</td><td>{action}</td></tr>"
+        )
+    if rows:
+        tabell = (
+            "<table><tr><th>Sparad</th><th>Runda</th><th>Fas</th><th>Version</th><th></th></tr>"
+            f"{rows}</table>"
+        )
+    else:
+        tabell = "<p class='text-muted'>Inga sparpunkter finns för det här spelet.</p>"
+    html = f"""
+    <link rel='stylesheet' href='/static/app.css'>
+    <div class='container'>
+        <div class='page-header'>
+            <h1>Sparpunkter</h1>
+            <p class='page-subtitle'>Alla sparningar den senaste minuten och den senaste i varje fas</p>
+        </div>
+        {tabell}
+        <br><a href='/admin/{escape(spel_id)}' class='secondary'>← Tillbaka till adminpanelen</a>
+    </div>
+    """
+    return Markup(html)
+
+
+@admin_bp.route("/admin/<spel_id>/restore_points/<name>", methods=["POST"])
+def admin_restore_point(spel_id, name):
+    data = request_game(spel_id)
+    if not data:
+        return "Spelet hittades inte.", 404
+    try:
+        restored = load_restore_point(spel_id, name)
+    except ValueError as exc:
+        return str(exc), 404
+    point = next((p for p in list_restore_points(spel_id) if p.name == name), None)
+    label = time.strftime("%H:%M:%S", time.localtime(point.saved_at)) if point else name
+    data = apply_restore_point(data, restored, label)
+    save_request_game(spel_id, data, durability=STRICT)
+    return redirect(url_for("admin.admin_panel", spel_id=spel_id))
+
+
 @admin_bp.route("/admin/<spel_id>/live")
 def admin_live(spel_id):
-    """JSON snapshot for the GM console poller. Same data as the panel."""
-    data = load_game_data(spel_id)
+    """JSON snapshot for the GM console poller. Same data as the panel.
+
+    304 when the client's ETag still matches the stored revision; the clock
+    keeps ticking client-side in between.
+    """
+    etag = live_etag(spel_id)
+    unchanged = not_modified(etag)
+    if unchanged is not None:
+        return unchanged
+    data = request_game(spel_id)
     if not data:
         return jsonify({"success": False, "error": "Spelet hittades inte"}), 404
-    state = build_live_state(data)
-    return jsonify({
-        "success": True,
-        "state": state,
-        "html": live_html_fragments(spel_id, state),
-    })
+    return tagged(_live_response(spel_id, data), etag)
+
+
+def _live_renderer(spel_id):
+    """``render`` for ``projector_hub.event_stream``: the /live payload per change.
+
+    The first event is complete; later ones are deltas against what this
+    stream already sent.
+    """
+    known = None
+
+    def render(_event_id):
+        nonlocal known
+        data = load_game_data(spel_id)
+        if not data:
+            return None
+        view = live_view(spel_id, data)
+        payload = live_payload(spel_id, view.state, known, view.parts)
+        known = dict(known or {}, **payload["hashes"])
+        for key in payload.get("removed", ()):
+            known.pop(key, None)
+        return payload
+
+    return render
+
+
+@admin_bp.route("/admin/<spel_id>/events")
+def admin_live_events(spel_id):
+    """Push the /live payload whenever the game changes (EventSource).
+
+    The stream rides the game's ``projector_hub`` pump (one revision check
+    per game, not per tab) and counts against the same stream cap.
+    """
+    if request_game(spel_id) is None:
+        return jsonify({"success": False, "error": "Spelet hittades inte"}), 404
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    return sse_response(event_stream(spel_id, last_event_id, render=_live_renderer(spel_id)))
 
 
 @admin_bp.route("/admin/<spel_id>/backlog_live", methods=["POST"])
 def admin_backlog_live(spel_id):
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     if not data:
         return jsonify({"success": False, "error": "Spelet hittades inte"}), 404
     payload = request.get_json(silent=True) or {}
@@ -1704,18 +1844,13 @@ def admin_backlog_live(spel_id):
             return jsonify({"success": False, "error": "Okänd åtgärd"}), 400
     except (ValueError, TypeError) as exc:
         return jsonify({"success": False, "error": str(exc)}), 400
-    save_game_data(spel_id, data)
-    state = build_live_state(data)
-    return jsonify({
-        "success": True,
-        "state": state,
-        "html": live_html_fragments(spel_id, state),
-    })
+    save_request_game(spel_id, data)
+    return _live_response(spel_id, data)
 
 
 @admin_bp.route("/admin/<spel_id>/order_live", methods=["POST"])
 def admin_order_live(spel_id):
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     if not data:
         return jsonify({"success": False, "error": "Spelet hittades inte"}), 404
     payload = request.get_json(silent=True) or {}
@@ -1740,20 +1875,15 @@ def admin_order_live(spel_id):
             return jsonify({"success": False, "error": "Okänd åtgärd"}), 400
     except (ValueError, TypeError) as exc:
         return jsonify({"success": False, "error": str(exc)}), 400
-    save_game_data(spel_id, data)
-    state = build_live_state(data)
-    return jsonify({
-        "success": True,
-        "state": state,
-        "html": live_html_fragments(spel_id, state),
-    })
+    save_request_game(spel_id, data)
+    return _live_response(spel_id, data)
 
 
 @admin_bp.route("/admin/<spel_id>/adjust_times", methods=["POST"])
 def admin_adjust_times(spel_id):
     """Handle time adjustments for Order and Diplomacy phases"""
     try:
-        data = load_game_data(spel_id)
+        data = request_game(spel_id)
         if not data:
             return "Spelet hittades inte.", 404
         
@@ -1768,7 +1898,7 @@ def admin_adjust_times(spel_id):
         # Update the game data
         data["orderfas_min"] = orderfas_min
         data["diplomatifas_min"] = diplomatifas_min
-        save_game_data(spel_id, data)
+        save_request_game(spel_id, data)
         
         # Redirect back to admin panel with success message
         return redirect(url_for("admin.admin_panel", spel_id=spel_id))
@@ -1779,17 +1909,17 @@ def admin_adjust_times(spel_id):
 
 @admin_bp.route("/admin/<spel_id>/slut", methods=["POST"])
 def admin_slut(spel_id):
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     if not data:
         return "Spelet hittades inte.", 404
     push_undo(data, "Avsluta spel")
     data = end_game(data)
-    save_game_data(spel_id, data)
+    save_request_game(spel_id, data, durability=STRICT)
     return redirect(url_for("admin.admin_panel", spel_id=spel_id))
 
 @admin_bp.route("/admin/<spel_id>/poang", methods=["GET", "POST"])
 def admin_poang(spel_id):
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     if not data:
         return "Spelet hittades inte.", 404
     laglista = data["lag"]
@@ -1804,8 +1934,6 @@ def admin_poang(spel_id):
             bas = get_team_base_hp(lag, data)
             data["poang"][lag] = {"bas": bas, "aktuell": bas, "regeringsstod": False}
             changed = True
-    if changed:
-        save_game_data(spel_id, data)
     # POST: uppdatera poäng och regeringsstöd
     if request.method == "POST":
         for lag in laglista:
@@ -1813,7 +1941,9 @@ def admin_poang(spel_id):
             regeringsstod = request.form.get(f"regeringsstod_{lag}") == "on"
             data["poang"][lag]["aktuell"] = aktuell
             data["poang"][lag]["regeringsstod"] = regeringsstod
-        save_game_data(spel_id, data)
+        changed = True
+    if changed:
+        save_request_game(spel_id, data)
     # Bygg tabell med moderna CSS-klasser
     tabell = "<form method='post'><table>"
     tabell += "<tr><th>Lag</th><th>Ursprung</th><th>Aktuell</th><th>Skillnad</th><th>Regeringsstöd</th><th>Formel</th></tr>"
@@ -1840,7 +1970,7 @@ def admin_poang(spel_id):
     tabell += "</table><br><button type='submit' class='success'>💾 Spara ändringar</button></form>"
     # Visa aktuell runda med konsistent header
     html = f"""
-    <link rel='stylesheet' href='/static/app.css?v=5'>
+    <link rel='stylesheet' href='/static/app.css'>
     <div class='container'>
         <div class='page-header'>
             <h1>Handlingspoäng – Runda {runda}</h1>
@@ -1857,21 +1987,19 @@ def admin_poang(spel_id):
 # Modifiera admin_ny_runda så att regeringsstöd nollställs
 @admin_bp.route("/admin/<spel_id>/ny_runda", methods=["POST"])
 def admin_ny_runda(spel_id):
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     if not data:
         return "Spelet hittades inte.", 404
     push_undo(data, "Ny runda")
     data = apply_new_round(data)
-    save_game_data(spel_id, data)
+    save_request_game(spel_id, data, durability=STRICT)
     return redirect(url_for("admin.admin_panel", spel_id=spel_id))
 
 @admin_bp.route("/admin/<spel_id>/reset", methods=["POST"])
 def admin_reset(spel_id):
-    filnamn = os.path.join(DATA_DIR, f"game_{spel_id}.json")
-    if not os.path.exists(filnamn):
+    data = request_game(spel_id)
+    if not data:
         return "Spelet hittades inte.", 404
-    with open(filnamn, encoding="utf-8") as f:
-        data = json.load(f)
     push_undo(data, "Återställ spel", include_resolution=True)
     data["runda"] = 1
     data["fas"] = "Orderfas"
@@ -1908,20 +2036,21 @@ def admin_reset(spel_id):
     # Nollställ teamens arbete (backlog)
     if "backlog" in data:
         data["backlog"] = clone_backlog_for_teams(data.get("lag", []))
+        reset_backlog_totals(data)
     
-    save_game_data(spel_id, data)
+    save_request_game(spel_id, data)
     return redirect(url_for("admin.admin_panel", spel_id=spel_id))
 
 @admin_bp.route("/admin/<spel_id>/aktivitetskort")
 def admin_aktivitetskort(spel_id):
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     if not data:
         return "Spelet hittades inte.", 404
     
     laglista = data["lag"]
     html = f'''
     <link href="https://fonts.googleapis.com/css2?family=Bebas+Neue&family=Inter:wght@400;600;700;800&display=swap" rel="stylesheet">
-    <link rel="stylesheet" href="/static/app.css?v=5">
+    <link rel="stylesheet" href="/static/app.css">
     <link rel="stylesheet" href="/static/print.css" media="print">
     <div class="container">
     <h1>Aktivitetskort för spel {spel_id}</h1>
@@ -1931,119 +2060,7 @@ def admin_aktivitetskort(spel_id):
     <hr>
     '''
     
-    for lag in laglista:
-        if lag in AKTIVITETSKORT:
-            html += f'<h2>🟢 Team {lag} – Aktivitetskort</h2>'
-            html += '<div class="cards-container force-break">'
-            
-            # Skapa kort för alla spelare i laget (2 med uppdrag, resten blanka)
-            kort = AKTIVITETSKORT[lag]
-            
-            # Kort 1 med uppdrag
-            html += f'''
-            <div class="activity-card">
-                <div class="card-header">
-                    <h3>{lag} Kort 1: {kort[0]["titel"]}</h3>
-                </div>
-                <div class="card-content">
-                    <div class="card-section">
-                        <h4>Uppdrag</h4>
-                        <p>{kort[0]["uppdrag"]}</p>
-                    </div>
-                    <div class="card-section">
-                        <h4>Mål</h4>
-                        <p>{kort[0]["mål"]}</p>
-                    </div>
-                    <div class="card-section">
-                        <h4>Belöning</h4>
-                        <p>{kort[0]["belöning"]}</p>
-                    </div>
-                    {f'<div class="card-section"><h4>Risk</h4><p>{kort[0]["risk"]}</p></div>' if "risk" in kort[0] else ''}
-                    {f'<div class="card-section"><h4>Bonus</h4><p>{kort[0]["bonus"]}</p></div>' if "bonus" in kort[0] else ''}
-                </div>
-            </div>
-            '''
-            
-            # Kort 2 med uppdrag
-            html += f'''
-            <div class="activity-card">
-                <div class="card-header">
-                    <h3>{lag} Kort 2: {kort[1]["titel"]}</h3>
-                </div>
-                <div class="card-content">
-                    <div class="card-section">
-                        <h4>Uppdrag</h4>
-                        <p>{kort[1]["uppdrag"]}</p>
-                    </div>
-                    <div class="card-section">
-                        <h4>Mål</h4>
-                        <p>{kort[1]["mål"]}</p>
-                    </div>
-                    <div class="card-section">
-                        <h4>Belöning</h4>
-                        <p>{kort[1]["belöning"]}</p>
-                    </div>
-                    {f'<div class="card-section"><h4>Risk</h4><p>{kort[1]["risk"]}</p></div>' if "risk" in kort[1] else ''}
-                    {f'<div class="card-section"><h4>Bonus</h4><p>{kort[1]["bonus"]}</p></div>' if "bonus" in kort[1] else ''}
-                </div>
-            </div>
-            '''
-            
-            # Lägg till blanka kort för resten av spelarna
-            for i in range(3, 11):  # Upp till 10 spelare per lag
-                html += f'''
-                <div class="activity-card">
-                    <div class="card-header">
-                        <h3>{lag} Kort {i}: Blankt</h3>
-                    </div>
-                    <div class="card-content">
-                        <div class="card-section">
-                            <h4>Uppdrag</h4>
-                            <p><em>Du har inget särskilt uppdrag. Fokusera på ditt teams mål.</em></p>
-                        </div>
-                        <div class="card-section">
-                            <h4>Mål</h4>
-                            <p><em>Arbeta med ditt team för att slutföra era uppgifter.</em></p>
-                        </div>
-                        <div class="card-section">
-                            <h4>Belöning</h4>
-                            <p><em>Din belöning kommer från teamets framgång.</em></p>
-                        </div>
-                    </div>
-                </div>
-                '''
-            
-            html += '</div>'
-        else:
-            # Om laget inte har aktivitetskort, skapa blanka kort för alla spelare
-            html += f'<h2>🟢 Team {lag} – Aktivitetskort</h2>'
-            html += '<div class="cards-container force-break">'
-            
-            # Skapa blanka kort för alla spelare i laget
-            for i in range(1, 11):  # Upp till 10 spelare per lag
-                html += f'''
-                <div class="activity-card">
-                    <div class="card-header">
-                        <h3>{lag} Kort {i}: Blankt</h3>
-                    </div>
-                    <div class="card-content">
-                        <div class="card-section">
-                            <h4>Uppdrag</h4>
-                            <p><em>Du har inget särskilt uppdrag. Fokusera på ditt teams mål.</em></p>
-                        </div>
-                        <div class="card-section">
-                            <h4>Mål</h4>
-                            <p><em>Arbeta med ditt team för att slutföra era uppgifter.</em></p>
-                        </div>
-                        <div class="card-section">
-                            <h4>Belöning</h4>
-                            <p><em>Din belöning kommer från teamets framgång.</em></p>
-                        </div>
-                    </div>
-                </div>
-                '''
-            
-            html += '</div>'
+    html += generate_aktivitetskort_cards(laglista)
     
     html += '''
     <div class="text-center margin-top-15">
@@ -2055,10 +2072,19 @@ def admin_aktivitetskort(spel_id):
     
     return html
 
+@admin_bp.route("/admin/<spel_id>/print_pack")
+def admin_print_pack(spel_id):
+    """Utskriftspaket: lagbeskrivning, orderkort and aktivitetskort for every team in one streamed page."""
+    data = request_game(spel_id)
+    if not data:
+        return "Spelet hittades inte.", 404
+    chunks = print_pack_chunks(spel_id, data, request.url_root)
+    return add_no_cache_headers(Response(stream_with_context(chunks), mimetype="text/html"))
+
 @admin_bp.route("/admin/<spel_id>/orderkort")
 def admin_orderkort(spel_id):
     """Visa orderkort för alla team för en specifik runda"""
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     if not data:
         return "Spelet hittades inte.", 404
     
@@ -2090,7 +2116,7 @@ def admin_orderkort(spel_id):
     
     html = f'''
     <link href="https://fonts.googleapis.com/css2?family=Bebas+Neue&family=Inter:wght@400;600;700;800&display=swap" rel="stylesheet">
-    <link rel="stylesheet" href="/static/app.css?v=5">
+    <link rel="stylesheet" href="/static/app.css">
     <div class="container">
         <h1>Orderkort för spel {spel_id}</h1>
         <p><b>Datum:</b> {data["datum"]} <b>Plats:</b> {data["plats"]}</p>
@@ -2110,7 +2136,7 @@ def admin_orderkort(spel_id):
 @admin_bp.route("/admin/<spel_id>/orderkort/<int:runda>")
 def admin_orderkort_runda(spel_id, runda):
     """Visa orderkort för en specifik runda"""
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     if not data:
         return "Spelet hittades inte.", 404
     
@@ -2129,7 +2155,7 @@ def admin_view_order(spel_id, team_name):
     """Visa inskickad order för ett specifikt team"""
     try:
         # Ladda speldata
-        data = load_game_data(spel_id)
+        data = request_game(spel_id)
         if not data:
             return "Spel hittades inte", 404
         
@@ -2154,7 +2180,7 @@ def admin_view_order(spel_id, team_name):
 @admin_bp.route("/admin/<spel_id>/edit_order/<team_name>")
 def admin_edit_order(spel_id, team_name):
     """Edit a team order using the existing admin session."""
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     if not data:
         return "Spelet hittades inte.", 404
     if team_name not in data.get("lag", []):
@@ -2229,6 +2255,7 @@ def _spelledarpanel_response(spel_id, data, status=200):
         data,
         llm_view=(request.args.get("llm_view") or "").strip(),
         banner=create_declaration_warning(runda),
+        state=live_view(spel_id, data).state,
     )
     html_content = f'''
         <!DOCTYPE html>
@@ -2240,7 +2267,7 @@ def _spelledarpanel_response(spel_id, data, status=200):
             <meta http-equiv="Pragma" content="no-cache">
             <meta http-equiv="Expires" content="0">
             <link href="https://fonts.googleapis.com/css2?family=Bebas+Neue&family=Inter:wght@400;600;700;800&display=swap" rel="stylesheet">
-            <link rel="stylesheet" href="/static/app.css?v=36">
+            <link rel="stylesheet" href="/static/app.css">
             <link rel="stylesheet" href="/static/print.css" media="print">
             <script>
                 if (window.performance && window.performance.navigation.type === window.performance.navigation.TYPE_BACK_FORWARD) {{
@@ -2281,7 +2308,7 @@ def _order_summary_response(spel_id, data, llm_import=None, status=200):
     orders_key = f"orders_round_{data.get('runda', 1)}"
     all_orders = data.get("team_orders", {}).get(orders_key, {})
     formatted_text = build_llm_export_text(data, all_orders)
-    save_game_data(spel_id, data)
+    save_request_game(spel_id, data)
     error_html = _llm_import_error_html(llm_import)
     response = make_response(
         render_template_string(
@@ -2303,7 +2330,7 @@ def _order_summary_response(spel_id, data, llm_import=None, status=200):
 def order_summary(spel_id):
     """Visa sammanfattning av alla teams order för ChatGPT"""
     try:
-        data = load_game_data(spel_id)
+        data = request_game(spel_id)
         if not data:
             return "Spelet hittades inte.", 404
 
@@ -2314,7 +2341,7 @@ def order_summary(spel_id):
 
 @admin_bp.route("/admin/<spel_id>/llm_import", methods=["POST"])
 def llm_import(spel_id):
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     if not data:
         return _llm_error_page(spel_id, "Spelet hittades inte.")[0], 404
     try:
@@ -2339,14 +2366,14 @@ def llm_import(spel_id):
             llm_import={"text": raw, "domain_error": str(exc)},
             status=400,
         )
-    save_game_data(spel_id, data)
+    save_request_game(spel_id, data)
     target = url_for("admin.admin_panel", spel_id=spel_id, llm_view="llm")
     return redirect(f"{target}#gm-llm-results")
 
 
 @admin_bp.route("/admin/<spel_id>/llm_apply", methods=["POST"])
 def llm_apply(spel_id):
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     if not data:
         return _llm_error_page(spel_id, "Spelet hittades inte.")[0], 404
     op = (request.form.get("op") or "").strip()
@@ -2364,7 +2391,7 @@ def llm_apply(spel_id):
         return redirect(f"{target}#gm-llm-results", code=303)
     except ValueError as exc:
         return _llm_error_page(spel_id, str(exc))
-    save_game_data(spel_id, data)
+    save_request_game(spel_id, data)
     target = url_for("admin.admin_panel", spel_id=spel_id, llm_view=op)
     return redirect(f"{target}#gm-llm-results", code=303)
 
@@ -2372,7 +2399,7 @@ def llm_apply(spel_id):
 def auto_fill_orders(spel_id):
     """Auto-fyll alla teams order med testdata för aktuell runda."""
     try:
-        data = load_game_data(spel_id)
+        data = request_game(spel_id)
         if not data:
             return jsonify({"success": False, "error": "Spelet hittades inte"}), 404
         if not data.get("test_mode"):
@@ -2386,7 +2413,7 @@ def auto_fill_orders(spel_id):
             ), 403
         push_undo(data, "Auto-fyll testdata")
         data, processed_teams = apply_test_orders(data)
-        save_game_data(spel_id, data)
+        save_request_game(spel_id, data, durability=RELAXED)
         if request.is_json:
             return jsonify({
                 "success": True,
@@ -2408,7 +2435,7 @@ def auto_fill_orders(spel_id):
 
 @admin_bp.route("/admin/<spel_id>/backlog", methods=["GET", "POST"])
 def admin_backlog(spel_id):
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     if not data:
         return "Spelet hittades inte.", 404
     
@@ -2445,8 +2472,9 @@ def admin_backlog(spel_id):
                         uppgift["estimaterade_hp"] = estimaterade
                         uppgift["spenderade_hp"] = spenderade
                         uppgift["slutford"] = spenderade >= estimaterade
+        reset_backlog_totals(data)
         
-        save_game_data(spel_id, data)
+        save_request_game(spel_id, data)
         return redirect(url_for("admin.admin_backlog", spel_id=spel_id))
     
     # Bygg HTML för varje lag med förbättrad layout
@@ -2601,7 +2629,7 @@ def admin_backlog(spel_id):
     # Bygg komplett HTML med förbättrad layout
     html = f'''
     <link href="https://fonts.googleapis.com/css2?family=Bebas+Neue&family=Inter:wght@400;600;700;800&display=swap" rel="stylesheet">
-    <link rel="stylesheet" href="/static/app.css?v=5">
+    <link rel="stylesheet" href="/static/app.css">
     <link rel="stylesheet" href="/static/print.css" media="print">
     
     <style>
@@ -2687,12 +2715,12 @@ def delete_game_route(spel_id):
         return redirect(next_path + (("?" + urlencode(query)) if query else ""))
 
     try:
-        if load_game_data(spel_id) is None:
+        if request_game(spel_id) is None:
             if wants_json:
                 return jsonify({"success": True, "already_gone": True})
             return redirect_back(deleted=True)
         provided_password = request.form.get("password", "").strip()
-        if not check_game_password(spel_id, provided_password):
+        if not check_game_password(spel_id, provided_password, request_game(spel_id)):
             if wants_json:
                 return jsonify({"success": False, "error": "wrong_password"}), 403
             return redirect_back(error=True)
@@ -2710,7 +2738,7 @@ def delete_game_route(spel_id):
 def download_game(spel_id):
     """Download game data as JSON file"""
     try:
-        data = load_game_data(spel_id)
+        data = request_game(spel_id)
         if not data:
             return "Game not found", 404
         
@@ -2746,7 +2774,7 @@ def upload_game():
             <meta name="viewport" content="width=device-width, initial-scale=1.0">
             <title>Ladda upp spel - Stabsspel Admin</title>
             <link href="https://fonts.googleapis.com/css2?family=Bebas+Neue&family=Inter:wght@400;600;700;800&display=swap" rel="stylesheet">
-            <link rel="stylesheet" href="/static/app.css?v=5">
+            <link rel="stylesheet" href="/static/app.css">
             <style>
                 .upload-container {
                     max-width: 600px;
@@ -2875,7 +2903,7 @@ def upload_game():
                 <meta name="viewport" content="width=device-width, initial-scale=1.0">
                 <title>Spel uppladdat - Stabsspel Admin</title>
                 <link href="https://fonts.googleapis.com/css2?family=Bebas+Neue&family=Inter:wght@400;600;700;800&display=swap" rel="stylesheet">
-                <link rel="stylesheet" href="/static/app.css?v=5">
+                <link rel="stylesheet" href="/static/app.css">
             </head>
             <body>
                 <div class="container">
@@ -2918,7 +2946,7 @@ LLM_WORKFLOW_TEMPLATE = """
     <meta http-equiv="Cache-Control" content="no-cache, no-store, must-revalidate">
     <title>LLM-underlag – Stabsspel</title>
     <link href="https://fonts.googleapis.com/css2?family=Bebas+Neue&family=Inter:wght@400;600;700;800&display=swap" rel="stylesheet">
-    <link rel="stylesheet" href="/static/app.css?v=36">
+    <link rel="stylesheet" href="/static/app.css">
 </head>
 <body class="llm-workflow-page">
     <main class="llm-workflow-shell">
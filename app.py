@@ -16,33 +16,53 @@ from markupsafe import escape
 from admin_routes import admin_bp
 from team_routes import team_bp
 from team_order_routes import team_order_bp
-from models import suggest_teams, DATA_DIR, check_game_password, list_saved_games
+from models import suggest_teams, DATA_DIR, check_game_password, list_game_summaries, load_game_segments, storage_metrics
+from game_locks import lock_metrics
+from live_etag import live_etag, not_modified, tagged
+from live_view import live_view_metrics
 from game_management import load_game_data
-from gm_console import build_public_state
+from projector_hub import event_stream, hub_for, hub_metrics, sse_response
 from admin_helpers import create_delete_game_modal, create_delete_game_button
 from gm_console_ui import create_projector_html
+from static_assets import HASH_PARAM, AssetManifest
+from compression import CompressionMiddleware
+from qr_codes import qr_metrics
+from print_pack import print_pack_metrics
 
 app = Flask(__name__)
 app.register_blueprint(admin_bp)
 app.register_blueprint(team_bp)
 app.register_blueprint(team_order_bp)
+# gzip/brotli for pages, JSON and static text; static files compressed once here
+app.wsgi_app = compression = CompressionMiddleware(app.wsgi_app, static_folder=app.static_folder)
+compression.warm()
 
 # Configure for production
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
-# Disable static file caching during development and force template reloads
+# Static caching is decided per request in after_request (see static_assets.py)
 app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
 app.config['TEMPLATES_AUTO_RELOAD'] = True
 # Session configuration
 app.config['PERMANENT_SESSION_LIFETIME'] = 6 * 60 * 60  # Cover a full live event
 
-# Add cache-busting headers for static files
+assets = AssetManifest(app.static_folder)
+
+# /metrics shows worker internals (pid, lock holders, storage and cache
+# counters), so it only exists when the operator turns it on.
+METRICS_ENABLED = os.environ.get("STABSSPEL_METRICS", "0") == "1"
+
+
+# Fingerprint static references in pages; cache fingerprinted files for good
 @app.after_request
 def after_request(response):
-    # Add cache-busting headers for static files
-    if request.endpoint and 'static' in request.endpoint:
-        response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        response.headers['Pragma'] = 'no-cache'
-        response.headers['Expires'] = '0'
+    if request.endpoint == 'static':
+        filename = (request.view_args or {}).get('filename', '')
+        response.headers['Cache-Control'] = assets.cache_control(filename, request.args.get(HASH_PARAM))
+    elif response.mimetype == 'text/html' and not response.direct_passthrough and not response.is_streamed:
+        html = response.get_data(as_text=True)
+        rewritten = assets.rewrite(html)
+        if rewritten is not html:
+            response.set_data(rewritten)
     return response
 
 # Removed old demo timer maximize route with inline styles
@@ -57,6 +77,24 @@ def health_check():
         "timestamp": time.time()
     })
 
+@app.route("/metrics")
+def metrics():
+    """Per-worker lock and storage counters (no game ids); STABSSPEL_METRICS=1."""
+    if not METRICS_ENABLED:
+        return jsonify({"error": "Not found"}), 404
+    return jsonify({
+        "pid": os.getpid(),
+        "timestamp": time.time(),
+        "game_locks": lock_metrics(),
+        "storage": storage_metrics(),
+        "projector": hub_metrics(),
+        "live_view": live_view_metrics(),
+        "static_assets": assets.stats(),
+        "compression": compression.stats(),
+        "qr_codes": qr_metrics(),
+        "print_pack": print_pack_metrics(),
+    })
+
 @app.route("/test_css")
 def test_css():
     return '''
@@ -280,6 +318,27 @@ def test_css():
 </html>
     '''
 
+HOME_PAGE_SIZE = 25
+
+
+def _home_pager(sida, total):
+    pages = max(1, -(-total // HOME_PAGE_SIZE))
+    if pages == 1:
+        return ""
+    newer = (
+        f'<a href="/?sida={sida - 1}" class="secondary">Nyare spel</a>'
+        if sida > 1 else "<span></span>"
+    )
+    older = (
+        f'<a href="/?sida={sida + 1}" class="secondary">Äldre spel</a>'
+        if sida < pages else "<span></span>"
+    )
+    return (
+        f'<nav class="home-pager" aria-label="Sidor">{newer}'
+        f'<span class="home-pager-count">Sida {sida} av {pages}</span>{older}</nav>'
+    )
+
+
 def _home_game_row(game_data):
     spel_id = str(game_data.get("id", "") or "")
     datum = str(game_data.get("datum", "") or "")
@@ -325,11 +384,12 @@ def _home_game_row(game_data):
 
 @app.route("/")
 def startsida():
-    games = list(list_saved_games())
-    games.sort(key=lambda g: 1 if g.get("avslutat") else 0)
+    sida = max(1, request.args.get("sida", 1, type=int) or 1)
+    games, total = list_game_summaries((sida - 1) * HOME_PAGE_SIZE, HOME_PAGE_SIZE)
     spel_html = "".join(_home_game_row(game) for game in games)
     empty_hidden = " hidden" if spel_html else ""
     list_hidden = "" if spel_html else " hidden"
+    pager_html = _home_pager(sida, total)
 
     return f'''
     <!DOCTYPE html>
@@ -339,7 +399,7 @@ def startsida():
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
         <title>Stabsspelet - Krisledningssimulation</title>
         <link href="https://fonts.googleapis.com/css2?family=Bebas+Neue&family=Inter:wght@400;600;700;800&display=swap" rel="stylesheet">
-        <link rel="stylesheet" href="/static/app.css?v=29">
+        <link rel="stylesheet" href="/static/app.css">
         <link rel="stylesheet" href="/static/print.css" media="print">
     </head>
     <body class="home-page">
@@ -353,6 +413,7 @@ def startsida():
         <main class="home-main">
             <h2 class="home-heading">Öppna spel</h2>
             <div class="home-game-list"{list_hidden}>{spel_html}</div>
+            {pager_html}
             <div class="home-empty"{empty_hidden}>
                 <p>Inga sparade spel.</p>
                 <a href="/admin" class="primary">Starta nytt spel</a>
@@ -370,11 +431,9 @@ def get_teams(num_players):
 
 @app.route("/timer_window/<spel_id>")
 def timer_window(spel_id):
-    # Läs speldata
-    try:
-        with open(os.path.join(DATA_DIR, f"game_{spel_id}.json"), encoding="utf-8") as f:
-            data = json.load(f)
-    except FileNotFoundError:
+    # Läs speldata (bara kärnan; ordrar och logg behövs inte)
+    data = load_game_segments(spel_id)
+    if not data:
         return "Spel hittades inte", 404
     
     # Hämta URL-parametrar för tid och status
@@ -460,7 +519,7 @@ def timer_window(spel_id):
         <meta http-equiv="Pragma" content="no-cache">
         <meta http-equiv="Expires" content="0">
         <link href="https://fonts.googleapis.com/css2?family=Bebas+Neue&family=Inter:wght@400;600;700;800&display=swap" rel="stylesheet">
-        <link rel="stylesheet" href="/static/app.css?v=6">
+        <link rel="stylesheet" href="/static/app.css">
     </head>
     <body class="timer-window">
         <div class="timer-container">
@@ -591,7 +650,7 @@ def timer_window(spel_id):
 @app.route("/spelarskarm/<spel_id>")
 def player_display(spel_id):
     """Room projector: round, phase, time, public HP. No GM chrome."""
-    data = load_game_data(spel_id)
+    data = load_game_segments(spel_id)
     if not data:
         return "Spelet hittades inte.", 404
     response = make_response(create_projector_html(spel_id, data))
@@ -603,10 +662,24 @@ def player_display(spel_id):
 
 @app.route("/spelarskarm/<spel_id>/live")
 def player_display_live(spel_id):
-    data = load_game_data(spel_id)
-    if not data:
+    etag = live_etag(spel_id)
+    unchanged = not_modified(etag)
+    if unchanged is not None:
+        return unchanged
+    # Shared per revision: more screens do not mean more recomputation.
+    state = hub_for(spel_id).public_state()
+    if state is None:
+        return jsonify({"success": False, "error": "Spelet hittades inte"}), 404
+    return tagged(jsonify({"success": True, "state": state}), etag)
+
+
+@app.route("/spelarskarm/<spel_id>/events")
+def player_display_events(spel_id):
+    """Push the public state to a projector whenever the game changes."""
+    if load_game_segments(spel_id) is None:
         return jsonify({"success": False, "error": "Spelet hittades inte"}), 404
-    return jsonify({"success": True, "state": build_public_state(data)})
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    return sse_response(event_stream(spel_id, last_event_id))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,331 @@
+"""
+gzip / brotli compression of responses, as WSGI middleware.
+
+The GM console, the admin checklists, the team order page and the live
+JSON polls are repetitive HTML and JSON built with f-strings, and all of
+them went out uncompressed to phones on crowded event Wi-Fi. The
+middleware negotiates ``Accept-Encoding`` (brotli when the optional
+``brotli`` package is installed, else gzip) and compresses:
+
+- ``200`` responses of a text type in ``COMPRESSIBLE`` of at least
+  ``STABSSPEL_COMPRESS_MIN_BYTES`` (default 1024),
+- streamed responses (no ``Content-Length``) chunk by chunk, flushing
+  after each chunk so nothing waits for the end of the stream.
+
+Event streams (``text/event-stream``), media such as ``alarm.mp3`` and the
+images, ``206``/``304`` responses, ``HEAD`` requests and responses that
+already carry a ``Content-Encoding`` pass through untouched.
+
+Text files in ``static/`` are compressed once, at the highest level, when
+the app starts, and again only when a file changes. Static requests still
+go through Flask (headers, ``304``s, cache control); only the body is
+swapped for the precompressed one. A compressed response gets ``Vary:
+Accept-Encoding`` and a weak ETag, which ``live_etag.not_modified`` and
+Flask's conditional file responses both compare weakly.
+``stats()`` (under ``compression`` in ``/metrics``) reports responses and
+bytes in/out per encoding.
+Set ``STABSSPEL_COMPRESSION=0`` when a proxy in front already compresses.
+"""
+
+import os
+import threading
+import zlib
+
+from werkzeug.datastructures import Headers
+
+from game_cache import file_signature
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSION_ENABLED = os.environ.get("STABSSPEL_COMPRESSION", "1") != "0"
+MIN_BYTES = int(os.environ.get("STABSSPEL_COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Static files are compressed once, so spend the time on the smallest output.
+STATIC_GZIP_LEVEL = 9
+STATIC_BROTLI_QUALITY = 11
+
+COMPRESSIBLE = {
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "image/svg+xml",
+    "text/css",
+    "text/csv",
+    "text/html",
+    "text/javascript",
+    "text/plain",
+}
+STATIC_EXTENSIONS = (".css", ".js", ".json", ".svg", ".txt", ".html")
+STATIC_PREFIX = "/static/"
+
+
+def available_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encoding, encodings=None):
+    """The best of ``encodings`` the client accepts, or None."""
+    encodings = available_encodings() if encodings is None else encodings
+    weights = {}
+    for part in (accept_encoding or "").split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[token] = quality
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class _Gzip:
+    def __init__(self, level=GZIP_LEVEL):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def chunk(self, data):
+        return self._z.compress(data) + self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def whole(self, data):
+        return self._z.compress(data) + self._z.flush()
+
+    def finish(self):
+        return self._z.flush()
+
+
+class _Brotli:
+    def __init__(self, quality=BROTLI_QUALITY):
+        self._c = brotli.Compressor(quality=quality)
+
+    def chunk(self, data):
+        return self._c.process(data) + self._c.flush()
+
+    def whole(self, data):
+        return self._c.process(data) + self._c.finish()
+
+    def finish(self):
+        return self._c.finish()
+
+
+def compressor(encoding, static=False):
+    if encoding == "br":
+        return _Brotli(STATIC_BROTLI_QUALITY if static else BROTLI_QUALITY)
+    return _Gzip(STATIC_GZIP_LEVEL if static else GZIP_LEVEL)
+
+
+class PrecompressedStatic:
+    """Compressed bodies of the text files under ``folder``, per encoding."""
+
+    def __init__(self, folder, encodings=None, minimum_size=MIN_BYTES):
+        self.folder = os.path.abspath(folder)
+        self.encodings = available_encodings() if encodings is None else encodings
+        self.minimum_size = minimum_size
+        self._lock = threading.Lock()
+        self._bodies = {}
+
+    def warm(self):
+        """Compress every text file now. Returns how many bodies were built."""
+        built = 0
+        for root, _dirs, files in os.walk(self.folder):
+            for fil in files:
+                if fil.endswith(STATIC_EXTENSIONS):
+                    filename = os.path.relpath(os.path.join(root, fil), self.folder).replace(os.sep, "/")
+                    built += sum(1 for encoding in self.encodings if self.get(filename, encoding) is not None)
+        return built
+
+    def get(self, filename, encoding):
+        """Compressed body of ``filename``, or None if it is not worth it."""
+        if not filename.endswith(STATIC_EXTENSIONS) or encoding not in self.encodings:
+            return None
+        path = os.path.abspath(os.path.join(self.folder, filename))
+        if not path.startswith(self.folder + os.sep):
+            return None
+        signature = file_signature(path)
+        if signature is None:
+            return None
+        key = (filename, encoding)
+        with self._lock:
+            known = self._bodies.get(key)
+        if known is not None and known[0] == signature:
+            return known[1]
+        with open(path, "rb") as f:
+            data = f.read()
+        body = compressor(encoding, static=True).whole(data) if len(data) >= self.minimum_size else None
+        if body is not None and len(body) >= len(data):
+            body = None
+        with self._lock:
+            self._bodies[key] = (signature, body)
+        return body
+
+
+class _Streamed:
+    """Compresses an app iterable chunk by chunk and closes it afterwards."""
+
+    def __init__(self, body, compress, counter):
+        self._body = body
+        self._compress = compress
+        self._counter = counter
+
+    def __iter__(self):
+        for data in self._body:
+            if data:
+                out = self._compress.chunk(data)
+                self._counter(len(data), len(out))
+                if out:
+                    yield out
+        tail = self._compress.finish()
+        self._counter(0, len(tail))
+        if tail:
+            yield tail
+
+    def close(self):
+        _close(self._body)
+
+
+class CompressionMiddleware:
+    """Wrap a WSGI app: ``app.wsgi_app = CompressionMiddleware(app.wsgi_app, ...)``."""
+
+    def __init__(self, app, static_folder=None, minimum_size=MIN_BYTES, enabled=COMPRESSION_ENABLED):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.enabled = enabled
+        self.static = PrecompressedStatic(static_folder, minimum_size=minimum_size) if static_folder else None
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def warm(self):
+        return self.static.warm() if self.static is not None and self.enabled else 0
+
+    def __call__(self, environ, start_response):
+        encoding = None
+        if self.enabled and environ.get("REQUEST_METHOD") != "HEAD":
+            encoding = negotiate(environ.get("HTTP_ACCEPT_ENCODING"))
+        if encoding is None:
+            return self.app(environ, start_response)
+
+        captured = []
+        written = []
+
+        def capture(status, headers, exc_info=None):
+            if exc_info and captured:
+                raise exc_info[1].with_traceback(exc_info[2])
+            captured[:] = [status, headers, exc_info]
+            return written.append
+
+        body = self.app(environ, capture)
+        if not captured:
+            # start_response may be deferred to the first chunk.
+            body = iter(body)
+            first = next(body, b"")
+            body = _Chained([first], body)
+        if written:
+            body = _Chained(written, body)
+        status, headers, exc_info = captured
+        headers = Headers(headers)
+        if not self._wanted(status, headers):
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return body
+
+        path = environ.get("PATH_INFO", "")
+        if self.static is not None and path.startswith(STATIC_PREFIX):
+            compressed = self.static.get(path[len(STATIC_PREFIX):], encoding)
+            if compressed is not None:
+                length = int(headers.get("Content-Length") or 0)
+                _close(body)
+                self._count(encoding, length, len(compressed))
+                self._encoded(headers, encoding, len(compressed))
+                start_response(status, headers.to_wsgi_list(), exc_info)
+                return [compressed]
+
+        length = headers.get("Content-Length")
+        if length is None:
+            headers.remove("Content-Length")
+            self._encoded(headers, encoding, None)
+            self._count(encoding, 0, 0)
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return _Streamed(body, compressor(encoding), lambda n, m: self._count(encoding, n, m, responses=0))
+
+        if int(length) < self.minimum_size:
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return body
+        try:
+            data = b"".join(body)
+        finally:
+            _close(body)
+        compressed = compressor(encoding).whole(data)
+        if len(compressed) >= len(data):
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return [data]
+        self._count(encoding, len(data), len(compressed))
+        self._encoded(headers, encoding, len(compressed))
+        start_response(status, headers.to_wsgi_list(), exc_info)
+        return [compressed]
+
+    @staticmethod
+    def _wanted(status, headers):
+        if not status.startswith("200") or headers.get("Content-Encoding"):
+            return False
+        if "no-transform" in (headers.get("Cache-Control") or ""):
+            return False
+        mimetype = (headers.get("Content-Type") or "").split(";")[0].strip().lower()
+        return mimetype in COMPRESSIBLE
+
+    @staticmethod
+    def _encoded(headers, encoding, length):
+        headers["Content-Encoding"] = encoding
+        vary = headers.get("Vary")
+        if not vary:
+            headers["Vary"] = "Accept-Encoding"
+        elif "accept-encoding" not in vary.lower():
+            headers["Vary"] = f"{vary}, Accept-Encoding"
+        etag = headers.get("ETag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+        if length is not None:
+            headers["Content-Length"] = str(length)
+
+    def _count(self, encoding, raw, compressed, responses=1):
+        with self._lock:
+            entry = self._metrics.setdefault(encoding, {"responses": 0, "bytes_in": 0, "bytes_out": 0})
+            entry["responses"] += responses
+            entry["bytes_in"] += raw
+            entry["bytes_out"] += compressed
+
+    def stats(self):
+        with self._lock:
+            encodings = {encoding: dict(entry) for encoding, entry in self._metrics.items()}
+        return {"enabled": self.enabled, "min_bytes": self.minimum_size, "encodings": encodings}
+
+
+class _Chained:
+    """Items already pulled from an app iterable, then the rest of it."""
+
+    def __init__(self, head, rest):
+        self._head = head
+        self._rest = rest
+
+    def __iter__(self):
+        yield from self._head
+        yield from self._rest
+
+    def close(self):
+        _close(self._rest)
+
+
+def _close(body):
+    close = getattr(body, "close", None)
+    if close is not None:
+        close()
@@ -0,0 +1,2 @@
+# The root-level test scripts share the scratch data folder of tests/.
+import tests  # noqa: F401
@@ -0,0 +1,168 @@
+"""
+Write-behind buffer for draft (non-final) team order saves.
+
+Team order pages autosave while people type. Each autosave used to run a
+full ``save_game_data`` (backup copy, temp file, fsync, rename) while
+holding the game lock, so nine teams typing during Orderfas queued up on
+that lock. A draft save now only stores the game here, as a pickled
+snapshot, and ``load_game_data`` hands it out until it is written. A
+background flusher writes a game once it has been idle for ``idle``
+seconds, or ``interval`` seconds after it first became dirty, whichever
+comes first. Bursts of autosaves therefore cost one write.
+
+Any other save of the game (a final submit, a phase change, a GM action)
+replaces the pending draft with a normal, immediate write. ``flush_all``
+runs at interpreter exit, so a clean shutdown keeps every draft. A crash
+loses at most ``interval`` seconds of draft typing; the order form still
+holds the text and saves it again.
+
+Each draft remembers the storage signature it was based on. If the stored
+game changes underneath it (another worker, an upload, a hand edit), the
+draft is dropped rather than written over the newer game, and counted as
+``lost`` in ``stats()``. Write-behind is therefore only safe when one
+process serves a game: it is off unless ``STABSSPEL_DRAFT_FLUSH_SECONDS``
+is set together with ``STABSSPEL_SINGLE_WORKER=1``, the operator's
+assertion that gunicorn runs one worker.
+
+The buffer knows nothing about storage: ``flush(key)`` is a callback that
+takes the draft with ``take`` and writes it under the game's lock.
+"""
+
+import atexit
+import pickle
+import threading
+import time
+
+
+class _Draft:
+    __slots__ = ("blob", "base", "tag", "dirty_since", "touched")
+
+    def __init__(self, blob, base, tag, dirty_since, touched):
+        self.blob = blob
+        self.base = base
+        self.tag = tag
+        self.dirty_since = dirty_since
+        self.touched = touched
+
+    @property
+    def data(self):
+        return pickle.loads(self.blob)
+
+
+class DraftBuffer:
+    """Pending draft games by key, written behind by one daemon thread.
+
+    ``interval`` <= 0 disables the buffer: ``put`` returns False and the
+    caller writes the game itself.
+    """
+
+    def __init__(self, flush, interval, idle):
+        self._flush = flush
+        self.interval = interval
+        self.idle = idle
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._drafts = {}
+        self._thread = None
+        self._metrics = {"drafts": 0, "coalesced": 0, "flushes": 0, "lost": 0, "errors": 0}
+
+    @property
+    def enabled(self):
+        return self.interval > 0
+
+    def put(self, key, data, base, tag=None):
+        """Hold ``data`` as the draft for ``key``. False if the buffer is off."""
+        if not self.enabled:
+            return False
+        blob = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.monotonic()
+        with self._lock:
+            previous = self._drafts.get(key)
+            dirty_since = now
+            if previous is not None and previous.base == base:
+                dirty_since = previous.dirty_since
+                self._metrics["coalesced"] += 1
+            self._drafts[key] = _Draft(blob, base, tag, dirty_since, now)
+            self._metrics["drafts"] += 1
+            self._start()
+            self._wake.notify()
+        return True
+
+    def peek(self, key, base):
+        """The pending draft for ``key`` if it is still based on ``base``."""
+        with self._lock:
+            draft = self._drafts.get(key)
+            if draft is None or draft.base == base:
+                return draft
+            del self._drafts[key]
+            self._metrics["lost"] += 1
+        print(f"Draft for {key} dropped: the stored game changed underneath it")
+        return None
+
+    def holds(self, key):
+        return key in self._drafts
+
+    def take(self, key):
+        """Remove and return the pending draft for ``key`` (or None)."""
+        with self._lock:
+            return self._drafts.pop(key, None)
+
+    def restore(self, key, draft):
+        """Put back a draft whose write failed, unless a newer one arrived."""
+        with self._lock:
+            self._drafts.setdefault(key, draft)
+
+    def flushed(self):
+        with self._lock:
+            self._metrics["flushes"] += 1
+
+    def flush_all(self):
+        """Write every pending draft now. Returns how many were written."""
+        with self._lock:
+            keys = list(self._drafts)
+        return sum(1 for key in keys if self._flush_one(key))
+
+    def stats(self):
+        with self._lock:
+            return dict(self._metrics, pending=len(self._drafts), interval=self.interval, idle=self.idle)
+
+    def _flush_one(self, key):
+        try:
+            return bool(self._flush(key))
+        except Exception as e:
+            print(f"Could not write draft for {key}: {e}")
+            with self._lock:
+                self._metrics["errors"] += 1
+                draft = self._drafts.get(key)
+                if draft is not None:
+                    # Try again after another idle period, not in a busy loop.
+                    draft.dirty_since = draft.touched = time.monotonic()
+            return False
+
+    def _due(self, now):
+        """Keys to write now, and seconds until the next one is due."""
+        due, wait = [], None
+        for key, draft in self._drafts.items():
+            at = min(draft.touched + self.idle, draft.dirty_since + self.interval)
+            if at <= now:
+                due.append(key)
+            else:
+                wait = at - now if wait is None else min(wait, at - now)
+        return due, wait
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="draft-flusher", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush_all)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                due, wait = self._due(time.monotonic())
+                if not due:
+                    self._wake.wait(wait)
+                    continue
+            for key in due:
+                self._flush_one(key)
@@ -0,0 +1,176 @@
+"""
+Named durability levels for game writes.
+
+Every save used to copy the old file to ``.backup``, write a temp file,
+``fsync`` it and rename it. That is right for a phase change, but a waste
+for test-mode auto-fill or a burst of team drafts. A save now runs at one
+of three levels:
+
+``strict``
+    Restore point, ``fsync`` before the rename. A save that returned
+    survives a power cut. The default.
+``batched``
+    Restore point and atomic rename, but the ``fsync`` is group-committed:
+    every file written within ``GROUP_COMMIT_SECONDS`` is synced once, in
+    one pass, by a background thread (a game saved five times in the window
+    is synced once). A power cut may lose that window; a crashed process
+    loses nothing.
+``relaxed``
+    Atomic rename only: no restore point and no ``fsync``. For test mode.
+
+``resolve`` picks the level: the call site's choice if it makes one, else
+the game's own ``durability`` field, else ``relaxed`` for games in test
+mode, else ``STABSSPEL_DURABILITY``. ``durability_metrics()`` reports saves,
+time spent and fsyncs per level, plus the group-commit counters.
+"""
+
+import atexit
+import os
+import threading
+import time
+
+STRICT = "strict"
+BATCHED = "batched"
+RELAXED = "relaxed"
+LEVELS = (STRICT, BATCHED, RELAXED)
+
+DEFAULT_DURABILITY = os.environ.get("STABSSPEL_DURABILITY", STRICT).strip().lower()
+GROUP_COMMIT_SECONDS = float(os.environ.get("STABSSPEL_GROUP_COMMIT_MS", "200")) / 1000
+
+# SQLite has its own knob for the same trade-off (WAL + NORMAL syncs at
+# checkpoints, which is SQLite's group commit).
+SQLITE_SYNCHRONOUS = {STRICT: "FULL", BATCHED: "NORMAL", RELAXED: "OFF"}
+
+_metrics_guard = threading.Lock()
+_metrics = {level: {"saves": 0, "seconds_total": 0.0, "seconds_max": 0.0, "fsyncs": 0} for level in LEVELS}
+
+
+def resolve(data, requested=None):
+    """Durability level for saving ``data``; ValueError for an unknown name."""
+    level = requested or (data or {}).get("durability")
+    if not level:
+        level = RELAXED if (data or {}).get("test_mode") else DEFAULT_DURABILITY
+    if level not in LEVELS:
+        raise ValueError(f"Okänd hållbarhetsnivå: {level}")
+    return level
+
+
+def at_most(level, cap):
+    """The weaker of ``level`` and ``cap``."""
+    return LEVELS[max(LEVELS.index(level), LEVELS.index(cap))]
+
+
+def sync(f, level):
+    """Make the open file ``f`` durable now if ``level`` asks for it."""
+    f.flush()
+    if level == STRICT:
+        os.fsync(f.fileno())
+        _count(level, "fsyncs")
+
+
+def settle(path, level):
+    """``path`` is in place; queue it for the group commit if ``level`` is batched."""
+    if level == BATCHED:
+        _group.add(path)
+
+
+def keeps_backup(level):
+    """Whether a save at ``level`` keeps a restore point (see game_backups.py)."""
+    return level != RELAXED
+
+
+def record(level, seconds):
+    with _metrics_guard:
+        entry = _metrics[level]
+        entry["saves"] += 1
+        entry["seconds_total"] += seconds
+        entry["seconds_max"] = max(entry["seconds_max"], seconds)
+
+
+def _count(level, key, amount=1):
+    with _metrics_guard:
+        _metrics[level][key] += amount
+
+
+def durability_metrics():
+    with _metrics_guard:
+        levels = {level: dict(entry) for level, entry in _metrics.items()}
+    return {"default": DEFAULT_DURABILITY, "levels": levels, "group_commit": _group.stats()}
+
+
+def flush_group_commit():
+    """Sync every file queued for the group commit now. Returns how many."""
+    return _group.commit()
+
+
+def _fsync_path(path, directory=False):
+    fd = os.open(path, os.O_RDONLY | (getattr(os, "O_DIRECTORY", 0) if directory else 0))
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class GroupCommit:
+    """Files waiting for one shared fsync pass, run every ``window`` seconds."""
+
+    def __init__(self, window):
+        self.window = window
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._pending = set()
+        self._thread = None
+        self._stats = {"batches": 0, "files": 0, "coalesced": 0, "errors": 0}
+
+    def add(self, path):
+        with self._lock:
+            if path in self._pending:
+                self._stats["coalesced"] += 1
+            self._pending.add(path)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+                self._thread.start()
+                atexit.register(self.commit)
+            self._wake.notify()
+
+    def commit(self):
+        with self._lock:
+            paths, self._pending = self._pending, set()
+        if not paths:
+            return 0
+        synced = 0
+        for path in sorted(paths):
+            try:
+                _fsync_path(path)
+                synced += 1
+            except FileNotFoundError:
+                pass  # Replaced or deleted since; the newer write has its own sync.
+            except OSError as e:
+                print(f"Group commit could not sync {path}: {e}")
+                with self._lock:
+                    self._stats["errors"] += 1
+        for directory in {os.path.dirname(path) or "." for path in paths}:
+            try:
+                _fsync_path(directory, directory=True)
+            except OSError:
+                pass  # Not supported everywhere (Windows); the files are synced.
+        _count(BATCHED, "fsyncs", synced)
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["files"] += synced
+        return synced
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, pending=len(self._pending), window=self.window)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._pending:
+                    self._wake.wait()
+            time.sleep(self.window)
+            self.commit()
+
+
+_group = GroupCommit(GROUP_COMMIT_SECONDS)
@@ -0,0 +1,152 @@
+"""
+Generational backups of game snapshots (restore points).
+
+``save_game_data`` used to copy the whole current file to ``.backup``
+before every write: twice the I/O for a single generation that could be
+just as broken as the file it protects. Now each snapshot that is written
+gets a hard link under ``<DATA_DIR>/backups/game_<id>/`` before it replaces
+``game_<id>.json``. The link costs no data I/O; the old inode survives the
+next ``os.replace`` through it.
+
+Each link is named after the save (time, revision, round, phase) so
+listing restore points never reads a file. After every new generation the
+folder is thinned:
+
+- every generation from the last ``RECENT_SECONDS`` (at most
+  ``RECENT_MAX`` of them),
+- the newest generation of every phase, which also keeps one per round.
+
+``load_valid`` walks generations from newest to oldest until one parses,
+for ``load_game_data``'s fallback after a corrupt snapshot. Filesystems
+without hard links fall back to a copy.
+"""
+
+import json
+import os
+import re
+import shutil
+import time
+
+BACKUP_DIRNAME = "backups"
+RECENT_SECONDS = 60
+RECENT_MAX = 20
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9]+")
+
+
+class RestorePoint:
+    __slots__ = ("name", "path", "saved_at", "revision", "runda", "fas")
+
+    def __init__(self, name, path, saved_at, revision, runda, fas):
+        self.name = name
+        self.path = path
+        self.saved_at = saved_at
+        self.revision = revision
+        self.runda = runda
+        self.fas = fas
+
+    @property
+    def phase(self):
+        return (self.runda, self.fas)
+
+
+def generations_dir(snapshot_path):
+    base = os.path.splitext(os.path.basename(snapshot_path))[0]
+    return os.path.join(os.path.dirname(snapshot_path), BACKUP_DIRNAME, base)
+
+
+def _name_for(data, saved_at):
+    fas = _UNSAFE.sub("", str(data.get("fas") or "")) or "okand"
+    try:
+        runda = int(data.get("runda") or 0)
+        revision = int(data.get("revision") or 0)
+    except (TypeError, ValueError):
+        runda = revision = 0
+    return f"{int(saved_at * 1000):013d}-r{revision}-{runda}-{fas}.json"
+
+
+def _parse(directory, name):
+    if not name.endswith(".json"):
+        return None
+    try:
+        millis, revision, runda, fas = name[:-len(".json")].split("-", 3)
+        return RestorePoint(
+            name, os.path.join(directory, name), int(millis) / 1000, int(revision[1:]), int(runda), fas
+        )
+    except ValueError:
+        return None
+
+
+def restore_points(snapshot_path):
+    """Generations of the game at ``snapshot_path``, newest first."""
+    directory = generations_dir(snapshot_path)
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    points = [point for point in (_parse(directory, name) for name in names) if point]
+    return sorted(points, key=lambda point: point.saved_at, reverse=True)
+
+
+def restore_point(snapshot_path, name):
+    """The generation called ``name``, or None (also for names from elsewhere)."""
+    if os.path.basename(name) != name:
+        return None
+    point = _parse(generations_dir(snapshot_path), name)
+    return point if point and os.path.exists(point.path) else None
+
+
+def keep(snapshot_path, written_path, data, now=None):
+    """Link the freshly written ``written_path`` in as a new generation."""
+    now = time.time() if now is None else now
+    directory = generations_dir(snapshot_path)
+    os.makedirs(directory, exist_ok=True)
+    target = os.path.join(directory, _name_for(data, now))
+    try:
+        os.link(written_path, target)
+    except FileExistsError:
+        pass
+    except OSError:
+        shutil.copy2(written_path, target)
+    thin(snapshot_path, now)
+
+
+def thin(snapshot_path, now=None):
+    """Remove generations the policy no longer keeps. Returns how many."""
+    now = time.time() if now is None else now
+    points = restore_points(snapshot_path)
+    recent = [point for point in points if now - point.saved_at <= RECENT_SECONDS][:RECENT_MAX]
+    keep_names = {point.name for point in recent}
+    seen_phases = set()
+    for point in points:
+        if point.phase not in seen_phases:
+            seen_phases.add(point.phase)
+            keep_names.add(point.name)
+    removed = 0
+    for point in points:
+        if point.name not in keep_names:
+            try:
+                os.remove(point.path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
+
+
+def load(point):
+    with open(point.path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_valid(snapshot_path):
+    """Newest generation that still parses, or None."""
+    for point in restore_points(snapshot_path):
+        try:
+            return load(point)
+        except (OSError, ValueError) as e:
+            print(f"Skipping broken restore point {point.path}: {e}")
+    return None
+
+
+def remove_all(snapshot_path):
+    shutil.rmtree(generations_dir(snapshot_path), ignore_errors=True)
@@ -0,0 +1,153 @@
+"""
+In-process cache of parsed game files.
+
+The GM console, the projector, every team timer tick and every autosave used
+to re-open and re-parse ``speldata/game_<id>.json``. This cache keeps one
+pickled snapshot per file and hands every caller a private copy, so route
+handlers may keep mutating what they load without touching the cached state.
+
+Each read stats the file (inode, mtime, size). A write from another worker,
+an upload or a hand edit therefore invalidates the entry on the next read.
+Memory is bounded by entry count and pickled size; the least recently used
+game is evicted first.
+"""
+
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from itertools import count
+
+GAME_CACHE_MAX_GAMES = 16
+GAME_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def file_signature(path):
+    """Return (inode, mtime_ns, size) for ``path``, or None if it is missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class _Entry:
+    __slots__ = ("signature", "blob", "revision", "tag")
+
+    def __init__(self, signature, blob, revision, tag):
+        self.signature = signature
+        self.blob = blob
+        self.revision = revision
+        self.tag = tag
+
+
+class GameCache:
+    """Per-file LRU cache of game dicts, stamped with a local revision.
+
+    The revision is a process-wide counter. It increases every time an entry
+    is stored, either by a save in this process or by re-reading a file that
+    changed on disk, so callers can use it to tell whether a game changed.
+
+    ``signature(path)`` decides whether an entry is still current; pass a
+    custom one when a game is stored in more than one file. ``put`` may also
+    attach a small ``tag`` that callers can read without unpickling the game.
+    """
+
+    def __init__(self, max_games=GAME_CACHE_MAX_GAMES, max_bytes=GAME_CACHE_MAX_BYTES,
+                 signature=file_signature):
+        self.max_games = max_games
+        self._signature = signature
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._revisions = count(1)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _current(self, path):
+        """Return the entry for ``path`` if it still matches the file on disk."""
+        signature = self._signature(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                return None
+            if entry.signature != signature:
+                self._drop(path)
+                return None
+            self._entries.move_to_end(path)
+            return entry
+
+    def get(self, path):
+        """Private copy of the cached game, or None on a miss."""
+        entry = self._current(path)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return pickle.loads(entry.blob)
+
+    def revision(self, path):
+        """Revision of the cached entry, or None if it is missing or stale."""
+        entry = self._current(path)
+        return entry.revision if entry is not None else None
+
+    def tag(self, path):
+        """Tag stored with the cached entry, or None if it is missing or stale."""
+        entry = self._current(path)
+        return entry.tag if entry is not None else None
+
+    def put(self, path, data, signature, tag=None):
+        """Store ``data`` as the content of ``path`` at ``signature``.
+
+        Take the signature *before* reading the file. If the file is replaced
+        in between, the next read sees a newer signature and reloads, instead
+        of serving the older content forever.
+        """
+        if signature is None:
+            self.invalidate(path)
+            return None
+        blob = pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._drop(path)
+            if len(blob) > self.max_bytes:
+                return None
+            revision = next(self._revisions)
+            self._entries[path] = _Entry(signature, blob, revision, tag)
+            self._bytes += len(blob)
+            self._evict()
+            return revision
+
+    def invalidate(self, path):
+        with self._lock:
+            self._drop(path)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "games": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _drop(self, path):
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._bytes -= len(entry.blob)
+
+    def _evict(self):
+        while self._entries and (
+            len(self._entries) > self.max_games or self._bytes > self.max_bytes
+        ):
+            _path, entry = self._entries.popitem(last=False)
+            self._bytes -= len(entry.blob)
+            self.evictions += 1
@@ -0,0 +1,65 @@
+"""
+Request-scoped game context (identity map + one save per request).
+
+One request used to load the same game several times: the admin session
+check, the route, password checks and print helpers (``orderkort``) each
+called ``load_game_data`` and decoded their own copy, and team routes did
+the same for the token check. ``request_game`` loads a game at most once per
+request and hands every later caller, in any blueprint, the same dict.
+``request_team`` resolves a team token through the token index in
+``models`` and, when the index has to be rebuilt, through that same copy.
+
+``save_request_game`` is the request's single write: it saves right away
+(the response is built from the saved game and its new ``revision``), makes
+the saved dict the request's copy (``apply_undo`` returns a new one) and
+raises ``GameSavedTwice`` if the game was already saved in this request.
+
+The copy is only as fresh as the moment it was loaded. Mutating routes take
+the per-game lock in a ``before_request`` hook that runs before anything
+loads, so their copy is read under the lock. Long-running streams must keep
+calling ``load_game_data`` to see new saves. Outside a request every helper
+falls back to a plain load or save.
+"""
+
+from flask import g, has_request_context
+
+from models import get_team_by_token, load_game_data, save_game_data
+
+
+class GameSavedTwice(RuntimeError):
+    """A request tried to save the same game a second time."""
+
+
+def request_game(spel_id):
+    """``load_game_data`` once per request; later calls return the same dict."""
+    if not has_request_context():
+        return load_game_data(spel_id)
+    games = g.setdefault("_request_games", {})
+    key = str(spel_id)
+    if key not in games:
+        games[key] = load_game_data(spel_id)
+    return games[key]
+
+
+def save_request_game(spel_id, data, draft=False, durability=None):
+    """Save ``data`` as this request's one write of the game.
+
+    ``draft=True`` lets ``save_game_data`` write it behind (team autosaves);
+    ``durability`` picks the level for this save (see durability.py).
+    """
+    if not has_request_context():
+        save_game_data(spel_id, data, draft=draft, durability=durability)
+        return data
+    key = str(spel_id)
+    saved = g.setdefault("_request_saved_games", set())
+    if key in saved:
+        raise GameSavedTwice(f"Spelet {key} sparades två gånger i samma anrop")
+    save_game_data(spel_id, data, draft=draft, durability=durability)
+    saved.add(key)
+    g.setdefault("_request_games", {})[key] = data
+    return data
+
+
+def request_team(spel_id, token):
+    """Team for ``token`` in ``spel_id``, or None."""
+    return get_team_by_token(spel_id, token, load=request_game)
@@ -0,0 +1,152 @@
+"""
+Structural diff/patch for game dicts.
+
+``diff(old, new)`` returns a list of small JSON-serialisable operations that
+turn ``old`` into ``new``; ``apply(doc, ops)`` replays them in place. The
+journal storage mode writes these instead of the whole document, so a save
+costs roughly the size of what changed.
+
+Operations (``path`` is a list of dict keys / list indexes):
+
+- ``["set", path, value]``  replace or add a value
+- ``["del", path]``         remove a dict key
+- ``["ext", path, items]``  append items to a list
+- ``["trim", path, n]``     drop the first ``n`` list items (capped logs/stacks)
+- ``["trunc", path, n]``    keep only the first ``n`` list items (undo pop)
+
+Dict keys are normalised the way ``json.dump`` writes them, so a replayed
+document equals the one a full JSON save would have produced.
+"""
+
+# How many dropped leading items to look for when a capped list (gm_log,
+# gm_undo) both lost its oldest entries and gained new ones.
+MAX_TRIM_PROBE = 2
+
+
+def _json_key(key):
+    if isinstance(key, str):
+        return key
+    if key is True:
+        return "true"
+    if key is False:
+        return "false"
+    if key is None:
+        return "null"
+    if isinstance(key, float):
+        return repr(key)
+    return str(key)
+
+
+def _diff_list(old, new, path, ops):
+    if len(new) < len(old) and old[: len(new)] == new:
+        ops.append(["trunc", path, len(new)])
+        return
+    # Appended at the back, maybe capped at the front, maybe with the last
+    # surviving item edited (the undo stack turns its old top into a patch
+    # when it pushes a new entry).
+    for k in range(0, min(MAX_TRIM_PROBE, len(old)) + 1):
+        kept = len(old) - k
+        if kept > len(new):
+            continue
+        if old[k:] == new[:kept]:
+            if k:
+                ops.append(["trim", path, k])
+            if len(new) > kept:
+                ops.append(["ext", path, new[kept:]])
+            return
+        if (kept > 1 or (kept and not k)) and old[k:-1] == new[: kept - 1]:
+            if k:
+                ops.append(["trim", path, k])
+            _diff(old[-1], new[kept - 1], path + [kept - 1], ops)
+            if len(new) > kept:
+                ops.append(["ext", path, new[kept:]])
+            return
+    if len(new) < len(old) // 2:
+        ops.append(["set", path, new])
+        return
+    common = min(len(old), len(new))
+    for i in range(common):
+        _diff(old[i], new[i], path + [i], ops)
+    if len(new) < len(old):
+        ops.append(["trunc", path, len(new)])
+    elif len(new) > common:
+        ops.append(["ext", path, new[common:]])
+
+
+def _diff(old, new, path, ops):
+    if old is new:
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        seen = set()
+        for key, value in new.items():
+            jkey = _json_key(key)
+            seen.add(jkey)
+            if jkey not in old:
+                ops.append(["set", path + [jkey], value])
+            else:
+                _diff(old[jkey], value, path + [jkey], ops)
+        for key in old:
+            if key not in seen:
+                ops.append(["del", path + [key]])
+        return
+    if isinstance(old, list) and isinstance(new, (list, tuple)):
+        _diff_list(old, list(new), path, ops)
+        return
+    # bool is an int subclass; 1 == True must still be recorded as a change.
+    if type(old) is not type(new) or old != new:
+        ops.append(["set", path, new])
+
+
+def diff(old, new):
+    """Operations that turn ``old`` (as loaded from JSON) into ``new``."""
+    ops = []
+    _diff(old, new, [], ops)
+    return ops
+
+
+def _parent(doc, path):
+    node = doc
+    for key in path[:-1]:
+        node = node[key]
+    return node
+
+
+def _target(doc, path):
+    node = doc
+    for key in path:
+        node = node[key]
+    return node
+
+
+def apply(doc, ops):
+    """Replay ``ops`` onto ``doc`` in place and return it.
+
+    Raises ValueError for operations that do not fit the document, which
+    means the journal does not belong to this snapshot.
+    """
+    for op in ops:
+        try:
+            kind, path = op[0], op[1]
+            if kind == "set":
+                if not path:
+                    doc = op[2]
+                    continue
+                parent = _parent(doc, path)
+                key = path[-1]
+                if isinstance(parent, list) and key == len(parent):
+                    parent.append(op[2])
+                else:
+                    parent[key] = op[2]
+            elif kind == "del":
+                del _parent(doc, path)[path[-1]]
+            elif kind == "ext":
+                _target(doc, path).extend(op[2])
+            elif kind == "trim":
+                del _target(doc, path)[: op[2]]
+            elif kind == "trunc":
+                del _target(doc, path)[op[2]:]
+            else:
+                raise ValueError(f"Okänd delta-operation: {kind!r}")
+        except (KeyError, IndexError, TypeError) as e:
+            raise ValueError(f"Delta passar inte dokumentet: {op[:2]!r}") from e
+    return doc
@@ -0,0 +1,148 @@
+"""
+Summary index of saved games (``DATA_DIR/games_index.json``).
+
+The home page only needs date, place, round, phase, status and team names.
+Reading those from every game file grows with the number of events ever
+run, so ``save_game_data`` and ``delete_game_data`` keep this small sidecar
+up to date instead. The file is only rewritten when a summary field
+actually changes, which most autosaves do not.
+
+The index can drift if game files are copied in by hand; rebuild it with::
+
+    python -m game_index rebuild speldata
+"""
+
+import json
+import os
+import sys
+import threading
+import uuid
+
+from game_cache import file_signature
+
+INDEX_FILENAME = "games_index.json"
+INDEX_VERSION = 1
+SUMMARY_FIELDS = ("id", "datum", "plats", "runda", "fas", "avslutat", "lag", "skapad")
+
+
+def summarize(data):
+    """The fields the game list shows, in JSON-safe form."""
+    summary = {field: data.get(field) for field in SUMMARY_FIELDS if field in data}
+    if "lag" in summary:
+        summary["lag"] = [str(name) for name in summary["lag"] or [] if name]
+    return json.loads(json.dumps(summary, ensure_ascii=False))
+
+
+def _sort_key_newest(summary):
+    return str(summary.get("skapad") or summary.get("datum") or "")
+
+
+class GameIndex:
+    """One index file; parsed once per change and shared between threads."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._signature = None
+        self._games = None
+        self._ordered = None
+
+    def _read(self):
+        signature = file_signature(self.path)
+        if signature is None:
+            self._signature, self._games, self._ordered = None, None, None
+            return None
+        if signature != self._signature:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    payload = json.load(f)
+                games = payload["games"] if payload.get("version") == INDEX_VERSION else None
+            except (OSError, ValueError, KeyError, AttributeError):
+                games = None
+            self._signature, self._games, self._ordered = signature, games, None
+        return self._games
+
+    def _write(self, games):
+        temp_path = f"{self.path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "games": games}, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self._signature, self._games, self._ordered = file_signature(self.path), games, None
+
+    def exists(self):
+        with self._lock:
+            return self._read() is not None
+
+    def update(self, spel_id, data):
+        summary = summarize(data)
+        with self._lock:
+            games = dict(self._read() or {})
+            if games.get(spel_id) == summary:
+                return False
+            games[spel_id] = summary
+            self._write(games)
+            return True
+
+    def remove(self, spel_id):
+        with self._lock:
+            games = self._read()
+            if not games or spel_id not in games:
+                return False
+            games = dict(games)
+            del games[spel_id]
+            self._write(games)
+            return True
+
+    def replace_all(self, games):
+        """Overwrite the index with {spel_id: game dict}."""
+        summaries = {spel_id: summarize(data) for spel_id, data in games.items()}
+        with self._lock:
+            self._write(summaries)
+
+    def page(self, offset=0, limit=None):
+        """(summaries, total): running games first, newest first within each."""
+        with self._lock:
+            games = self._read() or {}
+            if self._ordered is None:
+                ordered = sorted(games.values(), key=_sort_key_newest, reverse=True)
+                ordered.sort(key=lambda g: 1 if g.get("avslutat") else 0)
+                self._ordered = ordered
+            ordered = self._ordered
+        end = None if limit is None else offset + limit
+        return [dict(item) for item in ordered[offset:end]], len(ordered)
+
+
+_indexes_guard = threading.Lock()
+_indexes = {}
+
+
+def index_for(data_dir):
+    path = os.path.abspath(os.path.join(data_dir, INDEX_FILENAME))
+    with _indexes_guard:
+        index = _indexes.get(path)
+        if index is None:
+            index = GameIndex(path)
+            _indexes[path] = index
+        return index
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if len(argv) not in (1, 2) or argv[0] != "rebuild":
+        print("Usage: python -m game_index rebuild [speldata-dir]")
+        return 2
+    import models
+
+    if len(argv) == 2:
+        models.DATA_DIR = argv[1]
+    count = models.rebuild_game_index()
+    print(f"Indexed {count} game(s) in {os.path.join(models.DATA_DIR, INDEX_FILENAME)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+Append-only change journal next to a game snapshot.
+
+In journal mode (``STABSSPEL_STORAGE=journal``) a save appends one line with
+the ``game_delta`` operations to ``game_<id>.journal`` instead of rewriting
+``game_<id>.json``. The snapshot is rewritten (compacted) only when the
+journal has grown as large as the snapshot itself.
+
+The first line of a journal names the snapshot it extends by its file
+signature (inode, mtime, size). A snapshot that is replaced by anything else
+- compaction, an upload, a restore, a save from a worker running in plain
+JSON mode - gets a new signature, and the old journal is then ignored. That
+makes compaction crash-safe without a second marker file: the new snapshot
+is in place before the journal is reset.
+
+Replay stops at the first incomplete line (a crash mid-append) or at the
+first complete record that does not decode or apply. Either way the next
+save sees the journal as torn and compacts from what was replayed, so
+nothing is ever appended after a record that replay cannot get past.
+"""
+
+import json
+import os
+import threading
+import uuid
+
+from game_cache import file_signature
+import durability
+import game_delta
+
+JOURNAL_VERSION = 1
+
+# Compact once the journal is this many times the snapshot size.
+JOURNAL_COMPACT_RATIO = 1.0
+
+# Journals whose last replay stopped at a bad record, by path: the journal
+# signature then and how many complete records were left unapplied.
+_stopped_guard = threading.Lock()
+_stopped = {}
+
+
+def journal_path(snapshot_path):
+    return os.path.splitext(snapshot_path)[0] + ".journal"
+
+
+def storage_signature(snapshot_path):
+    """Signature covering snapshot and journal, or None if the game is missing."""
+    snapshot = file_signature(snapshot_path)
+    if snapshot is None:
+        return None
+    return (snapshot, file_signature(journal_path(snapshot_path)))
+
+
+def _read_header(f):
+    try:
+        header = json.loads(f.readline())
+    except ValueError:
+        return None
+    if not isinstance(header, dict) or header.get("journal") != JOURNAL_VERSION:
+        return None
+    return tuple(header.get("base") or ())
+
+
+def status(snapshot_path, snapshot_signature):
+    """Return (state, size) for the journal of ``snapshot_path``.
+
+    state is ``"missing"``, ``"stale"`` (written for another snapshot),
+    ``"torn"`` (ends in a partial line, or replay stopped at a bad record)
+    or ``"ok"``.
+    """
+    path = journal_path(snapshot_path)
+    try:
+        with open(path, "rb") as f:
+            if _read_header(f) != tuple(snapshot_signature):
+                return "stale", 0
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(size - 1)
+            if f.read(1) != b"\n" or skipped(snapshot_path):
+                return "torn", size
+            return "ok", size
+    except FileNotFoundError:
+        return "missing", 0
+    except OSError:
+        return "torn", 0
+
+
+def should_compact(journal_size, snapshot_signature):
+    return journal_size >= snapshot_signature[2] * JOURNAL_COMPACT_RATIO
+
+
+def skipped(snapshot_path):
+    """Complete records the last replay of this journal could not apply."""
+    path = journal_path(snapshot_path)
+    with _stopped_guard:
+        stopped = _stopped.get(path)
+    if stopped is None or stopped[0] != file_signature(path):
+        return 0
+    return stopped[1]
+
+
+def _forget_stop(path):
+    with _stopped_guard:
+        _stopped.pop(path, None)
+
+
+def replay(snapshot_path, snapshot_signature, data):
+    """Apply the journal records that belong to this snapshot onto ``data``.
+
+    Stops at the first record that is incomplete or does not apply; see
+    ``skipped`` for how many complete records that left out.
+    """
+    path = journal_path(snapshot_path)
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return data
+    with f:
+        if _read_header(f) != tuple(snapshot_signature):
+            return data
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+                data = game_delta.apply(data, record["ops"])
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"Journal replay stopped in {path}: {e}")
+                left = 1 + sum(1 for rest in f if rest.endswith(b"\n"))
+                st = os.fstat(f.fileno())
+                with _stopped_guard:
+                    _stopped[path] = ((st.st_ino, st.st_mtime_ns, st.st_size), left)
+                return data
+    _forget_stop(path)
+    return data
+
+
+def reset(snapshot_path, snapshot_signature, level=durability.STRICT):
+    """Start an empty journal on top of the current snapshot."""
+    path = journal_path(snapshot_path)
+    temp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+    header = json.dumps({"journal": JOURNAL_VERSION, "base": list(snapshot_signature)})
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(header + "\n")
+            durability.sync(f, level)
+        os.replace(temp_path, path)
+        durability.settle(path, level)
+        _forget_stop(path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def append(snapshot_path, ops, level=durability.STRICT):
+    """Append one record (as durably as ``level``) and return its ops as they will replay."""
+    line = json.dumps({"ops": ops}, ensure_ascii=False, separators=(",", ":"))
+    path = journal_path(snapshot_path)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+        durability.sync(f, level)
+    durability.settle(path, level)
+    return json.loads(line)["ops"]
+
+
+def discard(snapshot_path):
+    path = journal_path(snapshot_path)
+    _forget_stop(path)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,280 @@
+"""
+Per-game locks that also hold across gunicorn worker processes.
+
+A ``GameLock`` behaves like the ``threading.RLock`` it replaces: the owning
+thread may take it again, and it is released when the outermost hold ends.
+On the first (outermost) acquire it also takes an ``fcntl.flock`` on
+``<DATA_DIR>/locks/game_<id>.lock``, so a second worker that wants the same
+game waits instead of overwriting the first worker's save. Platforms
+without ``fcntl`` (Windows dev machines) fall back to the thread lock only.
+
+Waiting is bounded. A timed-out acquire raises ``GameLockTimeout`` with a
+description of who holds the lock (the holder writes pid, thread, label and
+time into the lock file). Two threads in one process waiting on each other's
+games raise ``GameLockDeadlock`` at once instead of waiting for the timeout.
+``lock_metrics()`` reports acquisitions, contention, wait time and timeouts.
+"""
+
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+GAME_LOCK_TIMEOUT = float(os.environ.get("STABSSPEL_LOCK_TIMEOUT", "30"))
+
+# Waits longer than this are logged with the holder's description.
+SLOW_WAIT_SECONDS = 1.0
+
+
+class GameLockTimeout(TimeoutError):
+    """The lock was not free within the timeout."""
+
+
+class GameLockDeadlock(RuntimeError):
+    """Waiting would close a cycle of threads holding each other's games."""
+
+
+_graph_guard = threading.Lock()
+_waiting_for = {}  # thread ident -> GameLock it is blocked on
+
+_metrics_guard = threading.Lock()
+_metrics = {
+    "acquired": 0,
+    "contended": 0,
+    "timeouts": 0,
+    "deadlocks": 0,
+    "wait_seconds_total": 0.0,
+    "wait_seconds_max": 0.0,
+    "hold_seconds_max": 0.0,
+}
+
+
+def _record(**changes):
+    with _metrics_guard:
+        for key, value in changes.items():
+            if key.endswith("_max"):
+                _metrics[key] = max(_metrics[key], value)
+            else:
+                _metrics[key] += value
+
+
+def lock_metrics():
+    """Process-wide counters (no game ids, safe to expose)."""
+    with _metrics_guard:
+        snapshot = dict(_metrics)
+    snapshot["cross_process"] = fcntl is not None
+    snapshot["timeout_seconds"] = GAME_LOCK_TIMEOUT
+    snapshot["held"] = sum(1 for lock in list(_all_locks) if lock._owner is not None)
+    return snapshot
+
+
+_all_locks = []
+
+
+class GameLock:
+    """Re-entrant, timeout-aware lock for one game.
+
+    ``path`` is a callable returning the lock file path; it is evaluated at
+    each outermost acquire so a changed DATA_DIR (tests) is honoured.
+    """
+
+    def __init__(self, name, path):
+        self.name = name
+        self._path = path
+        self._thread_lock = threading.Lock()
+        self._owner = None
+        self._depth = 0
+        self._fd = None
+        self._held_since = None
+        self._label = ""
+        _all_locks.append(self)
+
+    # threading.RLock compatible API ------------------------------------
+
+    def acquire(self, blocking=True, timeout=-1, label=""):
+        me = threading.get_ident()
+        if self._owner == me:
+            self._depth += 1
+            return True
+        # Like RLock, an explicit timeout just returns False. The default
+        # wait is bounded too, but running out of it is an error.
+        raise_on_timeout = blocking and (timeout is None or timeout < 0)
+        if not blocking:
+            timeout = 0
+        elif raise_on_timeout:
+            timeout = GAME_LOCK_TIMEOUT
+        deadline = time.monotonic() + timeout
+        started = time.monotonic()
+
+        if not self._thread_lock.acquire(blocking=False):
+            if timeout == 0:
+                return False
+            self._check_deadlock(me)
+            _record(contended=1)
+            with _graph_guard:
+                _waiting_for[me] = self
+            try:
+                got = self._thread_lock.acquire(timeout=max(0.0, deadline - time.monotonic()))
+            finally:
+                with _graph_guard:
+                    _waiting_for.pop(me, None)
+            if not got:
+                return self._timed_out(raise_on_timeout, timeout)
+        try:
+            got_file = self._lock_file(deadline, blocking and timeout > 0)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        if not got_file:
+            self._thread_lock.release()
+            return self._timed_out(raise_on_timeout, timeout)
+
+        waited = time.monotonic() - started
+        self._owner = me
+        self._depth = 1
+        self._held_since = time.monotonic()
+        self._label = label
+        self._write_holder()
+        _record(acquired=1, wait_seconds_total=waited, wait_seconds_max=waited)
+        if waited >= SLOW_WAIT_SECONDS:
+            print(f"Game lock {self.name} waited {waited:.2f}s")
+        return True
+
+    def release(self):
+        if self._owner != threading.get_ident():
+            raise RuntimeError("cannot release un-acquired game lock")
+        self._depth -= 1
+        if self._depth:
+            return
+        held = time.monotonic() - self._held_since
+        self._owner = None
+        self._label = ""
+        self._unlock_file()
+        self._thread_lock.release()
+        _record(hold_seconds_max=held)
+
+    __enter__ = acquire
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+    # Cross-process part ---------------------------------------------------
+
+    def _lock_file(self, deadline, may_wait):
+        if fcntl is None:
+            return True
+        path = self._path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        delay = 0.005
+        contended = False
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                if self._is_current(fd, path):
+                    self._fd = fd
+                    return True
+                # The holder removed the file (remove_file); lock the new one.
+                os.close(fd)
+                fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+                continue
+            except BlockingIOError:
+                if not contended:
+                    contended = True
+                    _record(contended=1)
+                if not may_wait or time.monotonic() >= deadline:
+                    os.close(fd)
+                    return False
+                time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+                delay = min(delay * 2, 0.05)
+            except BaseException:
+                os.close(fd)
+                raise
+
+    @staticmethod
+    def _is_current(fd, path):
+        try:
+            on_disk = os.stat(path)
+        except FileNotFoundError:
+            return False
+        held = os.fstat(fd)
+        return (held.st_dev, held.st_ino) == (on_disk.st_dev, on_disk.st_ino)
+
+    def remove_file(self):
+        """Delete the lock file; only while held (a deleted game leaves none behind).
+
+        Waiters that locked the removed file notice and lock a new one.
+        """
+        if self._owner != threading.get_ident():
+            raise RuntimeError("cannot remove the file of an un-acquired game lock")
+        if fcntl is None:
+            return
+        try:
+            os.remove(self._path())
+        except FileNotFoundError:
+            pass
+
+    def _unlock_file(self):
+        fd, self._fd = self._fd, None
+        if fd is None:
+            return
+        try:
+            os.ftruncate(fd, 0)
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    def _write_holder(self):
+        if self._fd is None:
+            return
+        info = (
+            f"pid={os.getpid()} thread={threading.current_thread().name} "
+            f"since={time.strftime('%H:%M:%S')} {self._label}"
+        ).strip()
+        try:
+            os.ftruncate(self._fd, 0)
+            os.pwrite(self._fd, info.encode("utf-8", "replace"), 0)
+        except OSError:
+            pass
+
+    # Diagnostics -------------------------------------------------------
+
+    def holder(self):
+        """Best-effort description of the current holder."""
+        if self._owner is not None:
+            held = time.monotonic() - (self._held_since or time.monotonic())
+            thread = next((t.name for t in threading.enumerate() if t.ident == self._owner), self._owner)
+            return f"pid={os.getpid()} thread={thread} held={held:.1f}s {self._label}".strip()
+        try:
+            with open(self._path(), encoding="utf-8", errors="replace") as f:
+                return f.read().strip() or "okänd process"
+        except OSError:
+            return "okänd process"
+
+    def _timed_out(self, raise_on_timeout, timeout):
+        if timeout:
+            _record(timeouts=1)
+        if not raise_on_timeout:
+            return False
+        message = f"Game lock {self.name} not free after {timeout:.1f}s; held by {self.holder()}"
+        print(message)
+        raise GameLockTimeout(message)
+
+    def _check_deadlock(self, me):
+        with _graph_guard:
+            owner = self._owner
+            seen = set()
+            while owner is not None and owner not in seen:
+                if owner == me:
+                    _record(deadlocks=1)
+                    raise GameLockDeadlock(
+                        f"Game lock {self.name}: waiting would deadlock (held by {self.holder()})"
+                    )
+                seen.add(owner)
+                blocked_on = _waiting_for.get(owner)
+                owner = blocked_on._owner if blocked_on is not None else None
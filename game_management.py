@@ -5,7 +5,8 @@ This module contains functions for managing game data and operations.
 
 import os
 import json
-from models import DATA_DIR, save_game_data, load_game_data, game_lock_for
+from models import DATA_DIR, save_game_data, load_game_data, game_lock_for, delete_game_data
+from game_context import request_game, save_request_game
 
 
 def save_checkbox_state(spel_id, checkbox_id, checked):
@@ -17,7 +18,7 @@ def save_checkbox_state(spel_id, checkbox_id, checked):
         checkbox_id (str): The ID of the checkbox
         checked (bool): Whether the checkbox is checked
     """
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     if not data:
         return
     
@@ -25,7 +26,7 @@ def save_checkbox_state(spel_id, checkbox_id, checked):
         data["checkbox_states"] = {}
     
     data["checkbox_states"][checkbox_id] = checked
-    save_game_data(spel_id, data)
+    save_request_game(spel_id, data)
 
 
 def get_checkbox_state(data, checkbox_id):
@@ -55,17 +56,11 @@ def delete_game(spel_id):
         bool: True if a file was removed, False if it was already missing
     """
     try:
-        filnamn = os.path.join(DATA_DIR, f"game_{spel_id}.json")
-        removed = False
-        with game_lock_for(spel_id):
-            for path in (filnamn, filnamn + ".backup"):
-                if os.path.exists(path):
-                    os.remove(path)
-                    removed = True
+        removed = delete_game_data(spel_id)
         if removed:
             print(f"Successfully deleted game files for: {spel_id}")
         else:
-            print(f"Game file not found: {filnamn}")
+            print(f"Game not found: {spel_id}")
         return removed
     except Exception as e:
         print(f"Error deleting game {spel_id}: {e}")
@@ -11,11 +11,13 @@ from __future__ import annotations
 
 import copy
 import json
+import os
 import re
 import secrets
 import time
 from datetime import datetime
 from pathlib import Path
+import game_delta
 from models import (
     FASER,
     MAX_RUNDA,
@@ -33,6 +35,9 @@ LOG_LIMIT = 50
 TESTDATA_DIR = Path(__file__).resolve().parent / "testdata"
 LLM_PROMPT_PATH = Path(__file__).resolve().parent / "Docs" / "prompt.md"
 UNDO_KEEP_KEYS = ("gm_undo", "llm_resolution")
+# Team access (see models.reissue_team_tokens) is never rolled back by undo:
+# restoring older tokens would re-open revoked links.
+UNDO_CURRENT_KEYS = ("team_tokens", "token_salt", "token_generation")
 UTFALL_RESULTAT = ("framgång", "delvis framgång", "misslyckande")
 STATUS_LABELS = {
     "empty": "Tom",
@@ -42,6 +47,9 @@ STATUS_LABELS = {
 }
 BACKLOG_PHASES = ("Krav", "Design", "Utveckling", "Test")
 BACKLOG_OWNERS = {"alfa": "Alfa", "bravo": "Bravo", "stt": "STT"}
+# Cross-check the persisted backlog totals against a full recompute on every
+# read (tests switch this on; see tests/__init__.py).
+BACKLOG_TOTALS_VERIFY = os.environ.get("STABSSPEL_VERIFY_BACKLOG") == "1"
 
 
 def effective_hp(entry):
@@ -167,6 +175,12 @@ def push_undo(data, action, include_resolution=False):
     """Snapshot current state before a mutation.
 
     Dice in ``llm_resolution`` are excluded so ordinary undo cannot reroll.
+
+    Only the newest entry holds a full ``state``. When a new one is pushed,
+    the previous top is reduced to a reverse ``patch`` (game_delta ops that
+    turn the newer entry's state back into its own), so the saved game grows
+    with the size of each change rather than with the undo depth. Older
+    saves with a full state in every entry keep working.
     """
     snapshot = {
         k: copy.deepcopy(v) for k, v in data.items() if k not in UNDO_KEEP_KEYS
@@ -177,11 +191,21 @@ def push_undo(data, action, include_resolution=False):
         if "llm_resolution" in data:
             snapshot["llm_resolution"] = copy.deepcopy(data["llm_resolution"])
         entry["restore_resolution"] = True
+    if stack and "state" in stack[-1]:
+        top = stack[-1]
+        top["patch"] = game_delta.diff(snapshot, top.pop("state") or {})
     stack.append(entry)
     data["gm_undo"] = stack[-UNDO_LIMIT:]
     return data
 
 
+def _undo_entry_state(entry, newer_state):
+    """Full state of ``entry``; patch entries are relative to the newer state."""
+    if "state" in entry:
+        return entry.get("state") or {}
+    return game_delta.apply(copy.deepcopy(newer_state), entry.get("patch") or [])
+
+
 def _preserve_frozen_order_refs(source, restored):
     """Copy server-assigned refs into an undo snapshot that predates export."""
     source_rounds = source.get("team_orders") or {}
@@ -223,8 +247,17 @@ def apply_undo(data):
         return data, None
     frozen_resolution = copy.deepcopy(data.get("llm_resolution"))
     entry = stack.pop()
-    restored = copy.deepcopy(entry.get("state") or {})
+    state = entry.get("state") or {}
+    if stack and "state" not in stack[-1]:
+        # Keep the invariant that the top entry is a full snapshot.
+        below = stack[-1]
+        below["state"] = _undo_entry_state(below, state)
+        below.pop("patch", None)
+    restored = copy.deepcopy(state)
     _preserve_frozen_order_refs(data, restored)
+    for key in UNDO_CURRENT_KEYS:
+        if key in data:
+            restored[key] = data[key]
     restored["gm_undo"] = stack
     if not entry.get("restore_resolution"):
         if frozen_resolution is not None:
@@ -234,6 +267,23 @@ def apply_undo(data):
     return restored, entry.get("action") or "Ångra"
 
 
+def apply_restore_point(data, restored, label):
+    """Replace the game with a restore point; undo brings the current state back.
+
+    Team links, the undo stack and the GM log stay current, like in
+    ``apply_undo``; everything else, dice included, is taken from the point.
+    """
+    push_undo(data, f"Återställ sparpunkt {label}", include_resolution=True)
+    restored = copy.deepcopy(restored)
+    for key in UNDO_CURRENT_KEYS + ("gm_undo", "gm_log"):
+        if key in data:
+            restored[key] = data[key]
+        else:
+            restored.pop(key, None)
+    append_gm_log(restored, "undo", f"Återställde sparpunkt {label}")
+    return restored
+
+
 def append_gm_log(data, kind, message, extra=None):
     log = data.setdefault("gm_log", [])
     item = {
@@ -491,6 +541,14 @@ def snapshot_backlog_round(data):
             for phase in task.get("faser") or []:
                 if isinstance(phase, dict):
                     phase["tidigare_hp"] = int(phase.get("spenderade_hp") or 0)
+    totals = data.get("backlog_totals")
+    if isinstance(totals, dict) and "teams" in totals:
+        totals["runda"] = data.get("runda") or 1
+        totals["all"]["previous"] = totals["all"]["spent"]
+        for team in totals["teams"].values():
+            team["previous"] = team["spent"]
+            for task in team["tasks"].values():
+                task["previous"] = task["spent"]
     return data
 
 
@@ -625,6 +683,35 @@ def _conflict_key(activity):
     return f"name:{name}" if name else ""
 
 
+# Activity index ---------------------------------------------------------
+#
+# ``activity_index(data)`` maps this round's conflict keys to the teams
+# using them and backlog refs (``backlog_selected``) to the (team, index)
+# positions that picked them, in one pass over the round's orders. A caller
+# builds it once and then flags inbox conflicts and matches LLM milestones
+# by lookup instead of scanning every activity per row or milestone. It is
+# not stored with the game.
+
+
+def activity_index(data):
+    """This round's activity index, built from the current orders."""
+    index = {"conflicts": {}, "selected": {}}
+    for team in data.get("lag") or []:
+        record = _team_order_record(data, team)
+        activities = ((record or {}).get("orders") or {}).get("activities") or []
+        for position, activity in enumerate(activities):
+            if not isinstance(activity, dict):
+                continue
+            key = _conflict_key(activity)
+            if key:
+                teams = index["conflicts"].setdefault(key, {})
+                teams[team] = teams.get(team, 0) + 1
+            selected = (activity.get("backlog_selected") or "").strip()
+            if selected:
+                index["selected"].setdefault(selected, []).append([team, position])
+    return index
+
+
 def ensure_backlog(data):
     """Fill missing team backlogs from the template without resetting spend."""
     if "backlog" not in data or not isinstance(data["backlog"], dict):
@@ -633,9 +720,107 @@ def ensure_backlog(data):
     for team, tasks in template.items():
         if team not in data["backlog"]:
             data["backlog"][team] = tasks
+            data.pop("backlog_totals", None)
     return data
 
 
+# Backlog totals ---------------------------------------------------------
+#
+# ``data["backlog_totals"]`` holds spent/estimated/previous sums per task,
+# per team and for the whole game, plus per-team sums without recurring
+# tasks (what the room's progress bars show). The functions below that move
+# backlog HP update it in place; the board and progress views read it
+# instead of re-adding every task and phase. Code that rewrites
+# ``data["backlog"]`` wholesale drops the key (``reset_backlog_totals``) and
+# the next read rebuilds it.
+
+
+def _zero_totals():
+    return {"spent": 0, "estimated": 0, "previous": 0}
+
+
+def _task_totals(uppgift, runda):
+    sums = _zero_totals()
+    for item in uppgift.get("faser") or [uppgift]:
+        spent = int(item.get("spenderade_hp") or 0)
+        sums["spent"] += spent
+        sums["estimated"] += int(item.get("estimaterade_hp") or 0)
+        sums["previous"] += _previous_spent(item, spent, runda)
+    return sums
+
+
+def _is_recurring(uppgift):
+    return not uppgift.get("faser") and uppgift.get("typ") == "aterkommande"
+
+
+def compute_backlog_totals(data):
+    """Backlog totals from scratch (also the reference for verification)."""
+    runda = data.get("runda") or 1
+    totals = {"runda": runda, "all": _zero_totals(), "teams": {}}
+    for lag in data.get("lag") or []:
+        tasks = (data.get("backlog") or {}).get(lag)
+        if not tasks:
+            continue
+        team = dict(_zero_totals(), public_spent=0, public_estimated=0, tasks={})
+        for uppgift in tasks:
+            sums = _task_totals(uppgift, runda)
+            team["tasks"][uppgift.get("id") or ""] = sums
+            for key, value in sums.items():
+                team[key] += value
+                totals["all"][key] += value
+            if not _is_recurring(uppgift):
+                team["public_spent"] += sums["spent"]
+                team["public_estimated"] += sums["estimated"]
+        totals["teams"][lag] = team
+    return totals
+
+
+def reset_backlog_totals(data):
+    """Forget the totals after editing ``data["backlog"]`` directly."""
+    data.pop("backlog_totals", None)
+    return data
+
+
+def verify_backlog_totals(data):
+    """Raise RuntimeError if the stored totals differ from a full recompute."""
+    expected = compute_backlog_totals(data)
+    stored = data.get("backlog_totals")
+    if stored != expected:
+        raise RuntimeError(f"Backlog totals out of sync: stored {stored!r}, expected {expected!r}")
+
+
+def backlog_totals(data):
+    """The game's backlog totals, rebuilt if missing or from another round.
+
+    A read returns the stored totals as they are. Only the rebuild fills in
+    missing team backlogs (``ensure_backlog`` also drops the totals when it
+    adds a team, so they are never missing a team).
+    """
+    totals = data.get("backlog_totals")
+    if isinstance(totals, dict) and totals.get("runda") == (data.get("runda") or 1):
+        if BACKLOG_TOTALS_VERIFY:
+            verify_backlog_totals(data)
+        return totals
+    ensure_backlog(data)
+    totals = data["backlog_totals"] = compute_backlog_totals(data)
+    return totals
+
+
+def _add_to_backlog_totals(data, team, uppgift, amount):
+    totals = data.get("backlog_totals")
+    if not isinstance(totals, dict):
+        return  # built on the next read
+    team_totals = (totals.get("teams") or {}).get(team)
+    task_totals = (team_totals or {}).get("tasks", {}).get(uppgift.get("id") or "")
+    if task_totals is None:
+        reset_backlog_totals(data)
+        return
+    for bucket in (task_totals, team_totals, totals["all"]):
+        bucket["spent"] += amount
+    if not _is_recurring(uppgift):
+        team_totals["public_spent"] += amount
+
+
 def split_task_ref(task_id, phase=None):
     """Return (task_id, phase). Accepts 'alfa_1' or 'bravo_1_Krav'."""
     task_id = (task_id or "").strip()
@@ -713,6 +898,7 @@ def add_backlog_spend(data, team, task_id, amount, phase=None, log_actor=None):
     if fas is not None:
         label = f"{label} ({fas.get('namn')})"
     applied_amount = updated - current
+    _add_to_backlog_totals(data, team, uppgift, applied_amount)
     sign = "+" if applied_amount >= 0 else ""
     actor = log_actor or team
     append_gm_log(
@@ -805,8 +991,8 @@ def _backlog_estimated_hp(data, activity):
 
 def build_inbox(data):
     """Flat list of current-round activities plus conflict flags."""
+    conflicts = activity_index(data)["conflicts"]
     rows = []
-    groups = {}
     for lag in data.get("lag") or []:
         record = _team_order_record(data, lag)
         status = team_order_status(data, lag)
@@ -826,21 +1012,13 @@ def build_inbox(data):
                 "status": status,
                 "final": bool((record or {}).get("final")),
                 "conflict_key": key,
-                "conflict": False,
+                "conflict": len(conflicts.get(key) or ()) >= 2,
                 "backlog_selected": selected,
                 "backlog_applied": bool(activity.get("backlog_applied")),
                 "can_apply_backlog": _task_can_apply(activity),
                 "backlog_estimated": _backlog_estimated_hp(data, activity),
             }
             rows.append(row)
-            if key:
-                groups.setdefault(key, []).append(row)
-
-    for key, group in groups.items():
-        teams = {row["team"] for row in group}
-        if len(teams) >= 2:
-            for row in group:
-                row["conflict"] = True
     return rows
 
 
@@ -859,18 +1037,17 @@ def _previous_spent(item, spent, runda):
 
 def build_backlog_board(data):
     """Per-team backlog rows for the live console."""
-    ensure_backlog(data)
+    totals = backlog_totals(data)
     runda = data.get("runda") or 1
     board = []
     for lag in data.get("lag") or []:
         tasks = (data.get("backlog") or {}).get(lag)
         if not tasks:
             continue
+        team_totals = totals["teams"][lag]
         items = []
-        spent_total = 0
-        est_total = 0
-        prev_total = 0
         for uppgift in tasks:
+            task_totals = team_totals["tasks"][uppgift.get("id") or ""]
             faser = uppgift.get("faser") or []
             if faser:
                 phases = []
@@ -878,9 +1055,6 @@ def build_backlog_board(data):
                     estimated = int(fas.get("estimaterade_hp") or 0)
                     spent = int(fas.get("spenderade_hp") or 0)
                     previous = _previous_spent(fas, spent, runda)
-                    est_total += estimated
-                    spent_total += spent
-                    prev_total += previous
                     phases.append({
                         "name": fas.get("namn") or "",
                         "estimated": estimated,
@@ -892,36 +1066,32 @@ def build_backlog_board(data):
                     "id": uppgift.get("id") or "",
                     "name": uppgift.get("namn") or "",
                     "kind": "phased",
-                    "estimated": sum(p["estimated"] for p in phases),
-                    "spent": sum(p["spent"] for p in phases),
-                    "previous": sum(p["previous"] for p in phases),
+                    "estimated": task_totals["estimated"],
+                    "spent": task_totals["spent"],
+                    "previous": task_totals["previous"],
                     "done": bool(uppgift.get("slutford")),
                     "recurring": False,
                     "phases": phases,
                 })
             else:
-                estimated = int(uppgift.get("estimaterade_hp") or 0)
-                spent = int(uppgift.get("spenderade_hp") or 0)
-                previous = _previous_spent(uppgift, spent, runda)
-                est_total += estimated
-                spent_total += spent
-                prev_total += previous
                 items.append({
                     "id": uppgift.get("id") or "",
                     "name": uppgift.get("namn") or "",
                     "kind": "simple",
-                    "estimated": estimated,
-                    "spent": spent,
-                    "previous": previous,
+                    "estimated": task_totals["estimated"],
+                    "spent": task_totals["spent"],
+                    "previous": task_totals["previous"],
                     "done": bool(uppgift.get("slutford")),
                     "recurring": uppgift.get("typ") == "aterkommande",
                     "phases": [],
                 })
         board.append({
             "team": lag,
-            "spent": spent_total,
-            "previous": prev_total,
-            "estimated": est_total,
+            "spent": team_totals["spent"],
+            "previous": team_totals["previous"],
+            "estimated": team_totals["estimated"],
+            "public_spent": team_totals["public_spent"],
+            "public_estimated": team_totals["public_estimated"],
             "items": items,
         })
     return board
@@ -938,13 +1108,9 @@ def build_public_progress(data):
     progress = []
     for team in build_backlog_board(data):
         items = []
-        spent = 0
-        estimated = 0
         for item in team.get("items") or []:
             if item.get("recurring"):
                 continue
-            spent += int(item.get("spent") or 0)
-            estimated += int(item.get("estimated") or 0)
             entry = {
                 "name": item.get("name") or "",
                 "spent": int(item.get("spent") or 0),
@@ -960,6 +1126,7 @@ def build_public_progress(data):
             items.append(entry)
         if not items:
             continue
+        spent, estimated = team["public_spent"], team["public_estimated"]
         progress.append({
             "team": team["team"],
             "spent": spent,
@@ -1756,18 +1923,17 @@ def _milestone_selected_refs(item):
     return refs
 
 
-def _activity_matches_milestone(activity, item):
-    selected = str((activity or {}).get("backlog_selected") or "").strip()
-    return bool(selected and selected in _milestone_selected_refs(item))
-
-
-def _round_activities(data):
-    for team in data.get("lag") or []:
-        record = _team_order_record(data, team)
-        activities = ((record or {}).get("orders") or {}).get("activities") or []
-        for activity in activities:
-            if isinstance(activity, dict):
-                yield activity
+def _milestone_activities(data, item, index=None):
+    """Current-round activities whose backlog pick matches milestone ``item``."""
+    index = index if index is not None else activity_index(data)
+    matched = []
+    for ref in _milestone_selected_refs(item):
+        for team, position in index["selected"].get(ref) or []:
+            record = _team_order_record(data, team)
+            activities = ((record or {}).get("orders") or {}).get("activities") or []
+            if position < len(activities):
+                matched.append(activities[position])
+    return matched
 
 
 def llm_milestone_manual_status(data, forslag=None):
@@ -1777,14 +1943,11 @@ def llm_milestone_manual_status(data, forslag=None):
     if not items:
         return "none"
 
-    activities = list(_round_activities(data))
+    index = activity_index(data)
     matched = []
     has_unmatched_suggestion = False
     for item in items:
-        item_matches = [
-            activity for activity in activities
-            if _activity_matches_milestone(activity, item)
-        ]
+        item_matches = _milestone_activities(data, item, index)
         if not item_matches:
             has_unmatched_suggestion = True
         matched.extend(item_matches)
@@ -1796,10 +1959,9 @@ def llm_milestone_manual_status(data, forslag=None):
     return "partial"
 
 
-def _mark_milestone_activities_applied(data, item):
-    for activity in _round_activities(data):
-        if _activity_matches_milestone(activity, item):
-            activity["backlog_applied"] = True
+def _mark_milestone_activities_applied(data, item, index=None):
+    for activity in _milestone_activities(data, item, index):
+        activity["backlog_applied"] = True
 
 
 def _sync_llm_milestones_from_inbox(data):
@@ -1833,6 +1995,8 @@ def apply_llm_milestones(data):
     if not items:
         raise ValueError("Inga milstolpeförslag att tillämpa.")
     applied = 0
+    # Spending and marking activities applied leave the index as it is.
+    index = activity_index(data)
     for item in items:
         try:
             if applied == 0:
@@ -1845,7 +2009,7 @@ def apply_llm_milestones(data):
                 item.get("fas"),
                 item.get("orsak") or "LLM-förslag",
             )
-            _mark_milestone_activities_applied(data, item)
+            _mark_milestone_activities_applied(data, item, index)
             applied += 1
         except ValueError:
             continue
@@ -1928,11 +2092,12 @@ def build_live_state(data):
         llm_milestones and not (llm or {}).get("milestones_handled")
     )
     manual_status = (llm or {}).get("milestones_manual_status") or "none"
+    milestone_refs = set()
+    for item in llm_milestones:
+        milestone_refs |= _milestone_selected_refs(item)
     inbox_action_count = 0
     for row in inbox:
-        matches_llm = any(
-            _activity_matches_milestone(row, item) for item in llm_milestones
-        )
+        matches_llm = bool(row["backlog_selected"]) and row["backlog_selected"] in milestone_refs
         row["llm_milestone"] = matches_llm
         row["backlog_action"] = "done" if row.get("backlog_applied") else "manual"
         if row.get("can_apply_backlog"):
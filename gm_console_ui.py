@@ -7,6 +7,7 @@ workflow first-class and puts orders, HP, time, and phase on one screen.
 """
 
 from markupsafe import escape
+import hashlib
 import json
 import re
 from gm_console import STATUS_LABELS, build_live_state, build_public_state
@@ -122,6 +123,24 @@ _HEROICONS = {
         '<path stroke-linecap="round" stroke-linejoin="round" '
         'd="M3.75 6A2.25 2.25 0 0 1 6 3.75h2.25A2.25 2.25 0 0 1 10.5 6v2.25a2.25 2.25 0 0 1-2.25 2.25H6a2.25 2.25 0 0 1-2.25-2.25V6ZM3.75 15.75A2.25 2.25 0 0 1 6 13.5h2.25a2.25 2.25 0 0 1 2.25 2.25V18A2.25 2.25 0 0 1 8.25 20.25H6A2.25 2.25 0 0 1 3.75 18v-2.25ZM13.5 6a2.25 2.25 0 0 1 2.25-2.25H18A2.25 2.25 0 0 1 20.25 6v2.25A2.25 2.25 0 0 1 18 10.5h-2.25a2.25 2.25 0 0 1-2.25-2.25V6ZM13.5 15.75a2.25 2.25 0 0 1 2.25-2.25H18a2.25 2.25 0 0 1 2.25 2.25V18A2.25 2.25 0 0 1 18 20.25h-2.25A2.25 2.25 0 0 1 13.5 18v-2.25Z"/>'
     ),
+    "key": (
+        '<path stroke-linecap="round" stroke-linejoin="round" '
+        'd="M15.75 5.25a3 3 0 0 1 3 3m3 0a6 6 0 0 1-7.029 5.912c-.563-.097-1.159.026-1.563.43L10.5 17.25H8.25v2.25H6v2.25H2.25v-2.818c0-.597.237-1.17.659-1.591l6.499-6.499c.404-.404.527-1 .43-1.563A6 6 0 1 1 21.75 8.25Z"/>'
+    ),
+    "qr-code": (
+        '<path stroke-linecap="round" stroke-linejoin="round" '
+        'd="M3.75 4.875c0-.621.504-1.125 1.125-1.125h4.5c.621 0 1.125.504 1.125 1.125v4.5c0 .621-.504 1.125-1.125 1.125h-4.5A1.125 1.125 0 0 1 3.75 9.375v-4.5ZM3.75 14.625c0-.621.504-1.125 1.125-1.125h4.5c.621 0 1.125.504 1.125 1.125v4.5c0 .621-.504 1.125-1.125 1.125h-4.5a1.125 1.125 0 0 1-1.125-1.125v-4.5ZM13.5 4.875c0-.621.504-1.125 1.125-1.125h4.5c.621 0 1.125.504 1.125 1.125v4.5c0 .621-.504 1.125-1.125 1.125h-4.5A1.125 1.125 0 0 1 13.5 9.375v-4.5Z"/>'
+        '<path stroke-linecap="round" stroke-linejoin="round" '
+        'd="M6.75 6.75h.75v.75h-.75v-.75ZM6.75 16.5h.75v.75h-.75v-.75ZM16.5 6.75h.75v.75h-.75v-.75ZM13.5 13.5h.75v.75h-.75v-.75ZM13.5 19.5h.75v.75h-.75v-.75ZM19.5 13.5h.75v.75h-.75v-.75ZM19.5 19.5h.75v.75h-.75v-.75ZM16.5 16.5h.75v.75h-.75v-.75Z"/>'
+    ),
+    "printer": (
+        '<path stroke-linecap="round" stroke-linejoin="round" '
+        'd="M6.72 13.829c-.24.03-.48.062-.72.096m.72-.096a42.415 42.415 0 0 1 10.56 0m-10.56 0L6.34 18m10.94-4.171c.24.03.48.062.72.096m-.72-.096L17.66 18m0 0 .229 2.523a1.125 1.125 0 0 1-1.12 1.227H7.231c-.662 0-1.18-.568-1.12-1.227L6.34 18m11.318 0h1.091A2.25 2.25 0 0 0 21 15.75V9.456c0-1.081-.768-2.015-1.837-2.175a48.055 48.055 0 0 0-1.913-.247M6.34 18H5.25A2.25 2.25 0 0 1 3 15.75V9.456c0-1.081.768-2.015 1.837-2.175a48.041 48.041 0 0 1 1.913-.247m10.5 0a48.536 48.536 0 0 0-10.5 0m10.5 0V3.375c0-.621-.504-1.125-1.125-1.125h-8.25c-.621 0-1.125.504-1.125 1.125v3.659M18 10.5h.008v.008H18V10.5Zm-3 0h.008v.008H15V10.5Z"/>'
+    ),
+    "clock": (
+        '<path stroke-linecap="round" stroke-linejoin="round" '
+        'd="M12 6v6h4.5m4.5 0a9 9 0 1 1-18 0 9 9 0 0 1 18 0Z"/>'
+    ),
     "arrow-path": (
         '<path stroke-linecap="round" stroke-linejoin="round" '
         'd="M16.023 9.348h4.992v-.001M2.985 19.644v-4.992m0 0h4.992m-4.993 0 3.181 3.183a8.25 8.25 0 0 0 13.803-3.7M4.031 9.865a8.25 8.25 0 0 1 13.803-3.7l3.181 3.182m0-4.991v4.99"/>'
@@ -177,7 +196,14 @@ def gm_app_menu_html(spel_id, test_mode=False, runda=1, has_orders=False):
         f'{_gm_menu_item(f"/admin/{sid}/backlog", "queue-list", "Backlog")}'
         f'{_gm_menu_item(f"/admin/{sid}/aktivitetskort", "identification", "Aktivitetskort", " target=_blank")}'
         f'{_gm_menu_item(f"/admin/{sid}/order_summary", "arrow-up-tray", "LLM-export")}'
+        f'{_gm_menu_item(f"/admin/{sid}/restore_points", "clock", "Sparpunkter")}'
+        f'{_gm_menu_item(f"/admin/{sid}/qr_sheet", "qr-code", "QR-koder", " target=_blank")}'
+        f'{_gm_menu_item(f"/admin/{sid}/print_pack", "printer", "Utskriftspaket", " target=_blank")}'
         f'{_gm_menu_item("/admin", "squares-2x2", "Alla spel")}'
+        f'<form method="post" action="/admin/{sid}/team_tokens" '
+        f"onsubmit=\"return confirm('Skapa nya laglänkar? Alla utskrivna QR-koder och gamla länkar slutar gälla.');\">"
+        f'<button type="submit" class="gm-menu-item" role="menuitem">'
+        f'{_heroicon("key")}Nya laglänkar</button></form>'
         f'<form method="post" action="/admin/{sid}/reset" class="gm-menu-danger" '
         f"onsubmit=\"return confirm('Återställ HELA spelet till runda 1? Detta går att ångra en gång, men raderar rundor och ordrar.');\">"
         f'<button type="submit" class="danger gm-menu-item" role="menuitem">'
@@ -666,8 +692,59 @@ def live_html_fragments(spel_id, state):
     }
 
 
-def create_gm_console_html(spel_id, data, llm_view=None, banner=""):
-    state = build_live_state(data)
+def live_digest(value):
+    blob = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.blake2b(blob.encode("utf-8"), digest_size=6).hexdigest()
+
+
+def parse_live_known(header):
+    """``s.key=hash,h.key=hash`` (the X-Live-Known header) as a dict, or None."""
+    if not header:
+        return None
+    known = {}
+    for item in header.split(","):
+        key, _, digest = item.strip().partition("=")
+        if key and digest:
+            known[key] = digest
+    return known
+
+
+def live_parts(spel_id, state):
+    """(HTML fragments, content hashes) for a live state."""
+    html = live_html_fragments(spel_id, state)
+    hashes = {f"s.{key}": live_digest(value) for key, value in state.items()}
+    hashes.update({f"h.{key}": live_digest(value) for key, value in html.items()})
+    return html, hashes
+
+
+def live_payload(spel_id, state, known=None, parts=None):
+    """JSON body for the console's live poll, event stream and mutations.
+
+    Every state key (``s.<key>``) and HTML fragment (``h.<name>``) carries a
+    content hash. ``known`` maps those names to the hashes the client already
+    holds; given it, only parts whose hash differs are sent (``delta``),
+    with their new hashes, and the client patches just those. Without it the
+    whole state and every fragment go out. ``parts`` is a precomputed
+    ``live_parts`` result (see ``live_view``).
+    """
+    html, hashes = parts or live_parts(spel_id, state)
+    if known is None:
+        return {"success": True, "state": state, "html": html, "hashes": hashes}
+    payload = {"success": True, "delta": True, "state": {}, "html": {}, "hashes": {}}
+    for key, digest in hashes.items():
+        if known.get(key) != digest:
+            section, source = ("state", state) if key.startswith("s.") else ("html", html)
+            payload[section][key[2:]] = source[key[2:]]
+            payload["hashes"][key] = digest
+    removed = [key for key in known if key not in hashes]
+    if removed:
+        payload["removed"] = removed
+    return payload
+
+
+def create_gm_console_html(spel_id, data, llm_view=None, banner="", state=None):
+    if state is None:
+        state = build_live_state(data)
     runda = state["runda"]
     fas = state["fas"]
     remaining = state["remaining"]
@@ -1441,7 +1518,7 @@ def create_projector_html(spel_id, data):
   <meta name="viewport" content="width=device-width, initial-scale=1.0">
   <title>Spelarskärm – runda {state["runda"]}</title>
   <meta http-equiv="Cache-Control" content="no-cache, no-store, must-revalidate">
-  <link rel="stylesheet" href="/static/app.css?v=36">
+  <link rel="stylesheet" href="/static/app.css">
 </head>
 <body class="projector-page">
   <script type="application/json" id="projector-state">{state_json}</script>
@@ -1458,7 +1535,7 @@ def create_projector_html(spel_id, data):
   <button type="button" class="projector-audio-hint" id="projector-audio-hint" hidden>
     Klicka för ljudvarningar
   </button>
-  <script src="/static/projector.js?v=4"></script>
+  <script src="/static/projector.js"></script>
 </body>
 </html>
 '''
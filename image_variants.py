@@ -0,0 +1,105 @@
+"""
+Downscaled WebP and progressive JPEG variants of the background images.
+
+The PNGs in ``static/backgrounds/`` are 1.2-2.2 MB each and were loaded at
+full size by every projector, GM console and phone. This offline step
+writes, next to each ``<name>.png``::
+
+    variants/<name>-<width>.webp
+    variants/<name>-<width>.jpg     (progressive)
+
+for every width in ``WIDTHS`` up to the source's own width. ``app.css``
+picks one by viewport width with media queries, and by format with
+``image-set(... type("image/webp"), ... type("image/jpeg"))``. Browsers
+without ``image-set`` keep the plain JPEG declared before it.
+
+Re-run after adding or changing a background (up-to-date variants are
+skipped) and commit the results::
+
+    python -m image_variants build static/backgrounds
+"""
+
+import os
+import sys
+
+from PIL import Image
+
+WIDTHS = (640, 1280, 1920)
+VARIANTS_DIRNAME = "variants"
+FORMATS = {
+    "webp": ("WEBP", {"quality": 78, "method": 6}),
+    "jpg": ("JPEG", {"quality": 80, "progressive": True, "optimize": True}),
+}
+# Fill for transparent pixels, since JPEG has no alpha (app.css --c-bg).
+MATTE = (0xFA, 0xFB, 0xFC)
+
+
+def variant_path(folder, name, width, extension):
+    return os.path.join(folder, VARIANTS_DIRNAME, f"{name}-{width}.{extension}")
+
+
+def _widths_for(source_width):
+    """``WIDTHS`` below the source width, plus the source width itself up to the largest."""
+    widths = [width for width in WIDTHS if width < source_width]
+    if source_width <= WIDTHS[-1]:
+        widths.append(source_width)
+    return widths
+
+
+def _flatten(image):
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, MATTE)
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def build_variants(source, folder=None, force=False):
+    """Write the variants of one image. Returns the paths written."""
+    folder = folder or os.path.dirname(source)
+    name = os.path.splitext(os.path.basename(source))[0]
+    source_mtime = os.path.getmtime(source)
+    written = []
+    with Image.open(source) as original:
+        image = _flatten(original)
+    for width in _widths_for(image.width):
+        height = round(image.height * width / image.width)
+        resized = None
+        for extension, (image_format, options) in FORMATS.items():
+            target = variant_path(folder, name, width, extension)
+            if not force and os.path.exists(target) and os.path.getmtime(target) >= source_mtime:
+                continue
+            if resized is None:
+                resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            temp = f"{target}.tmp"
+            resized.save(temp, image_format, **options)
+            os.replace(temp, target)
+            written.append(target)
+    return written
+
+
+def build_folder(folder, force=False):
+    """Variants for every PNG in ``folder``. Returns the paths written."""
+    written = []
+    for fil in sorted(os.listdir(folder)):
+        if fil.lower().endswith(".png"):
+            written.extend(build_variants(os.path.join(folder, fil), folder, force))
+    return written
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    force = "--force" in argv
+    argv = [arg for arg in argv if arg != "--force"]
+    if len(argv) != 2 or argv[0] != "build":
+        print("Usage: python -m image_variants build <image-dir> [--force]")
+        return 2
+    written = build_folder(argv[1], force)
+    print(f"Wrote {len(written)} image variant(s) in {os.path.join(argv[1], VARIANTS_DIRNAME)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+"""
+ETag / If-None-Match for the polled live JSON endpoints.
+
+The GM console, projectors and team timers poll every few seconds, and most
+polls see no change. ``live_etag`` builds a validator from the revision that
+``save_game_data`` persists with each game (see ``models.game_etag``), so it
+is the same in every worker and costs no state rebuild. A route checks
+``not_modified`` first and only builds its payload when that returns None.
+"""
+
+from flask import Response, request
+
+from models import game_etag
+
+
+def live_etag(spel_id, *parts):
+    """ETag for the current stored game plus ``parts``, or None if it is missing."""
+    tag = game_etag(spel_id)
+    if tag is None:
+        return None
+    return "-".join([str(spel_id), tag, *(str(part) for part in parts)])
+
+
+def not_modified(etag):
+    """A 304 response if the client already has ``etag``, else None."""
+    if etag and request.if_none_match.contains_weak(etag):
+        return tagged(Response(status=304), etag)
+    return None
+
+
+def tagged(response, etag):
+    """Attach ``etag``; ``no-cache`` makes browsers revalidate every poll."""
+    if etag:
+        response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
@@ -0,0 +1,92 @@
+"""
+Memoized GM console state, shared by every caller and open tab.
+
+``build_live_state`` walks orders, inbox, conflict groups, the team strip,
+the backlog board and the LLM view, and ``live_parts`` renders and hashes
+the fragments on top of that. Two consoles on the same game used to do all
+of it twice per poll. ``live_view`` keeps one result per (game, revision)
+in a small LRU and hands it to the poll, the event stream, the mutation
+responses and the panel page alike. Only the phase clock (``remaining``)
+is recomputed per call.
+
+The key combines the game's storage revision (``models.game_revision``)
+with the revision stamped into the dict by ``save_game_data``, so a state
+built from an older copy is never served for a newer one. Callers must pass
+the game as loaded or as just saved, not a dict with unsaved edits.
+"""
+
+import threading
+from collections import OrderedDict
+
+from gm_console import build_live_state
+from gm_console_ui import live_digest, live_parts
+from models import game_revision, get_phase_timer
+
+LIVE_VIEW_MAX_ENTRIES = 32
+
+_guard = threading.Lock()
+_views = OrderedDict()
+_metrics = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+class LiveView:
+    __slots__ = ("state", "html", "hashes")
+
+    def __init__(self, state, html, hashes):
+        self.state = state
+        self.html = html
+        self.hashes = hashes
+
+    @property
+    def parts(self):
+        return self.html, self.hashes
+
+
+def _key(spel_id, data):
+    revision = game_revision(spel_id)
+    if revision is None:
+        return None
+    return (str(spel_id), revision, data.get("revision"))
+
+
+def _with_clock(view, data):
+    remaining = get_phase_timer(data)
+    if remaining == view.state.get("remaining"):
+        return view
+    hashes = dict(view.hashes)
+    hashes["s.remaining"] = live_digest(remaining)
+    return LiveView(dict(view.state, remaining=remaining), view.html, hashes)
+
+
+def live_view(spel_id, data):
+    """Shared ``LiveView`` for ``data``; treat its contents as read-only."""
+    key = _key(spel_id, data)
+    if key is not None:
+        with _guard:
+            view = _views.get(key)
+            if view is not None:
+                _views.move_to_end(key)
+                _metrics["hits"] += 1
+        if view is not None:
+            return _with_clock(view, data)
+    state = build_live_state(data)
+    view = LiveView(state, *live_parts(spel_id, state))
+    if key is not None:
+        with _guard:
+            _metrics["misses"] += 1
+            _views[key] = view
+            _views.move_to_end(key)
+            while len(_views) > LIVE_VIEW_MAX_ENTRIES:
+                _views.popitem(last=False)
+                _metrics["evictions"] += 1
+    return view
+
+
+def live_view_metrics():
+    with _guard:
+        return dict(_metrics, entries=len(_views))
+
+
+def clear_live_views():
+    with _guard:
+        _views.clear()
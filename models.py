@@ -1,7 +1,6 @@
 import os
 import json
 import copy
-import shutil
 import threading
 import uuid
 from datetime import datetime
@@ -9,27 +8,82 @@ import time
 import secrets
 import hashlib
 import base64
+from game_cache import GameCache, file_signature
+from game_locks import GameLock
+from draft_buffer import DraftBuffer
+import durability as _durability
+import game_backups
+import game_delta
+import game_journal
+import sqlite_store
+import segment_store
+import game_index
+import signed_tokens
 
 _save_locks_guard = threading.Lock()
 _save_locks = {}
 
 SESSION_TIMEOUT_SECONDS = 6 * 60 * 60  # Cover a full live event
 
+# "json" rewrites game_<id>.json on every save; "journal" appends deltas to
+# game_<id>.journal and compacts now and then (see game_journal.py);
+# "sqlite" keeps every game in DATA_DIR/stabsspel.sqlite3 (see sqlite_store.py);
+# "segments" writes only the changed parts of a game (see segment_store.py).
+STORAGE_MODE = os.environ.get("STABSSPEL_STORAGE", "json").strip().lower()
+
+# "random" (the default) gives new games random team tokens, checked
+# against the stored copy; "signed" opts in to HMAC-signed tokens that are
+# checked without reading the game (see signed_tokens.py).
+TEAM_TOKEN_SCHEME = os.environ.get("STABSSPEL_TEAM_TOKENS", "random").strip().lower()
+# How long a signed token is accepted on the cached salt/generation alone.
+TEAM_TOKEN_RECHECK_SECONDS = 5
+
+# Draft saves (team autosaves) can be written behind: at the latest this
+# long after the game first became dirty, or once no draft arrived for
+# DRAFT_IDLE_SECONDS. 0, the default, writes every draft at once. The buffer
+# is per process, so it also needs STABSSPEL_SINGLE_WORKER=1: the operator's
+# promise that one process serves every game (see draft_buffer.py).
+DRAFT_FLUSH_SECONDS = float(os.environ.get("STABSSPEL_DRAFT_FLUSH_SECONDS", "0"))
+DRAFT_IDLE_SECONDS = float(os.environ.get("STABSSPEL_DRAFT_IDLE_SECONDS", "2"))
+SINGLE_WORKER = os.environ.get("STABSSPEL_SINGLE_WORKER", "0") == "1"
+
+# Parsed games shared by every request in this process (see game_cache.py).
+_game_cache = GameCache(signature=game_journal.storage_signature)
+
+
+def storage_metrics():
+    """Storage mode and this worker's game cache counters."""
+    metrics = {
+        "mode": STORAGE_MODE,
+        "cache": _game_cache.stats(),
+        "drafts": _drafts.stats(),
+        "durability": _durability.durability_metrics(),
+    }
+    if STORAGE_MODE == "segments":
+        metrics["segments"] = _segment_store().stats()
+    return metrics
+
+
+def _lock_file_path(spel_id):
+    return os.path.join(DATA_DIR, "locks", f"game_{spel_id}.lock")
+
 
 def _save_lock_for(spel_id):
+    spel_id = str(spel_id)
     with _save_locks_guard:
         lock = _save_locks.get(spel_id)
         if lock is None:
             # Request handlers hold this lock across load -> mutate -> save.
-            # save_game_data also takes it, so it must be re-entrant.
-            lock = threading.RLock()
+            # save_game_data also takes it, so it must be re-entrant. It also
+            # locks a file so other gunicorn workers wait (see game_locks.py).
+            lock = GameLock(spel_id, lambda: _lock_file_path(spel_id))
             _save_locks[spel_id] = lock
         return lock
 
 
 def game_lock_for(spel_id):
     """Return the per-game lock used to serialize read-modify-write mutations."""
-    return _save_lock_for(str(spel_id))
+    return _save_lock_for(spel_id)
 
 TEAMS = [
     ("Alfa", 25),
@@ -64,9 +118,13 @@ def get_default_password():
     """Returnera standardlösenord för befintliga spel"""
     return "apa123"
 
-def check_game_password(spel_id, provided_password):
-    """Kontrollera om angivet lösenord stämmer för spelet"""
-    data = load_game_data(spel_id)
+def check_game_password(spel_id, provided_password, data=None):
+    """Kontrollera om angivet lösenord stämmer för spelet
+
+    ``data`` är spelet om anroparen redan har läst det.
+    """
+    if data is None:
+        data = load_game_data(spel_id)
     if not data:
         return False
     
@@ -366,7 +424,7 @@ AKTIVITETSKORT = {
     ]
 }
 
-DATA_DIR = "speldata"
+DATA_DIR = os.environ.get("STABSSPEL_DATA_DIR", "speldata")
 os.makedirs(DATA_DIR, exist_ok=True)
 
 FASER = ["Orderfas", "Diplomatifas", "Resultatfas"]
@@ -420,17 +478,23 @@ def list_saved_games():
     games = []
     if not os.path.isdir(DATA_DIR):
         return games
+    if STORAGE_MODE == "sqlite":
+        store = _sqlite_store()
+        games = [g for g in map(store.load, store.list_ids()) if isinstance(g, dict) and g.get("id")]
+        games.sort(key=lambda g: str(g.get("skapad") or g.get("datum") or ""), reverse=True)
+        return games
+    if STORAGE_MODE == "segments":
+        store = _segment_store()
+        loaded = (store.load(spel_id, (segment_store.CORE,)) for spel_id in store.list_ids())
+        games = [g for g in loaded if isinstance(g, dict) and g.get("id")]
+        games.sort(key=lambda g: str(g.get("skapad") or g.get("datum") or ""), reverse=True)
+        return games
     for fil in os.listdir(DATA_DIR):
         if not fil.startswith("game_") or not fil.endswith(".json"):
             continue
-        path = os.path.join(DATA_DIR, fil)
-        try:
-            with open(path, encoding="utf-8") as f:
-                data = json.load(f)
-            if isinstance(data, dict) and data.get("id"):
-                games.append(data)
-        except (OSError, json.JSONDecodeError):
-            continue
+        data = _load_game_file(os.path.join(DATA_DIR, fil))
+        if isinstance(data, dict) and data.get("id"):
+            games.append(data)
     games.sort(key=lambda g: str(g.get("skapad") or g.get("datum") or ""), reverse=True)
     return games
 
@@ -444,18 +508,145 @@ def get_fas_minutes(data):
     else:
         return 0
 
-def load_game_data(spel_id):
-    """Ladda speldata från fil med felhantering"""
-    filnamn = os.path.join(DATA_DIR, f"game_{spel_id}.json")
-    if not os.path.exists(filnamn):
+def game_file_path(spel_id):
+    return os.path.join(DATA_DIR, f"game_{spel_id}.json")
+
+
+def _sqlite_store():
+    return sqlite_store.store_for(os.path.join(DATA_DIR, sqlite_store.SQLITE_FILENAME))
+
+
+def _segment_store():
+    return segment_store.store_for(DATA_DIR)
+
+
+def _snapshot_path(spel_id):
+    """The file a save replaces: ``game_<id>.json``, or the segment manifest."""
+    if STORAGE_MODE == "segments":
+        return _segment_store().core_path(str(spel_id))
+    return game_file_path(spel_id)
+
+
+def game_revision(spel_id):
+    """Cheap change marker for a game, or None if it is not cached/stale.
+
+    Bumped by save_game_data and whenever load_game_data re-reads a file that
+    changed on disk. Only comparable within one process, except in sqlite
+    mode where it is the revision stored with the game. A pending draft
+    (write-behind) adds its own revision, so watchers see it at once.
+    """
+    if STORAGE_MODE == "sqlite":
+        return _sqlite_store().revision(str(spel_id))
+    if STORAGE_MODE == "segments":
+        revision = _segment_store().revision(str(spel_id))
+    else:
+        revision = _game_cache.revision(os.path.abspath(game_file_path(spel_id)))
+    draft = _pending_draft(spel_id) if revision is not None else None
+    if draft is not None:
+        return f"{revision}.{draft.tag}"
+    return revision
+
+
+def _draft_base(spel_id):
+    """What a draft of ``spel_id`` is based on: the file and its signature."""
+    filnamn = os.path.abspath(_snapshot_path(spel_id))
+    return (filnamn, game_journal.storage_signature(filnamn))
+
+
+def _pending_draft(spel_id):
+    key = str(spel_id)
+    if not _drafts.holds(key):
+        return None
+    return _drafts.peek(key, _draft_base(spel_id))
+
+
+def _data_revision(data):
+    try:
+        return int(data.get("revision") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+# Highest stored revision this process has loaded or saved, per game file.
+# Saves stay past it without reading the game again (see _stamp_revision).
+_seen_revisions_guard = threading.Lock()
+_seen_revisions = {}
+
+
+def _saw_revision(spel_id, data):
+    if data:
+        key = os.path.abspath(_snapshot_path(spel_id))
+        revision = _data_revision(data)
+        with _seen_revisions_guard:
+            if revision > _seen_revisions.get(key, 0):
+                _seen_revisions[key] = revision
+    return data
+
+
+def _known_tag(spel_id):
+    """Stored revision (or pending draft's) without reading the game, else None."""
+    draft = _pending_draft(spel_id)
+    if draft is not None:
+        return draft.tag
+    if STORAGE_MODE == "segments":
+        return _segment_store().tag(str(spel_id))
+    return _game_cache.tag(os.path.abspath(game_file_path(spel_id)))
+
+
+def game_etag(spel_id, load=None):
+    """Validator for the stored game, or None if it does not exist.
+
+    Unlike ``game_revision`` this is the same in every worker: it is the
+    ``revision`` that save_game_data persists with the game (the row
+    revision in sqlite mode). Cheap while the game is cached; otherwise
+    the game is read with ``load`` (default: core only, via
+    ``load_game_segments``), so a caller can share its own read.
+    """
+    if STORAGE_MODE == "sqlite":
+        signature = _sqlite_store().signature(str(spel_id))
+        return "-".join(str(part) for part in signature) if signature else None
+    tag = _known_tag(spel_id)
+    if tag is None:
+        data = (load or load_game_segments)(spel_id)
+        if data is None:
+            return None
+        tag = _data_revision(data)
+    return str(tag)
+
+
+def forget_cached_game(spel_id):
+    """Drop a game from the in-process cache (e.g. after deleting its file)."""
+    _game_cache.invalidate(os.path.abspath(game_file_path(spel_id)))
+
+
+def _load_game_file(filnamn):
+    """Parsed game at ``filnamn`` (snapshot + journal), via the cache."""
+    cache_key = os.path.abspath(filnamn)
+    cached = _game_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    signature = game_journal.storage_signature(filnamn)
+    if signature is None:
         return None
     
     try:
         with open(filnamn, encoding="utf-8") as f:
-            return json.load(f)
+            data = json.load(f)
+        data = game_journal.replay(filnamn, signature[0], data)
+        skipped = game_journal.skipped(filnamn)
+        if skipped:
+            # Every record replay could not apply was a save that bumped the
+            # revision; stay past them so an ETag is never handed out twice.
+            data["revision"] = _data_revision(data) + skipped
+        _game_cache.put(cache_key, data, signature, _data_revision(data))
+        return data
     except json.JSONDecodeError as e:
         print(f"JSON parsing error in {filnamn}: {e}")
-        # Försök läsa backup om den finns
+        # Gå bakåt genom sparpunkterna tills någon går att läsa
+        restored = game_backups.load_valid(filnamn)
+        if restored is not None:
+            return restored
+        # Äldre spel har bara en .backup-kopia
         backup_filnamn = filnamn + ".backup"
         if os.path.exists(backup_filnamn):
             try:
@@ -468,32 +659,188 @@ def load_game_data(spel_id):
         print(f"Error loading game data from {filnamn}: {e}")
         return None
 
-def save_game_data(spel_id, data):
-    """Spara speldata till fil med atomisk skrivning för att undvika korruption"""
+
+def load_game_data(spel_id):
+    """Ladda speldata från fil med felhantering"""
+    if STORAGE_MODE == "sqlite":
+        return _sqlite_store().load(str(spel_id))
+    draft = _pending_draft(spel_id)
+    if draft is not None:
+        return draft.data
+    if STORAGE_MODE == "segments":
+        return _saw_revision(spel_id, _segment_store().load(str(spel_id)))
+    return _saw_revision(spel_id, _load_game_file(game_file_path(spel_id)))
+
+
+def load_game_segments(spel_id, segments=(segment_store.CORE,)):
+    """Read-only view of a game with only ``segments`` loaded (plus core).
+
+    In segments mode this skips orders, log, undo and resolution files that
+    the caller does not need, in sqlite mode their rows (undo stays in the
+    document there); ``save_game_data`` refuses the result. The json and
+    journal modes return the whole game.
+    """
+    if STORAGE_MODE == "sqlite":
+        return _sqlite_store().load(str(spel_id), tuple(segments))
+    if STORAGE_MODE != "segments" or _drafts.holds(str(spel_id)):
+        return load_game_data(spel_id)
+    return _saw_revision(spel_id, _segment_store().load(str(spel_id), tuple(segments)))
+
+
+def _append_to_journal(filnamn, data, level):
+    """Save ``data`` as a journal record. False means: write a full snapshot."""
+    snapshot_signature = file_signature(filnamn)
+    if snapshot_signature is None:
+        return False
+    # Loading first replays a changed journal, so status() knows whether
+    # replay got past every record.
+    current = _load_game_file(filnamn)
+    if current is None:
+        return False
+    state, size = game_journal.status(filnamn, snapshot_signature)
+    if state == "torn" or game_journal.should_compact(size, snapshot_signature):
+        return False
+    if state != "ok":
+        # Legacy .json game, or a snapshot replaced outside journal mode.
+        game_journal.reset(filnamn, snapshot_signature, level)
+    ops = game_delta.diff(current, data)
+    if ops:
+        current = game_delta.apply(current, game_journal.append(filnamn, ops, level))
+    _game_cache.put(
+        os.path.abspath(filnamn), current, game_journal.storage_signature(filnamn), _data_revision(current)
+    )
+    return True
+
+
+def save_game_data(spel_id, data, compact=False, draft=False, durability=None):
+    """Spara speldata till fil med atomisk skrivning för att undvika korruption
+
+    I journalläge läggs bara ändringen till i journalen; ``compact=True``
+    skriver alltid en hel ögonblicksbild. ``draft=True`` (lagens autosparning)
+    håller ändringen i minnet och skriver den lite senare (se draft_buffer.py);
+    alla andra sparningar skriver direkt, inklusive ett väntande utkast.
+    ``durability`` väljer nivå för just detta anrop (se durability.py).
+    """
+    if segment_store.PARTIAL_KEY in data:
+        raise ValueError("Ett delvis laddat spel kan inte sparas")
+    level = _durability.resolve(data, durability)
+    with _save_lock_for(spel_id):
+        _stamp_revision(spel_id, data)
+        if draft and STORAGE_MODE != "sqlite" and _drafts.put(
+            str(spel_id), data, _draft_base(spel_id), _data_revision(data)
+        ):
+            _index_team_tokens(spel_id, data)
+            return
+        # ``data`` was loaded with any pending draft applied, so it replaces it.
+        _drafts.take(str(spel_id))
+        _write_game_data(spel_id, data, compact, level)
+        _index_game(spel_id, data)
+        _index_team_tokens(spel_id, data)
+
+
+def _flush_draft(spel_id):
+    """Write the pending draft of ``spel_id``, if any (the flusher's callback)."""
+    with _save_lock_for(spel_id):
+        draft = _pending_draft(spel_id)
+        if draft is None or _drafts.take(str(spel_id)) is not draft:
+            return False
+        data = draft.data
+        try:
+            # Drafts already accept losing a few seconds; share the fsync.
+            _write_game_data(spel_id, data, False, _durability.at_most(_durability.resolve(data), _durability.BATCHED))
+        except Exception:
+            _drafts.restore(str(spel_id), draft)
+            raise
+        _drafts.flushed()
+        _index_game(spel_id, data)
+        return True
+
+
+def flush_drafts():
+    """Write every pending draft now (also runs at interpreter exit)."""
+    return _drafts.flush_all()
+
+
+def _draft_flush_seconds():
+    """DRAFT_FLUSH_SECONDS, or 0 unless a single worker is asserted.
+
+    A draft held in one worker is invisible to the others, and their saves
+    would drop it as lost. The worker count cannot be read reliably from
+    inside the app (config files, GUNICORN_CMD_ARGS), so it is not guessed.
+    """
+    if DRAFT_FLUSH_SECONDS > 0 and not SINGLE_WORKER:
+        print("Draft write-behind off: set STABSSPEL_SINGLE_WORKER=1 when one worker serves every game")
+        return 0
+    return DRAFT_FLUSH_SECONDS
+
+
+_drafts = DraftBuffer(_flush_draft, _draft_flush_seconds(), DRAFT_IDLE_SECONDS)
+
+
+def _stamp_revision(spel_id, data):
+    """Bump ``data["revision"]`` past both its own and the stored revision.
+
+    Undo and reset write back older snapshots; taking the stored revision
+    into account keeps the number increasing, so an ETag never repeats.
+    The stored revision comes from the cache or from what this process
+    last loaded or saved (the caller loaded the game before changing it),
+    never from reading the game inside the save.
+    """
+    stored = 0
+    if STORAGE_MODE != "sqlite":
+        tag = _known_tag(spel_id)
+        with _seen_revisions_guard:
+            stored = max(int(tag or 0), _seen_revisions.get(os.path.abspath(_snapshot_path(spel_id)), 0))
+    data["revision"] = max(_data_revision(data), stored) + 1
+    _saw_revision(spel_id, data)
+
+
+def _write_game_data(spel_id, data, compact, level=_durability.STRICT):
+    started = time.perf_counter()
+    try:
+        _write_game_file(spel_id, data, compact, level)
+    finally:
+        _durability.record(level, time.perf_counter() - started)
+
+
+def _write_game_file(spel_id, data, compact, level):
     os.makedirs(DATA_DIR, exist_ok=True)
-    filnamn = os.path.join(DATA_DIR, f"game_{spel_id}.json")
-    backup_filnamn = filnamn + ".backup"
+    filnamn = game_file_path(spel_id)
     # Unique tmp per write so concurrent requests cannot delete each other's file
     temp_filnamn = f"{filnamn}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
     max_retries = 5
     retry_delay = 0.1
 
     with _save_lock_for(spel_id):
+        if STORAGE_MODE == "sqlite":
+            _sqlite_store().save(str(spel_id), data, _durability.SQLITE_SYNCHRONOUS[level])
+            return
+        if STORAGE_MODE == "segments":
+            _segment_store().save(str(spel_id), data, level)
+            return
+        if STORAGE_MODE == "journal" and not compact and _append_to_journal(filnamn, data, level):
+            return
         last_error = None
         for attempt in range(max_retries):
             try:
-                if os.path.exists(filnamn):
-                    try:
-                        shutil.copy2(filnamn, backup_filnamn)
-                    except OSError:
-                        pass
-
                 with open(temp_filnamn, "w", encoding="utf-8") as f:
                     json.dump(data, f, ensure_ascii=False, indent=2)
-                    f.flush()
-                    os.fsync(f.fileno())
+                    _durability.sync(f, level)
+
+                if _durability.keeps_backup(level):
+                    _keep_restore_point(filnamn, temp_filnamn, data)
 
                 os.replace(temp_filnamn, filnamn)
+                _durability.settle(filnamn, level)
+                # The new snapshot already makes an old journal stale; this
+                # just starts a fresh one (journal mode) or tidies up.
+                if STORAGE_MODE == "journal":
+                    game_journal.reset(filnamn, file_signature(filnamn), level)
+                else:
+                    game_journal.discard(filnamn)
+                _game_cache.put(
+                    os.path.abspath(filnamn), data, game_journal.storage_signature(filnamn), _data_revision(data)
+                )
                 return
             except (PermissionError, FileNotFoundError, OSError) as e:
                 last_error = e
@@ -507,9 +854,125 @@ def save_game_data(spel_id, data):
                 os.remove(temp_filnamn)
             except OSError:
                 pass
+        _game_cache.invalidate(os.path.abspath(filnamn))
         print(f"Error saving game data for {spel_id}: {last_error}")
         raise last_error
 
+
+def _keep_restore_point(filnamn, written, data):
+    # Restore points are a safety net; a failure here must not fail the save.
+    try:
+        game_backups.keep(filnamn, written, data)
+    except OSError as e:
+        print(f"Could not keep restore point for {filnamn}: {e}")
+
+
+def list_restore_points(spel_id):
+    """Restore points of a game, newest first (none in SQLite or segments mode)."""
+    if STORAGE_MODE in ("sqlite", "segments"):
+        return []
+    return game_backups.restore_points(game_file_path(spel_id))
+
+
+def load_restore_point(spel_id, name):
+    """Game as saved in restore point ``name``. ValueError if it is missing or broken."""
+    point = None if STORAGE_MODE in ("sqlite", "segments") else game_backups.restore_point(game_file_path(spel_id), name)
+    if point is None:
+        raise ValueError("Sparpunkten finns inte")
+    try:
+        return game_backups.load(point)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Sparpunkten går inte att läsa: {e}") from e
+
+
+def compact_game(spel_id):
+    """Fold the journal into a fresh ``game_<id>.json`` snapshot."""
+    if STORAGE_MODE in ("sqlite", "segments"):
+        return False
+    with _save_lock_for(spel_id):
+        data = load_game_data(spel_id)
+        if data is None:
+            return False
+        filnamn = game_file_path(spel_id)
+        if game_journal.status(filnamn, file_signature(filnamn))[0] == "missing":
+            return False
+        save_game_data(spel_id, data, compact=True)
+        return True
+
+def delete_game_data(spel_id):
+    """Remove a game from storage. True if anything was removed."""
+    lock = _save_lock_for(spel_id)
+    with lock:
+        if STORAGE_MODE == "sqlite":
+            removed = _sqlite_store().delete(str(spel_id))
+        elif STORAGE_MODE == "segments":
+            removed = _segment_store().delete(str(spel_id))
+        else:
+            filnamn = game_file_path(spel_id)
+            removed = False
+            for path in (filnamn, filnamn + ".backup", game_journal.journal_path(filnamn)):
+                if os.path.exists(path):
+                    os.remove(path)
+                    removed = True
+            game_backups.remove_all(filnamn)
+            forget_cached_game(spel_id)
+        _drafts.take(str(spel_id))
+        with _seen_revisions_guard:
+            _seen_revisions.pop(os.path.abspath(_snapshot_path(spel_id)), None)
+        _unindex_game(spel_id)
+        _forget_team_tokens(spel_id)
+        lock.remove_file()
+        return removed
+
+
+# Saves of different games still share the index file.
+_index_lock = GameLock("index", lambda: os.path.join(DATA_DIR, "locks", "games_index.lock"))
+
+
+def _index_game(spel_id, data):
+    # The index is a convenience; a failure here must not fail the save.
+    try:
+        with _index_lock:
+            index = game_index.index_for(DATA_DIR)
+            if index.exists():
+                index.update(str(spel_id), data)
+            else:
+                # First save since upgrading: index the games already on disk too.
+                rebuild_game_index()
+    except (OSError, ValueError, TypeError, TimeoutError) as e:
+        print(f"Could not update game index for {spel_id}: {e}")
+
+
+def _unindex_game(spel_id):
+    try:
+        with _index_lock:
+            game_index.index_for(DATA_DIR).remove(str(spel_id))
+    except (OSError, ValueError, TimeoutError) as e:
+        print(f"Could not update game index for {spel_id}: {e}")
+
+
+def rebuild_game_index():
+    """Recreate games_index.json from the stored games. Returns the count."""
+    with _index_lock:
+        games = {str(game["id"]): game for game in list_saved_games()}
+        os.makedirs(DATA_DIR, exist_ok=True)
+        game_index.index_for(DATA_DIR).replace_all(games)
+        return len(games)
+
+
+def list_game_summaries(offset=0, limit=None):
+    """Page of game summaries for lists, plus the total count.
+
+    Running games come first, newest first. Reads only the index file, which
+    is built on first use.
+    """
+    index = game_index.index_for(DATA_DIR)
+    if not index.exists():
+        if not os.path.isdir(DATA_DIR):
+            return [], 0
+        rebuild_game_index()
+    return index.page(offset, limit)
+
 def generate_game_id():
     """Return a readable ID with enough entropy to avoid same-second collisions."""
     timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
@@ -523,7 +986,8 @@ def skapa_nytt_spel(datum, plats, antal_spelare, orderfas_min, diplomatifas_min,
     backlog_data = clone_backlog_for_teams(lag)
     
     # Generera tokens för alla team
-    team_tokens = generate_team_tokens(spel_id, lag)
+    token_salt = signed_tokens.new_salt()
+    team_tokens = generate_team_tokens(spel_id, lag, token_salt)
     
     # Kryptera lösenord om det finns
     encrypted_password = None
@@ -552,6 +1016,8 @@ def skapa_nytt_spel(datum, plats, antal_spelare, orderfas_min, diplomatifas_min,
         "test_mode": False,
         "fashistorik": init_fashistorik_v2(),
         "team_tokens": team_tokens,
+        "token_salt": token_salt,
+        "token_generation": 0,
         "password": encrypted_password,
     }
     # Initiera poäng baserat på spelstorlek
@@ -580,10 +1046,8 @@ def avsluta_aktuell_fas(data):
     return data
 
 def avsluta_spel(spel_id):
-    filnamn = os.path.join(DATA_DIR, f"game_{spel_id}.json")
-    if os.path.exists(filnamn):
-        with open(filnamn, encoding="utf-8") as f:
-            data = json.load(f)
+    data = load_game_data(spel_id)
+    if data:
         data["avslutat"] = True
         save_game_data(spel_id, data) 
 
@@ -597,37 +1061,120 @@ def generate_team_token(team_name, spel_id):
     token_hash = hashlib.sha256(f"{unique_string}_{token}".encode()).hexdigest()[:12]
     return f"{token}_{token_hash}"
 
-def generate_team_tokens(spel_id, teams):
-    """Generera tokens för alla team i ett spel"""
+def generate_team_tokens(spel_id, teams, salt=None, generation=0):
+    """Generera tokens för alla team i ett spel
+
+    Med ``salt`` (och TEAM_TOKEN_SCHEME "signed") blir det signerade tokens
+    som kan kontrolleras utan att läsa spelet, se signed_tokens.
+    """
     tokens = {}
     for team in teams:
-        tokens[team] = generate_team_token(team, spel_id)
+        if salt and TEAM_TOKEN_SCHEME == "signed":
+            tokens[team] = signed_tokens.sign(spel_id, team, salt, generation)
+        else:
+            tokens[team] = generate_team_token(team, spel_id)
     return tokens
 
+def reissue_team_tokens(spel_id, data):
+    """Ogiltigförklara alla laglänkar i spelet och skapa nya."""
+    data["token_salt"] = data.get("token_salt") or signed_tokens.new_salt()
+    data["token_generation"] = int(data.get("token_generation") or 0) + 1
+    data["team_tokens"] = generate_team_tokens(
+        spel_id, data.get("lag") or [], data["token_salt"], data["token_generation"]
+    )
+    return data
+
+# Token index: spel_id -> _TokenEntry. Team routes look the token up here
+# instead of parsing the game. The validator is the game's etag plus this
+# process's cache revision, so a save in another worker or a file replaced
+# on disk makes the entry stale and the next lookup re-reads. A signed token
+# is checked against the entry's salt and generation alone for up to
+# TEAM_TOKEN_RECHECK_SECONDS, without touching storage; a revocation made by
+# another worker is therefore seen within that time.
+_token_guard = threading.Lock()
+_team_tokens = {}
+
+
+class _TokenEntry:
+    __slots__ = ("validator", "tokens", "salt", "generation", "teams", "checked_at")
+
+    def __init__(self, validator, data):
+        self.validator = validator
+        self.tokens = {
+            token: team
+            for team, token in (data.get("team_tokens") or {}).items()
+            if token
+        }
+        self.salt = data.get("token_salt")
+        self.generation = int(data.get("token_generation") or 0)
+        self.teams = frozenset(data.get("lag") or [])
+        self.checked_at = time.monotonic()
+
+    def team_for(self, spel_id, token):
+        team = self.tokens.get(token)
+        if team is None and signed_tokens.is_signed(token):
+            team = signed_tokens.verify(token, spel_id, self.salt, self.generation)
+            if team not in self.teams:
+                team = None
+        return team
+
+
+def _token_validator(spel_id, load=None):
+    tag = game_etag(spel_id, load)
+    if tag is None:
+        return None
+    return (tag, game_revision(spel_id))
+
+
+def _index_team_tokens(spel_id, data, validator=None):
+    validator = validator if validator is not None else _token_validator(spel_id)
+    entry = _TokenEntry(validator, data)
+    with _token_guard:
+        _team_tokens[str(spel_id)] = entry
+    return entry
+
+
+def _forget_team_tokens(spel_id):
+    with _token_guard:
+        _team_tokens.pop(str(spel_id), None)
+
+
 def validate_team_token(spel_id, team_name, token):
     """Validera att en token tillhör rätt team och spel"""
-    try:
-        # Ladda speldata för att hämta tokens
-        data = load_game_data(spel_id)
-        if not data:
-            return False
-        
-        team_tokens = data.get("team_tokens", {})
-        return team_tokens.get(team_name) == token
-    except:
-        return False
+    return team_name is not None and get_team_by_token(spel_id, token) == team_name
+
 
-def get_team_by_token(spel_id, token):
-    """Hitta team baserat på token"""
+def get_team_by_token(spel_id, token, load=None):
+    """Hitta team baserat på token (via tokenindexet, läser bara om spelet ändrats)
+
+    ``load`` ersätter load_game_data när indexet måste byggas om, t.ex.
+    game_context.request_game så att anropet delar läsningen med routen.
+    """
+    if not token:
+        return None
     try:
-        data = load_game_data(spel_id)
-        if not data:
+        spel_id = str(spel_id)
+        with _token_guard:
+            entry = _team_tokens.get(spel_id)
+        if (
+            entry is not None
+            and signed_tokens.is_signed(token)
+            and time.monotonic() - entry.checked_at < TEAM_TOKEN_RECHECK_SECONDS
+        ):
+            team = entry.team_for(spel_id, token)
+            if team is not None:
+                return team
+        validator = _token_validator(spel_id, load or load_game_data)
+        if validator is None:
+            _forget_team_tokens(spel_id)
             return None
-        
-        team_tokens = data.get("team_tokens", {})
-        for team_name, team_token in team_tokens.items():
-            if team_token == token:
-                return team_name
-        return None
-    except:
+        if entry is not None and entry.validator == validator:
+            entry.checked_at = time.monotonic()
+        else:
+            data = (load or load_game_data)(spel_id)
+            if not data:
+                return None
+            entry = _index_team_tokens(spel_id, data, validator)
+        return entry.team_for(spel_id, token)
+    except Exception:
         return None
@@ -1,127 +1,38 @@
 """
 Orderkort generator för Stabsspelet.
-Skapar utskrivbara orderkort för alla team för varje runda.
+Skapar utskrivbara orderkort för alla team för varje runda, aktivitetskort
+och lagbeskrivningar. Sidorna byggs av samma delar som utskriftspaketet
+(print_pack.py) använder.
 """
 
 import os
 from datetime import datetime
-from models import TEAMS
-from game_management import load_game_data
+from functools import lru_cache
+from markupsafe import Markup
+from models import TEAMS, AKTIVITETSKORT
+from game_context import request_game
 
-def generate_orderkort_html(spel_id, runda):
-    """
-    Generera HTML för orderkort för alla team för en specifik runda.
-    
-    Args:
-        spel_id (str): Spel-ID
-        runda (int): Rundanummer
-        
-    Returns:
-        str: HTML-kod för orderkorten
-    """
-    data = load_game_data(spel_id)
-    if not data:
-        return "<p>Spel hittades inte.</p>"
-    
-    # Hämta team från spelet
-    teams = data.get("lag", [])
-    if not teams:
-        return "<p>Inga team hittades i spelet.</p>"
-    
-    # Hämta poängdata för att visa max handlingspoäng
-    poang = data.get("poang", {})
-    
-    # Skapa HTML för varje team
-    orderkort_html = ""
-    
-    for team in teams:
-        # Hämta teamets max handlingspoäng
-        max_hp = poang.get(team, {}).get("max_hp", 25)  # Standard 25 om inte satt
-        
-        orderkort_html += f"""
-        <div class="orderkort-page">
-            <div class="orderkort-header">
-                <h1>Förslag: Strukturerat Orderkort</h1>
-                <div class="identity-section">
-                    <div class="identity-row">
-                        <span class="label">Team:</span>
-                        <span class="value">{team}</span>
-                    </div>
-                    <div class="identity-row">
-                        <span class="label">Runda:</span>
-                        <span class="value">{runda}</span>
-                    </div>
-                    <div class="identity-row">
-                        <span class="label">Max handlingspoäng:</span>
-                        <span class="value">{max_hp}</span>
-                    </div>
-                    <div class="identity-row">
-                        <span class="label">Totalt satsade HP:</span>
-                        <span class="value">_____</span>
-                    </div>
-                </div>
-            </div>
-            
-            <div class="order-table-section">
-                <h2>Ordertabell (max 6 rader)</h2>
-                <table class="order-table">
-                    <thead>
-                        <tr>
-                            <th>Nr</th>
-                            <th>Aktivitet (Vad?)</th>
-                            <th>Syfte/Mål (Varför?)</th>
-                            <th>Målområde 🎯</th>
-                            <th>Påverkar/Vem</th>
-                            <th>Typ av handling ⚔️</th>
-                            <th>HP</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-                        {generate_order_rows()}
-                    </tbody>
-                </table>
-            </div>
-            
-            <div class="field-explanations">
-                <h3>Fältens funktion</h3>
-                <ul>
-                    <li><strong>Aktivitet (Vad?)</strong> → kort text, t.ex. "DDOS-attack mot valservern" eller "Utveckla loggning".</li>
-                    <li><strong>Syfte/Mål (Varför?)</strong> → varför teamet satsar på detta (ger kontext).</li>
-                    <li><strong>Målområde 🎯</strong> → kryssruta om satsningen direkt stöder teamets uttalade mål eller om den är riktad mot andras.</li>
-                    <li><strong>Påverkar/Vem</strong> → vilken aktör/funktion detta riktas mot (för att undvika tvetydighet).</li>
-                    <li><strong>Typ av handling ⚔️</strong> → kryss: Bygga/Förstärka eller Förstöra/Störa.</li>
-                    <li><strong>HP</strong> → antal satsade handlingspoäng.</li>
-                </ul>
-            </div>
-        </div>
-        """
-    
-    return f"""
-    <!DOCTYPE html>
-    <html lang="sv">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Orderkort - Runda {runda}</title>
-        <style>
-            @media print {{
-                body {{ margin: 0; }}
-                .orderkort-page {{ 
+BRIEF_DIR = "teambeskrivning"
+
+ORDERKORT_STYLE = """
+            @media print {
+                body { margin: 0; }
+                .orderkort-page { 
                     page-break-after: always; 
                     margin: 0;
                     padding: 20px;
-                }}
-                .no-print {{ display: none; }}
-            }}
+                }
+                .no-print { display: none; }
+            }
             
-            body {{
+            body {
                 font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
                 margin: 0;
                 padding: 20px;
                 background: #f5f5f5;
-            }}
+            }
             
-            .print-button {{
+            .print-button {
                 position: fixed;
                 top: 20px;
                 right: 20px;
@@ -133,13 +44,13 @@ def generate_orderkort_html(spel_id, runda):
                 cursor: pointer;
                 font-size: 16px;
                 z-index: 1000;
-            }}
+            }
             
-            .print-button:hover {{
+            .print-button:hover {
                 background: #0056b3;
-            }}
+            }
             
-            .orderkort-page {{
+            .orderkort-page {
                 background: white;
                 margin: 20px auto;
                 padding: 30px;
@@ -147,154 +58,255 @@ def generate_orderkort_html(spel_id, runda):
                 min-height: 29.7cm;
                 box-shadow: 0 4px 8px rgba(0,0,0,0.1);
                 border-radius: 8px;
-            }}
+            }
             
-            .orderkort-header {{
+            .orderkort-header {
                 border-bottom: 3px solid #333;
                 padding-bottom: 20px;
                 margin-bottom: 30px;
-            }}
+            }
             
-            .orderkort-header h1 {{
+            .orderkort-header h1 {
                 text-align: center;
                 color: #333;
                 margin: 0 0 20px 0;
                 font-size: 24px;
                 font-weight: bold;
-            }}
+            }
             
-            .identity-section {{
+            .identity-section {
                 display: grid;
                 grid-template-columns: 1fr 1fr;
                 gap: 15px;
-            }}
+            }
             
-            .identity-row {{
+            .identity-row {
                 display: flex;
                 align-items: center;
                 padding: 8px 0;
-            }}
+            }
             
-            .label {{
+            .label {
                 font-weight: bold;
                 margin-right: 10px;
                 min-width: 150px;
-            }}
+            }
             
-            .value {{
+            .value {
                 border-bottom: 1px solid #ccc;
                 padding: 4px 8px;
                 min-width: 100px;
                 font-weight: 500;
-            }}
+            }
             
-            .order-table-section {{
+            .order-table-section {
                 margin-bottom: 30px;
-            }}
+            }
             
-            .order-table-section h2 {{
+            .order-table-section h2 {
                 color: #333;
                 margin-bottom: 15px;
                 font-size: 18px;
-            }}
+            }
             
-            .order-table {{
+            .order-table {
                 width: 100%;
                 border-collapse: collapse;
                 margin-bottom: 20px;
-            }}
+            }
             
             .order-table th,
-            .order-table td {{
+            .order-table td {
                 border: 1px solid #ddd;
                 padding: 8px;
                 text-align: left;
                 vertical-align: top;
-            }}
+            }
             
-            .order-table th {{
+            .order-table th {
                 background: #f8f9fa;
                 font-weight: bold;
                 font-size: 12px;
-            }}
+            }
             
-            .order-table td {{
+            .order-table td {
                 font-size: 11px;
                 min-height: 60px;
-            }}
+            }
             
             .activity-cell,
-            .purpose-cell {{
+            .purpose-cell {
                 width: 20%;
-            }}
+            }
             
             .target-cell,
             .affects-cell,
-            .action-type-cell {{
+            .action-type-cell {
                 width: 15%;
-            }}
+            }
             
-            .hp-cell {{
+            .hp-cell {
                 width: 8%;
                 text-align: center;
-            }}
+            }
             
-            .checkbox-group {{
+            .checkbox-group {
                 display: flex;
                 flex-direction: column;
                 gap: 4px;
-            }}
+            }
             
-            .checkbox-item {{
+            .checkbox-item {
                 display: flex;
                 align-items: center;
                 font-size: 10px;
-            }}
+            }
             
-            .checkbox-item input[type="checkbox"] {{
+            .checkbox-item input[type="checkbox"] {
                 margin-right: 4px;
-            }}
+            }
             
-            .affects-options {{
+            .affects-options {
                 font-size: 9px;
                 line-height: 1.2;
-            }}
+            }
             
-            .field-explanations {{
+            .field-explanations {
                 border-top: 2px solid #333;
                 padding-top: 20px;
                 margin-top: 20px;
-            }}
+            }
             
-            .field-explanations h3 {{
+            .field-explanations h3 {
                 color: #333;
                 margin-bottom: 15px;
                 font-size: 16px;
-            }}
+            }
             
-            .field-explanations ul {{
+            .field-explanations ul {
                 margin: 0;
                 padding-left: 20px;
-            }}
+            }
             
-            .field-explanations li {{
+            .field-explanations li {
                 margin-bottom: 8px;
                 font-size: 12px;
                 line-height: 1.4;
-            }}
+            }
             
-            .field-explanations strong {{
+            .field-explanations strong {
                 color: #333;
-            }}
-        </style>
+            }
+"""
+
+
+def orderkort_page_html(team, runda, max_hp):
+    """Ett orderkort (en utskriftssida) för ett team och en runda."""
+    return f"""        <div class="orderkort-page">
+            <div class="orderkort-header">
+                <h1>Förslag: Strukturerat Orderkort</h1>
+                <div class="identity-section">
+                    <div class="identity-row">
+                        <span class="label">Team:</span>
+                        <span class="value">{team}</span>
+                    </div>
+                    <div class="identity-row">
+                        <span class="label">Runda:</span>
+                        <span class="value">{runda}</span>
+                    </div>
+                    <div class="identity-row">
+                        <span class="label">Max handlingspoäng:</span>
+                        <span class="value">{max_hp}</span>
+                    </div>
+                    <div class="identity-row">
+                        <span class="label">Totalt satsade HP:</span>
+                        <span class="value">_____</span>
+                    </div>
+                </div>
+            </div>
+            
+            <div class="order-table-section">
+                <h2>Ordertabell (max 6 rader)</h2>
+                <table class="order-table">
+                    <thead>
+                        <tr>
+                            <th>Nr</th>
+                            <th>Aktivitet (Vad?)</th>
+                            <th>Syfte/Mål (Varför?)</th>
+                            <th>Målområde 🎯</th>
+                            <th>Påverkar/Vem</th>
+                            <th>Typ av handling ⚔️</th>
+                            <th>HP</th>
+                        </tr>
+                    </thead>
+                    <tbody>
+                        {generate_order_rows()}
+                    </tbody>
+                </table>
+            </div>
+            
+            <div class="field-explanations">
+                <h3>Fältens funktion</h3>
+                <ul>
+                    <li><strong>Aktivitet (Vad?)</strong> → kort text, t.ex. "DDOS-attack mot valservern" eller "Utveckla loggning".</li>
+                    <li><strong>Syfte/Mål (Varför?)</strong> → varför teamet satsar på detta (ger kontext).</li>
+                    <li><strong>Målområde 🎯</strong> → kryssruta om satsningen direkt stöder teamets uttalade mål eller om den är riktad mot andras.</li>
+                    <li><strong>Påverkar/Vem</strong> → vilken aktör/funktion detta riktas mot (för att undvika tvetydighet).</li>
+                    <li><strong>Typ av handling ⚔️</strong> → kryss: Bygga/Förstärka eller Förstöra/Störa.</li>
+                    <li><strong>HP</strong> → antal satsade handlingspoäng.</li>
+                </ul>
+            </div>
+        </div>
+        """
+
+
+def _orderkort_document(title, pages_html):
+    return f"""
+    <!DOCTYPE html>
+    <html lang="sv">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>{title}</title>
+        <style>{ORDERKORT_STYLE}</style>
     </head>
     <body>
         <button class="print-button no-print" onclick="window.print()">🖨️ Skriv ut Orderkort</button>
-        {orderkort_html}
+        {pages_html}
     </body>
     </html>
     """
 
+
+def generate_orderkort_html(spel_id, runda):
+    """
+    Generera HTML för orderkort för alla team för en specifik runda.
+    
+    Args:
+        spel_id (str): Spel-ID
+        runda (int): Rundanummer
+        
+    Returns:
+        str: HTML-kod för orderkorten
+    """
+    data = request_game(spel_id)
+    if not data:
+        return "<p>Spel hittades inte.</p>"
+    
+    # Hämta team från spelet
+    teams = data.get("lag", [])
+    if not teams:
+        return "<p>Inga team hittades i spelet.</p>"
+    
+    # Hämta poängdata för att visa max handlingspoäng
+    poang = data.get("poang", {})
+    
+    orderkort_html = "".join(
+        orderkort_page_html(team, runda, poang.get(team, {}).get("max_hp", 25))  # Standard 25 om inte satt
+        for team in teams
+    )
+    return _orderkort_document(f"Orderkort - Runda {runda}", orderkort_html)
+
 def generate_order_rows(teams=None):
     """
     Generera HTML för orderraderna i tabellen.
@@ -307,7 +319,12 @@ def generate_order_rows(teams=None):
     """
     if teams is None:
         teams = [team[0] for team in TEAMS]  # Använd standardteam om inga angivna
-    
+    # Raderna beror bara på lagen; samma HTML återanvänds för varje kort
+    return _order_rows(tuple(teams))
+
+
+@lru_cache(maxsize=16)
+def _order_rows(teams):
     rows_html = ""
     
     for i in range(1, 7):  # 6 rader som i mallen
@@ -369,7 +386,6 @@ def generate_order_rows(teams=None):
         """
     
     return rows_html
-
 def get_available_rounds(spel_id):
     """
     Hämta tillgängliga rundor för ett spel.
@@ -380,13 +396,12 @@ def get_available_rounds(spel_id):
     Returns:
         list: Lista med rundonummer
     """
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     if not data:
         return []
     
     current_round = data.get("runda", 1)
     return list(range(1, current_round + 1))
-
 def generate_team_orderkort_html(spel_id, team_name):
     """
     Generera HTML för orderkort för ett specifikt team för alla tillgängliga rundor.
@@ -398,7 +413,7 @@ def generate_team_orderkort_html(spel_id, team_name):
     Returns:
         str: HTML-kod för orderkorten
     """
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     if not data:
         return "<p>Spel hittades inte.</p>"
     
@@ -416,263 +431,148 @@ def generate_team_orderkort_html(spel_id, team_name):
     poang = data.get("poang", {})
     max_hp = poang.get(team_name, {}).get("max_hp", 25)  # Standard 25 om inte satt
     
-    # Skapa HTML för varje runda
-    orderkort_html = ""
-    
-    for runda in available_rounds:
-        orderkort_html += f"""
-        <div class="orderkort-page">
-            <div class="orderkort-header">
-                <h1>Förslag: Strukturerat Orderkort</h1>
-                <div class="identity-section">
-                    <div class="identity-row">
-                        <span class="label">Team:</span>
-                        <span class="value">{team_name}</span>
-                    </div>
-                    <div class="identity-row">
-                        <span class="label">Runda:</span>
-                        <span class="value">{runda}</span>
+    orderkort_html = "".join(orderkort_page_html(team_name, runda, max_hp) for runda in available_rounds)
+    return _orderkort_document(f"Orderkort - {team_name}", orderkort_html)
+
+
+def generate_aktivitetskort_cards(laglista):
+    """Aktivitetskort för alla spelare i lagen (två med uppdrag, resten blanka)."""
+    html = ''
+    for lag in laglista:
+        if lag in AKTIVITETSKORT:
+            html += f'<h2>🟢 Team {lag} – Aktivitetskort</h2>'
+            html += '<div class="cards-container force-break">'
+            
+            # Skapa kort för alla spelare i laget (2 med uppdrag, resten blanka)
+            kort = AKTIVITETSKORT[lag]
+            
+            # Kort 1 med uppdrag
+            html += f'''
+            <div class="activity-card">
+                <div class="card-header">
+                    <h3>{lag} Kort 1: {kort[0]["titel"]}</h3>
+                </div>
+                <div class="card-content">
+                    <div class="card-section">
+                        <h4>Uppdrag</h4>
+                        <p>{kort[0]["uppdrag"]}</p>
                     </div>
-                    <div class="identity-row">
-                        <span class="label">Max handlingspoäng:</span>
-                        <span class="value">{max_hp}</span>
+                    <div class="card-section">
+                        <h4>Mål</h4>
+                        <p>{kort[0]["mål"]}</p>
                     </div>
-                    <div class="identity-row">
-                        <span class="label">Totalt satsade HP:</span>
-                        <span class="value">_____</span>
+                    <div class="card-section">
+                        <h4>Belöning</h4>
+                        <p>{kort[0]["belöning"]}</p>
                     </div>
+                    {f'<div class="card-section"><h4>Risk</h4><p>{kort[0]["risk"]}</p></div>' if "risk" in kort[0] else ''}
+                    {f'<div class="card-section"><h4>Bonus</h4><p>{kort[0]["bonus"]}</p></div>' if "bonus" in kort[0] else ''}
                 </div>
             </div>
+            '''
             
-                   <div class="order-table-section">
-                       <h2>Ordertabell (max 6 rader)</h2>
-                       <table class="order-table">
-                           <thead>
-                               <tr>
-                                   <th>Nr</th>
-                                   <th>Aktivitet (Vad?)</th>
-                                   <th>Syfte/Mål (Varför?)</th>
-                                   <th>Målområde 🎯</th>
-                                   <th>Påverkar/Vem</th>
-                                   <th>Typ av handling ⚔️</th>
-                                   <th>HP</th>
-                               </tr>
-                           </thead>
-                           <tbody>
-                               {generate_order_rows()}
-                           </tbody>
-                       </table>
-                   </div>
-            
-            <div class="field-explanations">
-                <h3>Fältens funktion</h3>
-                <ul>
-                    <li><strong>Aktivitet (Vad?)</strong> → kort text, t.ex. "DDOS-attack mot valservern" eller "Utveckla loggning".</li>
-                    <li><strong>Syfte/Mål (Varför?)</strong> → varför teamet satsar på detta (ger kontext).</li>
-                    <li><strong>Målområde 🎯</strong> → kryssruta om satsningen direkt stöder teamets uttalade mål eller om den är riktad mot andras.</li>
-                    <li><strong>Påverkar/Vem</strong> → vilken aktör/funktion detta riktas mot (för att undvika tvetydighet).</li>
-                    <li><strong>Typ av handling ⚔️</strong> → kryss: Bygga/Förstärka eller Förstöra/Störa.</li>
-                    <li><strong>HP</strong> → antal satsade handlingspoäng.</li>
-                </ul>
+            # Kort 2 med uppdrag
+            html += f'''
+            <div class="activity-card">
+                <div class="card-header">
+                    <h3>{lag} Kort 2: {kort[1]["titel"]}</h3>
+                </div>
+                <div class="card-content">
+                    <div class="card-section">
+                        <h4>Uppdrag</h4>
+                        <p>{kort[1]["uppdrag"]}</p>
+                    </div>
+                    <div class="card-section">
+                        <h4>Mål</h4>
+                        <p>{kort[1]["mål"]}</p>
+                    </div>
+                    <div class="card-section">
+                        <h4>Belöning</h4>
+                        <p>{kort[1]["belöning"]}</p>
+                    </div>
+                    {f'<div class="card-section"><h4>Risk</h4><p>{kort[1]["risk"]}</p></div>' if "risk" in kort[1] else ''}
+                    {f'<div class="card-section"><h4>Bonus</h4><p>{kort[1]["bonus"]}</p></div>' if "bonus" in kort[1] else ''}
+                </div>
             </div>
-        </div>
-        """
-    
-    return f"""
-    <!DOCTYPE html>
-    <html lang="sv">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Orderkort - {team_name}</title>
-        <style>
-            @media print {{
-                body {{ margin: 0; }}
-                .orderkort-page {{ 
-                    page-break-after: always; 
-                    margin: 0;
-                    padding: 20px;
-                }}
-                .no-print {{ display: none; }}
-            }}
-            
-            body {{
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                margin: 0;
-                padding: 20px;
-                background: #f5f5f5;
-            }}
-            
-            .print-button {{
-                position: fixed;
-                top: 20px;
-                right: 20px;
-                background: #007bff;
-                color: white;
-                border: none;
-                padding: 12px 24px;
-                border-radius: 6px;
-                cursor: pointer;
-                font-size: 16px;
-                z-index: 1000;
-            }}
-            
-            .print-button:hover {{
-                background: #0056b3;
-            }}
-            
-            .orderkort-page {{
-                background: white;
-                margin: 20px auto;
-                padding: 30px;
-                max-width: 21cm;
-                min-height: 29.7cm;
-                box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-                border-radius: 8px;
-            }}
-            
-            .orderkort-header {{
-                border-bottom: 3px solid #333;
-                padding-bottom: 20px;
-                margin-bottom: 30px;
-            }}
-            
-            .orderkort-header h1 {{
-                text-align: center;
-                color: #333;
-                margin: 0 0 20px 0;
-                font-size: 24px;
-                font-weight: bold;
-            }}
-            
-            .identity-section {{
-                display: grid;
-                grid-template-columns: 1fr 1fr;
-                gap: 15px;
-            }}
-            
-            .identity-row {{
-                display: flex;
-                align-items: center;
-                padding: 8px 0;
-            }}
-            
-            .label {{
-                font-weight: bold;
-                margin-right: 10px;
-                min-width: 150px;
-            }}
-            
-            .value {{
-                border-bottom: 1px solid #ccc;
-                padding: 4px 8px;
-                min-width: 100px;
-                font-weight: 500;
-            }}
-            
-            .order-table-section {{
-                margin-bottom: 30px;
-            }}
-            
-            .order-table-section h2 {{
-                color: #333;
-                margin-bottom: 15px;
-                font-size: 18px;
-            }}
-            
-            .order-table {{
-                width: 100%;
-                border-collapse: collapse;
-                margin-bottom: 20px;
-            }}
-            
-            .order-table th,
-            .order-table td {{
-                border: 1px solid #ddd;
-                padding: 8px;
-                text-align: left;
-                vertical-align: top;
-            }}
-            
-            .order-table th {{
-                background: #f8f9fa;
-                font-weight: bold;
-                font-size: 12px;
-            }}
-            
-            .order-table td {{
-                font-size: 11px;
-                min-height: 60px;
-            }}
-            
-            .activity-cell,
-            .purpose-cell {{
-                width: 20%;
-            }}
-            
-            .target-cell,
-            .affects-cell,
-            .action-type-cell {{
-                width: 15%;
-            }}
-            
-            .hp-cell {{
-                width: 8%;
-                text-align: center;
-            }}
-            
-            .checkbox-group {{
-                display: flex;
-                flex-direction: column;
-                gap: 4px;
-            }}
-            
-            .checkbox-item {{
-                display: flex;
-                align-items: center;
-                font-size: 10px;
-            }}
-            
-            .checkbox-item input[type="checkbox"] {{
-                margin-right: 4px;
-            }}
-            
-            .affects-options {{
-                font-size: 9px;
-                line-height: 1.2;
-            }}
-            
-            .field-explanations {{
-                border-top: 2px solid #333;
-                padding-top: 20px;
-                margin-top: 20px;
-            }}
-            
-            .field-explanations h3 {{
-                color: #333;
-                margin-bottom: 15px;
-                font-size: 16px;
-            }}
-            
-            .field-explanations ul {{
-                margin: 0;
-                padding-left: 20px;
-            }}
-            
-            .field-explanations li {{
-                margin-bottom: 8px;
-                font-size: 12px;
-                line-height: 1.4;
-            }}
+            '''
+            
+            # Lägg till blanka kort för resten av spelarna
+            for i in range(3, 11):  # Upp till 10 spelare per lag
+                html += f'''
+                <div class="activity-card">
+                    <div class="card-header">
+                        <h3>{lag} Kort {i}: Blankt</h3>
+                    </div>
+                    <div class="card-content">
+                        <div class="card-section">
+                            <h4>Uppdrag</h4>
+                            <p><em>Du har inget särskilt uppdrag. Fokusera på ditt teams mål.</em></p>
+                        </div>
+                        <div class="card-section">
+                            <h4>Mål</h4>
+                            <p><em>Arbeta med ditt team för att slutföra era uppgifter.</em></p>
+                        </div>
+                        <div class="card-section">
+                            <h4>Belöning</h4>
+                            <p><em>Din belöning kommer från teamets framgång.</em></p>
+                        </div>
+                    </div>
+                </div>
+                '''
+            
+            html += '</div>'
+        else:
+            # Om laget inte har aktivitetskort, skapa blanka kort för alla spelare
+            html += f'<h2>🟢 Team {lag} – Aktivitetskort</h2>'
+            html += '<div class="cards-container force-break">'
+            
+            # Skapa blanka kort för alla spelare i laget
+            for i in range(1, 11):  # Upp till 10 spelare per lag
+                html += f'''
+                <div class="activity-card">
+                    <div class="card-header">
+                        <h3>{lag} Kort {i}: Blankt</h3>
+                    </div>
+                    <div class="card-content">
+                        <div class="card-section">
+                            <h4>Uppdrag</h4>
+                            <p><em>Du har inget särskilt uppdrag. Fokusera på ditt teams mål.</em></p>
+                        </div>
+                        <div class="card-section">
+                            <h4>Mål</h4>
+                            <p><em>Arbeta med ditt team för att slutföra era uppgifter.</em></p>
+                        </div>
+                        <div class="card-section">
+                            <h4>Belöning</h4>
+                            <p><em>Din belöning kommer från teamets framgång.</em></p>
+                        </div>
+                    </div>
+                </div>
+                '''
             
-            .field-explanations strong {{
-                color: #333;
-            }}
-        </style>
-    </head>
-    <body>
-        <button class="print-button no-print" onclick="window.print()">🖨️ Skriv ut Orderkort</button>
-        {orderkort_html}
-    </body>
-    </html>
-    """
+            html += '</div>'
+    return html
+
+
+def brief_paths(lag_namn):
+    """(textfil, bild) för lagets beskrivning i teambeskrivning/."""
+    return (
+        os.path.join(BRIEF_DIR, f"{lag_namn.lower()}.txt"),
+        os.path.join(BRIEF_DIR, f"{lag_namn.lower()}.jpg"),
+    )
+
+
+def team_brief_text_html(lag_namn):
+    """Lagets beskrivning som HTML: radbrytningar blir <br>, rader som slutar med ":" blir fetstil."""
+    txt_path, _img_path = brief_paths(lag_namn)
+    if not os.path.exists(txt_path):
+        return "<i>Ingen beskrivning hittades för detta lag.</i>"
+    with open(txt_path, encoding="utf-8") as f:
+        text = f.read()
+    html_lines = []
+    for line in text.splitlines():
+        if line.strip().endswith(":"):
+            html_lines.append(f'<b>{line.strip()}</b>')
+        else:
+            html_lines.append(line)
+    return Markup("<br>".join(html_lines))
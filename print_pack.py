@@ -0,0 +1,162 @@
+"""
+Utskriftspaket: every printable of a game in one streamed HTML document.
+
+Preparing an event meant opening the orderkort pages, the aktivitetskort
+page and ``/team/<id>/<lag>`` once per team. Each reloaded the game,
+rebuilt the same large HTML strings and re-read ``teambeskrivning/*.txt``.
+``/admin/<id>/print_pack`` now returns one document, grouped per team so
+each team's pile comes off the printer in one piece:
+
+- the team brief with the order QR code (``qr_codes``),
+- one orderkort per round, ``1..MAX_RUNDA``,
+- the team's aktivitetskort.
+
+The parts come from ``orderkort.py``, the same functions the single pages
+use. The document is streamed team by team as it is built, and the chunks
+are kept per game under a key of the game's ``revision``, a content hash
+of the brief texts and the URL root (which the QR codes contain). A repeat
+request with nothing changed is served from memory; any save of the game
+or an edited brief builds a new pack.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from markupsafe import escape
+
+from game_cache import file_signature
+from models import MAX_RUNDA
+from orderkort import (
+    ORDERKORT_STYLE,
+    brief_paths,
+    generate_aktivitetskort_cards,
+    orderkort_page_html,
+    team_brief_text_html,
+)
+from qr_codes import qr_svg, team_order_url
+
+PACKS_MAX = 8
+
+_guard = threading.Lock()
+_packs = OrderedDict()
+_digests = {}
+_metrics = {"built": 0, "hits": 0}
+
+
+def _file_digest(path):
+    """sha256 of ``path`` (None if missing), recomputed only when the file changes."""
+    signature = file_signature(path)
+    if signature is None:
+        return None
+    with _guard:
+        known = _digests.get(path)
+    if known is not None and known[0] == signature:
+        return known[1]
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    with _guard:
+        _digests[path] = (signature, digest)
+    return digest
+
+
+def sources_digest(teams):
+    """Content hash of the brief texts and photos the pack includes."""
+    sha = hashlib.sha256()
+    for team in teams:
+        for path in brief_paths(team):
+            sha.update(f"{path}={_file_digest(path)};".encode("utf-8"))
+    return sha.hexdigest()
+
+
+def _pack_key(data, url_root):
+    return (data.get("revision"), sources_digest(data.get("lag") or []), url_root)
+
+
+def _team_brief(spel_id, data, team, url_root):
+    token = (data.get("team_tokens") or {}).get(team)
+    qr_html = ""
+    if token:
+        url = team_order_url(url_root, spel_id, token)
+        qr_html = (
+            f"<div class='qr-panel'><div class='qr-content'>{qr_svg(url)}"
+            f"<div class='qr-info'><p class='qr-title'>Skanna QR-koden eller gå till:</p>"
+            f"<p class='qr-link'>{escape(url)}</p></div></div></div>"
+        )
+    _txt_path, img_path = brief_paths(team)
+    img_html = ""
+    if os.path.exists(img_path):
+        img_html = (
+            f"<div class='bildsida'><img src='/teambeskrivning/{escape(team.lower())}.jpg' "
+            f"alt='{escape(team)}' class='team-image-print'></div>"
+        )
+    return (
+        f"<section class='print-pack-team force-break' id='lag-{escape(team)}'>"
+        f"<h1>{escape(team)}</h1>{qr_html}<div>{team_brief_text_html(team)}</div>{img_html}</section>"
+    )
+
+
+def _render(spel_id, data, url_root):
+    teams = data.get("lag") or []
+    poang = data.get("poang") or {}
+    contents = "".join(f"<li><a href='#lag-{escape(team)}'>{escape(team)}</a></li>" for team in teams)
+    yield f"""<!DOCTYPE html>
+<html lang="sv">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Utskriftspaket – {escape(spel_id)}</title>
+    <link rel="stylesheet" href="/static/app.css">
+    <link rel="stylesheet" href="/static/print.css" media="print">
+    <style>{ORDERKORT_STYLE}
+    .print-pack-team .qr-panel svg {{ width: 45mm; height: 45mm; }}
+    </style>
+</head>
+<body>
+<button class="print-button no-print" onclick="window.print()">🖨️ Skriv ut allt</button>
+<div class="container">
+<div class="page-header no-print">
+    <h1>Utskriftspaket</h1>
+    <p class="page-subtitle">{escape(str(data.get("datum") or ""))} {escape(str(data.get("plats") or ""))}:
+    lagbeskrivning, orderkort för runda 1–{MAX_RUNDA} och aktivitetskort per lag</p>
+    <ul>{contents}</ul>
+    <a href="/admin/{escape(spel_id)}" class="secondary">← Tillbaka till adminpanelen</a>
+</div>
+"""
+    for team in teams:
+        max_hp = poang.get(team, {}).get("max_hp", 25)  # Standard 25 om inte satt
+        yield _team_brief(spel_id, data, team, url_root)
+        yield "".join(orderkort_page_html(team, runda, max_hp) for runda in range(1, MAX_RUNDA + 1))
+        yield generate_aktivitetskort_cards([team])
+    yield "</div>\n</body>\n</html>\n"
+
+
+def print_pack_chunks(spel_id, data, url_root):
+    """The pack as an iterator of HTML chunks, from the cache when still valid."""
+    key = _pack_key(data, url_root)
+    with _guard:
+        cached = _packs.get(spel_id)
+        if cached is not None and cached[0] == key:
+            _packs.move_to_end(spel_id)
+            _metrics["hits"] += 1
+            return iter(cached[1])
+    return _build(spel_id, data, url_root, key)
+
+
+def _build(spel_id, data, url_root, key):
+    chunks = []
+    for chunk in _render(spel_id, data, url_root):
+        chunks.append(chunk)
+        yield chunk
+    with _guard:
+        _packs[spel_id] = (key, tuple(chunks))
+        _packs.move_to_end(spel_id)
+        while len(_packs) > PACKS_MAX:
+            _packs.popitem(last=False)
+        _metrics["built"] += 1
+
+
+def print_pack_metrics():
+    with _guard:
+        return dict(_metrics, packs=len(_packs))
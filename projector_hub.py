@@ -0,0 +1,341 @@
+"""
+Shared projector (spelarskärm) state per game, fanned out to every screen.
+
+Each game has one ``ProjectorHub`` per process. It computes
+``build_public_state`` once per game revision, however many projectors and
+phones are watching, and serves that snapshot both to the 2s poll
+(``/spelarskarm/<id>/live``) and to Server-Sent Event subscribers
+(``/spelarskarm/<id>/events``). The GM console streams
+(``/admin/<id>/events``) subscribe to the same hub for revision changes
+only and build their own payload (``event_stream(..., render=...)``).
+
+While a game has subscribers a single pump thread checks its revision and
+puts new snapshots on each subscriber's queue. Queues are bounded: a client
+that falls ``HUB_QUEUE_SIZE`` snapshots behind is dropped (its stream ends
+and the browser reconnects to the current state) instead of holding memory
+or slowing the others. The pump stops when the last subscriber leaves.
+
+Capacity: an open stream holds one gunicorn thread (``Procfile``: gthread,
+16 threads per worker) for up to ``SSE_MAX_SECONDS``. At most
+``SSE_MAX_STREAMS`` (default 8) streams are open per worker, so the other
+threads stay free for page loads, polls and saves. Past the cap the events
+endpoints answer ``503``; that fails the ``EventSource`` for good and the
+page keeps to its poll (2s projector, 3s GM console) until it is shown
+again. Raise ``--threads`` with ``STABSSPEL_SSE_MAX_STREAMS``.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+
+from flask import Response, jsonify, stream_with_context
+
+from gm_console import build_public_state
+from models import game_revision, load_game_segments
+
+HUB_CHECK_SECONDS = 0.5
+HUB_QUEUE_SIZE = 8
+SSE_HEARTBEAT_SECONDS = 15
+SSE_MAX_SECONDS = 300
+SSE_RETRY_MS = 3000
+SSE_MAX_STREAMS = int(os.environ.get("STABSSPEL_SSE_MAX_STREAMS", "8"))
+
+# Revisions are per process; the token keeps another worker's Last-Event-ID
+# from matching by accident.
+_PROCESS_TOKEN = uuid.uuid4().hex[:8]
+
+_GONE = object()
+
+_metrics_guard = threading.Lock()
+_metrics = {"computed": 0, "published": 0, "dropped": 0, "streams_refused": 0}
+_streams_open = 0
+
+
+def _record(**changes):
+    with _metrics_guard:
+        for key, value in changes.items():
+            _metrics[key] += value
+
+
+class _Snapshot:
+    __slots__ = ("event_id", "state", "computed_at")
+
+    def __init__(self, event_id, state):
+        self.event_id = event_id
+        self.state = state
+        self.computed_at = int(time.time())
+
+    def fresh_state(self):
+        """The state with ``remaining`` brought up to now for a running clock."""
+        state = self.state
+        elapsed = int(time.time()) - self.computed_at
+        if elapsed <= 0 or state.get("timer_status") != "running":
+            return state
+        return dict(state, remaining=max(0, (state.get("remaining") or 0) - elapsed))
+
+
+class Subscriber:
+    def __init__(self, public=True):
+        self.queue = queue.Queue(maxsize=HUB_QUEUE_SIZE)
+        self.dropped = False
+        # Public subscribers get snapshots; the others just the event id.
+        self.public = public
+
+
+class ProjectorHub:
+    """Public state of one game, computed once per revision."""
+
+    def __init__(self, spel_id):
+        self.spel_id = spel_id
+        self._lock = threading.Lock()
+        self._compute_lock = threading.Lock()
+        self._snapshot = None
+        self._subscribers = []
+        self._pump = None
+
+    def _revision(self):
+        revision = game_revision(self.spel_id)
+        if revision is None:
+            # json/journal mode: not cached or changed on disk, and loading
+            # refreshes it (the snapshot then reuses that load). Segments
+            # mode returns None only for a missing game; this reads core only.
+            if load_game_segments(self.spel_id) is None:
+                return None
+            revision = game_revision(self.spel_id)
+        return revision
+
+    def event_id(self):
+        """Id of the current revision, or None if the game does not exist."""
+        revision = self._revision()
+        return None if revision is None else _revision_event_id(revision)
+
+    def snapshot(self):
+        """Current ``_Snapshot``, or None if the game does not exist."""
+        revision = self._revision()
+        if revision is None:
+            return None
+        event_id = _revision_event_id(revision)
+        snap = self._snapshot
+        if snap is not None and snap.event_id == event_id:
+            return snap
+        with self._compute_lock:
+            snap = self._snapshot
+            if snap is not None and snap.event_id == event_id:
+                return snap
+            data = load_game_segments(self.spel_id)
+            if not data:
+                return None
+            # The load may have bumped the revision (file changed meanwhile).
+            event_id = _revision_event_id(game_revision(self.spel_id) or revision)
+            snap = _Snapshot(event_id, build_public_state(data))
+            self._snapshot = snap
+            _record(computed=1)
+            return snap
+
+    def public_state(self):
+        snap = self.snapshot()
+        return snap.fresh_state() if snap is not None else None
+
+    # Fan-out ------------------------------------------------------------
+
+    def subscribe(self, last_event_id=None, public=True):
+        subscriber = Subscriber(public)
+        current = self.snapshot() if public else self.event_id()
+        if current is None:
+            subscriber.queue.put_nowait(_GONE)
+        elif _event_id_of(current) != last_event_id:
+            subscriber.queue.put_nowait(current)
+        with self._lock:
+            self._subscribers.append(subscriber)
+            if self._pump is None:
+                self._pump = threading.Thread(
+                    target=self._run,
+                    args=(_event_id_of(current) if current is not None else None,),
+                    name=f"projector-hub-{self.spel_id}",
+                    daemon=True,
+                )
+                self._pump.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def _publish(self, item):
+        """Queue a snapshot, an event id or ``_GONE`` to every subscriber."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            value = item
+            if isinstance(item, _Snapshot) and not subscriber.public:
+                value = item.event_id
+            elif isinstance(item, str) and subscriber.public:
+                # Joined after the pump looked: build the public state after all.
+                value = self.snapshot()
+                if value is None:
+                    continue
+            try:
+                subscriber.queue.put_nowait(value)
+                _record(published=1)
+            except queue.Full:
+                self._drop(subscriber)
+
+    def _drop(self, subscriber):
+        """Slow consumer: end its stream so it reconnects to the latest state."""
+        self.unsubscribe(subscriber)
+        subscriber.dropped = True
+        try:
+            subscriber.queue.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            subscriber.queue.put_nowait(_GONE)
+        except queue.Full:
+            pass
+        _record(dropped=1)
+
+    def _run(self, published):
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._pump = None
+                    return
+                public = any(subscriber.public for subscriber in self._subscribers)
+            try:
+                # Build the public state only if a projector is listening.
+                item = self.snapshot() if public else self.event_id()
+            except Exception as e:  # keep serving the last state
+                print(f"Projector hub {self.spel_id}: {e}")
+                time.sleep(HUB_CHECK_SECONDS)
+                continue
+            if item is None:
+                self._publish(_GONE)
+                with self._lock:
+                    self._subscribers = []
+            elif _event_id_of(item) != published:
+                published = _event_id_of(item)
+                self._publish(item)
+            time.sleep(HUB_CHECK_SECONDS)
+
+
+def _revision_event_id(revision):
+    return f"{_PROCESS_TOKEN}-{revision}"
+
+
+def _event_id_of(item):
+    return item.event_id if isinstance(item, _Snapshot) else item
+
+
+def _sse(event, data, event_id=None):
+    head = f"id: {event_id}\n" if event_id else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def event_stream(spel_id, last_event_id=None, render=None):
+    """SSE text for one client: ``live`` on every change, ``ping`` heartbeats.
+
+    Without ``render`` the event is the public state (projectors). With it
+    the stream follows the revision only and ``render(event_id)`` builds the
+    ``live`` payload, or returns None once the game is gone (GM console).
+    """
+    hub = hub_for(spel_id)
+    subscriber = hub.subscribe(last_event_id, public=render is None)
+    sent = last_event_id
+    try:
+        started = time.monotonic()
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        while True:
+            left = SSE_MAX_SECONDS - (time.monotonic() - started)
+            if left <= 0:
+                return
+            try:
+                item = subscriber.queue.get(timeout=min(left, SSE_HEARTBEAT_SECONDS))
+            except queue.Empty:
+                yield _sse("ping", {})
+                continue
+            if item is _GONE:
+                if not subscriber.dropped:
+                    yield _sse("gone", {})
+                return
+            event_id = _event_id_of(item)
+            if event_id == sent:
+                continue
+            payload = render(event_id) if render else {"success": True, "state": item.fresh_state()}
+            if payload is None:
+                yield _sse("gone", {})
+                return
+            yield _sse("live", payload, event_id)
+            sent = event_id
+    finally:
+        hub.unsubscribe(subscriber)
+
+
+def _take_stream_slot():
+    global _streams_open
+    with _metrics_guard:
+        if _streams_open >= SSE_MAX_STREAMS:
+            _metrics["streams_refused"] += 1
+            return False
+        _streams_open += 1
+        return True
+
+
+def _release_stream_slot():
+    global _streams_open
+    with _metrics_guard:
+        _streams_open -= 1
+
+
+def sse_response(body):
+    """``body`` (SSE text) as an event-stream response, or a 503 past ``SSE_MAX_STREAMS``."""
+    if not _take_stream_slot():
+        body.close()
+        response = jsonify({"success": False, "error": "För många öppna strömmar", "poll": True})
+        response.status_code = 503
+        response.headers["Retry-After"] = str(SSE_RETRY_MS // 1000)
+        return response
+    response = Response(
+        stream_with_context(body),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Keep reverse proxies from buffering the stream.
+            "X-Accel-Buffering": "no",
+        },
+    )
+    # Runs when the server closes the response, also if the client left early.
+    response.call_on_close(_release_stream_slot)
+    return response
+
+
+_hubs_guard = threading.Lock()
+_hubs = {}
+
+
+def hub_for(spel_id):
+    spel_id = str(spel_id)
+    with _hubs_guard:
+        hub = _hubs.get(spel_id)
+        if hub is None:
+            hub = ProjectorHub(spel_id)
+            _hubs[spel_id] = hub
+        return hub
+
+
+def hub_metrics():
+    """Process-wide fan-out counters (no game ids, safe to expose)."""
+    with _hubs_guard:
+        hubs = list(_hubs.values())
+    with _metrics_guard:
+        snapshot = dict(_metrics, streams_open=_streams_open, streams_max=SSE_MAX_STREAMS)
+    snapshot["games"] = sum(1 for hub in hubs if hub.subscriber_count())
+    snapshot["subscribers"] = sum(hub.subscriber_count() for hub in hubs)
+    return snapshot
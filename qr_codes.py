@@ -0,0 +1,135 @@
+"""
+QR codes for the team order links, rendered once per URL.
+
+``/team/<id>/<lag>`` used to build its QR code with ``qrcode``, encode it as
+a PNG with Pillow and base64 it on every view, although the URL only
+changes when the GM issues new team links. Codes are now SVG (no raster
+encoding at all) and kept in a bounded in-process LRU keyed by URL. They
+are not written to disk: the URL contains the team token.
+
+``qr_sheet_html`` renders every team's code of a game on one printable
+page for the GM. The page is cached per game under a key made of the URL
+root and the team tokens, so **Meny → Nya laglänkar** (new tokens) makes
+the next request render a new sheet and nothing has to be invalidated.
+"""
+
+import base64
+import threading
+from collections import OrderedDict
+
+import qrcode
+from qrcode.image.svg import SvgPathImage
+from markupsafe import escape
+
+CODES_MAX = 256
+SHEETS_MAX = 16
+
+_guard = threading.Lock()
+_codes = OrderedDict()
+_sheets = OrderedDict()
+_metrics = {"rendered": 0, "hits": 0, "sheets_rendered": 0, "sheet_hits": 0}
+
+
+def _lru_get(cache, key, hit_metric):
+    with _guard:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+            _metrics[hit_metric] += 1
+        return value
+
+
+def _lru_put(cache, key, value, limit, metric):
+    with _guard:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > limit:
+            cache.popitem(last=False)
+        _metrics[metric] += 1
+
+
+def _render_svg(url):
+    qr = qrcode.QRCode(
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+        image_factory=SvgPathImage,
+    )
+    qr.add_data(url)
+    qr.make(fit=True)
+    return qr.make_image().to_string(encoding="unicode")
+
+
+def qr_svg(url):
+    """``<svg>`` markup of the QR code for ``url``."""
+    svg = _lru_get(_codes, url, "hits")
+    if svg is None:
+        svg = _render_svg(url)
+        _lru_put(_codes, url, svg, CODES_MAX, "rendered")
+    return svg
+
+
+def qr_data_uri(url):
+    """The QR code for ``url`` as an ``<img src>`` data URI."""
+    encoded = base64.b64encode(qr_svg(url).encode("utf-8")).decode("ascii")
+    return f"data:image/svg+xml;base64,{encoded}"
+
+
+def team_order_url(url_root, spel_id, token):
+    return f"{url_root.rstrip('/')}/team/{spel_id}/{token}/enter_order"
+
+
+def _sheet_key(url_root, data):
+    tokens = data.get("team_tokens") or {}
+    return (
+        url_root,
+        data.get("token_generation"),
+        tuple((team, tokens.get(team)) for team in data.get("lag") or []),
+    )
+
+
+def qr_sheet_html(spel_id, data, url_root):
+    """Printable page with the order QR code of every team in the game."""
+    key = _sheet_key(url_root, data)
+    cached = _lru_get(_sheets, spel_id, "sheet_hits")
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    cards = ""
+    for team, token in key[2]:
+        if not token:
+            continue
+        url = team_order_url(url_root, spel_id, token)
+        cards += (
+            f"<div class='qr-card'><h2>{escape(team)}</h2>"
+            f"{qr_svg(url)}<p class='qr-link'>{escape(url)}</p></div>"
+        )
+    if not cards:
+        cards = "<p class='text-muted'>Spelet har inga laglänkar.</p>"
+    html = f"""<!DOCTYPE html>
+<html lang="sv">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>QR-koder – {escape(spel_id)}</title>
+    <link rel="stylesheet" href="/static/app.css">
+    <link rel="stylesheet" href="/static/print.css" media="print">
+</head>
+<body>
+<div class="container">
+    <div class="page-header no-print">
+        <h1>QR-koder för laglänkar</h1>
+        <p class="page-subtitle">Gäller tills nya laglänkar skapas</p>
+        <button onclick="window.print()" class="secondary">Skriv ut</button>
+        <a href="/admin/{escape(spel_id)}" class="secondary">← Tillbaka till adminpanelen</a>
+    </div>
+    <div class="qr-sheet">{cards}</div>
+</div>
+</body>
+</html>"""
+    _lru_put(_sheets, spel_id, (key, html), SHEETS_MAX, "sheets_rendered")
+    return html
+
+
+def qr_metrics():
+    with _guard:
+        return dict(_metrics, codes=len(_codes), sheets=len(_sheets))
@@ -0,0 +1,398 @@
+"""
+Games split into independently written segments (``STABSSPEL_STORAGE=segments``).
+
+One ``game_<id>.json`` holds everything from the phase clock to megabytes
+of undo history, so starting the timer rewrote all of it. Here a game is a
+folder ``game_<id>/`` with one file per segment:
+
+- ``core``            everything not listed below (phase, timer, poang,
+                      backlog, fashistorik, ...), rewritten on every save
+- ``orders/<round>``  one ``team_orders`` round each
+- ``gm_log``, ``gm_undo``, ``llm_resolution``
+
+``core.json`` is the manifest: it names the file holding each segment.
+Segment files are never overwritten. A changed segment gets a new file,
+the new ``core.json`` replaces the old one atomically, and then the files
+it no longer names are removed. A crash therefore leaves either the old or
+the new game, never a mix. A save compares each segment with the value last
+written or read in this process and writes only the ones that changed. A
+timer start writes just ``core.json``.
+
+Same contract as the other modes: ``load`` returns the whole game as a
+private copy. ``load(spel_id, segments)`` reads only the named segments,
+plus core. The result is marked as partial and ``save`` refuses it, so a
+partial copy can never overwrite the parts it lacks. Import an existing
+folder with::
+
+    python -m segment_store import speldata
+"""
+
+import itertools
+import json
+import os
+import pickle
+import sys
+import threading
+import uuid
+from collections import OrderedDict
+from urllib.parse import quote
+
+import durability
+from game_cache import GameCache, file_signature
+import game_journal
+
+CORE = "core"
+ORDERS = "orders"
+CORE_FILENAME = "core.json"
+FORMAT_VERSION = 1
+
+# Top-level keys stored outside core. ``team_orders`` is split per round.
+_ORDERS_KEY = "team_orders"
+_SEGMENT_KEYS = ("gm_log", "gm_undo", "llm_resolution")
+
+# Set on partial loads; ``save`` refuses such a dict.
+PARTIAL_KEY = "_partial_segments"
+
+KNOWN_MAX_GAMES = 16
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def split(data):
+    """(core document, {segment name: value}) for a whole game."""
+    core = dict(data)
+    segments = OrderedDict()
+    orders = data.get(_ORDERS_KEY)
+    if isinstance(orders, dict):
+        core[_ORDERS_KEY] = None
+        for round_key, teams in orders.items():
+            segments[f"{ORDERS}/{round_key}"] = teams
+    for key in _SEGMENT_KEYS:
+        if key in data:
+            core[key] = None
+            segments[key] = data[key]
+    return core, segments
+
+
+def _wanted(name, segments):
+    if segments is None or name in segments:
+        return True
+    return name.startswith(ORDERS + "/") and ORDERS in segments
+
+
+def join(core, values, segments=None):
+    """Game assembled from ``core`` and segment ``values``; see ``split``.
+
+    With ``segments`` only those are filled in; placeholders of the others
+    are dropped and the result is marked partial.
+    """
+    data = dict(core)
+    if data.get(_ORDERS_KEY, 0) is None:
+        if segments is None or any(name == ORDERS or name.startswith(ORDERS + "/") for name in segments):
+            data[_ORDERS_KEY] = {
+                name[len(ORDERS) + 1:]: value for name, value in values.items()
+                if name.startswith(ORDERS + "/") and _wanted(name, segments)
+            }
+        else:
+            del data[_ORDERS_KEY]
+    for key in _SEGMENT_KEYS:
+        if data.get(key, 0) is None:
+            if key in values and _wanted(key, segments):
+                data[key] = values[key]
+            else:
+                del data[key]
+    if segments is not None:
+        data[PARTIAL_KEY] = sorted(segments)
+    return data
+
+
+class _Known:
+    """What this process last wrote or read for a game."""
+
+    __slots__ = ("signature", "manifest", "core", "values")
+
+    def __init__(self, signature, manifest, core, values):
+        self.signature = signature
+        self.manifest = manifest
+        self.core = core
+        self.values = values
+
+
+class SegmentGameStore:
+    """Segmented games under one data directory. Safe to share between threads.
+
+    Callers serialise saves of one game (``models`` holds the game lock).
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._cache = GameCache(signature=self._signature_for_key)
+        self._lock = threading.Lock()
+        self._known = OrderedDict()
+        self._revisions = {}
+        self._revision_counter = itertools.count(1)
+        self.segment_writes = 0
+        self.segment_skips = 0
+
+    def game_dir(self, spel_id):
+        return os.path.join(self.directory, f"game_{spel_id}")
+
+    def core_path(self, spel_id):
+        return os.path.join(self.game_dir(spel_id), CORE_FILENAME)
+
+    def _signature_for_key(self, spel_id):
+        return file_signature(self.core_path(spel_id))
+
+    def signature(self, spel_id):
+        return file_signature(self.core_path(spel_id))
+
+    def revision(self, spel_id):
+        """Change marker for the game, or None if it is missing.
+
+        Every save replaces ``core.json``, so the marker is bumped whenever
+        its signature changes. That takes one ``stat``: partial and full
+        loads alike see it without reading the game.
+        """
+        signature = self.signature(spel_id)
+        if signature is None:
+            return None
+        with self._lock:
+            known = self._revisions.get(spel_id)
+            if known is None or known[0] != signature:
+                known = self._revisions[spel_id] = (signature, next(self._revision_counter))
+            return known[1]
+
+    def tag(self, spel_id):
+        return self._cache.tag(spel_id)
+
+    def exists(self, spel_id):
+        return os.path.exists(self.core_path(spel_id))
+
+    def list_ids(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(
+            name[len("game_"):] for name in names
+            if name.startswith("game_") and os.path.isfile(os.path.join(self.directory, name, CORE_FILENAME))
+        )
+
+    # Reading -----------------------------------------------------------
+
+    def _read_json(self, path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _read_core(self, spel_id):
+        """(signature, manifest, core document) or None if the game is missing."""
+        path = self.core_path(spel_id)
+        for _attempt in range(3):
+            signature = file_signature(path)
+            if signature is None:
+                return None
+            try:
+                wrapper = self._read_json(path)
+            except FileNotFoundError:
+                continue
+            if file_signature(path) == signature:
+                return signature, wrapper.get("segments") or {}, wrapper.get("doc") or {}
+        return None
+
+    def _remember(self, spel_id, known):
+        with self._lock:
+            self._known[spel_id] = known
+            self._known.move_to_end(spel_id)
+            while len(self._known) > KNOWN_MAX_GAMES:
+                self._known.popitem(last=False)
+
+    def _current_known(self, spel_id):
+        with self._lock:
+            known = self._known.get(spel_id)
+        if known is not None and known.signature == self.signature(spel_id):
+            return known
+        return None
+
+    def _read_segments(self, spel_id, manifest, names, known=None):
+        values = OrderedDict()
+        folder = self.game_dir(spel_id)
+        for name in names:
+            if known is not None and known.manifest.get(name) == manifest[name] and name in known.values:
+                values[name] = known.values[name]
+            else:
+                values[name] = self._read_json(os.path.join(folder, manifest[name]))
+        return values
+
+    def load(self, spel_id, segments=None):
+        """The game (private copy), or only core plus ``segments``; None if missing."""
+        if segments is None:
+            cached = self._cache.get(spel_id)
+            if cached is not None:
+                return cached
+        known = self._current_known(spel_id)
+        if known is not None:
+            signature, manifest, core = known.signature, known.manifest, known.core
+        else:
+            read = self._read_core(spel_id)
+            if read is None:
+                return None
+            signature, manifest, core = read
+        names = [name for name in manifest if _wanted(name, segments)]
+        try:
+            values = self._read_segments(spel_id, manifest, names, known)
+        except FileNotFoundError:
+            # A save replaced the manifest meanwhile; read the new one.
+            self._cache.invalidate(spel_id)
+            with self._lock:
+                self._known.pop(spel_id, None)
+            return self.load(spel_id, segments) if self.exists(spel_id) else None
+        if segments is None:
+            data = join(core, values)
+            self._remember(spel_id, _Known(signature, dict(manifest), core, dict(values)))
+            # The cache hands out copies; ``data`` itself now backs _known.
+            self._cache.put(spel_id, data, signature, _data_revision(data))
+            return pickle.loads(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+        return pickle.loads(pickle.dumps(join(core, values, segments), protocol=pickle.HIGHEST_PROTOCOL))
+
+    # Writing -----------------------------------------------------------
+
+    def _write_file(self, path, value, level):
+        temp = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp, "w", encoding="utf-8") as f:
+                f.write(_dumps(value))
+                durability.sync(f, level)
+            os.replace(temp, path)
+        finally:
+            if os.path.exists(temp):
+                os.remove(temp)
+        durability.settle(path, level)
+
+    @staticmethod
+    def _segment_filename(name, revision):
+        return f"{quote(name, safe='')}.r{revision}.{uuid.uuid4().hex[:8]}.json"
+
+    def save(self, spel_id, data, level=durability.STRICT):
+        """Write the segments of ``data`` that changed, then the new core."""
+        if PARTIAL_KEY in data:
+            raise ValueError("Ett delvis laddat spel kan inte sparas")
+        # Own copy: the caller may keep mutating ``data`` after the save.
+        data = pickle.loads(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+        core, values = split(data)
+        folder = self.game_dir(spel_id)
+        os.makedirs(folder, exist_ok=True)
+        known = self._current_known(spel_id)
+        revision = _data_revision(data)
+        manifest = OrderedDict()
+        for name, value in values.items():
+            if known is not None and name in known.manifest and known.values.get(name) == value:
+                manifest[name] = known.manifest[name]
+                self.segment_skips += 1
+                continue
+            filename = self._segment_filename(name, revision)
+            self._write_file(os.path.join(folder, filename), value, level)
+            manifest[name] = filename
+            self.segment_writes += 1
+        self._write_file(
+            self.core_path(spel_id),
+            {"format": FORMAT_VERSION, "segments": manifest, "doc": core},
+            level,
+        )
+        self._remove_unlisted(folder, manifest)
+        signature = self.signature(spel_id)
+        self._remember(spel_id, _Known(signature, dict(manifest), core, dict(values)))
+        self._cache.put(spel_id, data, signature, revision)
+
+    @staticmethod
+    def _remove_unlisted(folder, manifest):
+        listed = set(manifest.values())
+        for name in os.listdir(folder):
+            if name == CORE_FILENAME or name in listed or name.endswith(".tmp"):
+                continue
+            try:
+                os.remove(os.path.join(folder, name))
+            except FileNotFoundError:
+                pass
+
+    def delete(self, spel_id):
+        folder = self.game_dir(spel_id)
+        removed = os.path.exists(self.core_path(spel_id))
+        if os.path.isdir(folder):
+            for name in os.listdir(folder):
+                os.remove(os.path.join(folder, name))
+            os.rmdir(folder)
+        self._cache.invalidate(spel_id)
+        with self._lock:
+            self._known.pop(spel_id, None)
+            self._revisions.pop(spel_id, None)
+        return removed
+
+    def stats(self):
+        return {"segment_writes": self.segment_writes, "segment_skips": self.segment_skips}
+
+
+def _data_revision(data):
+    try:
+        return int(data.get("revision") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+_stores_guard = threading.Lock()
+_stores = {}
+
+
+def store_for(directory):
+    """Shared store per data directory."""
+    directory = os.path.abspath(directory)
+    with _stores_guard:
+        store = _stores.get(directory)
+        if store is None:
+            store = SegmentGameStore(directory)
+            _stores[directory] = store
+        return store
+
+
+def import_data_dir(data_dir, store):
+    """Split every ``game_<id>.json`` (plus journal) in ``data_dir`` into ``store``.
+
+    Returns the imported ids. The JSON files are left in place, so the
+    import can be re-run until the switch-over.
+    """
+    imported = []
+    for fil in sorted(os.listdir(data_dir)):
+        if not fil.startswith("game_") or not fil.endswith(".json"):
+            continue
+        path = os.path.join(data_dir, fil)
+        signature = game_journal.storage_signature(path)
+        if signature is None:
+            continue
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            data = game_journal.replay(path, signature[0], data)
+        except (OSError, ValueError) as e:
+            print(f"Skipping {fil}: {e}")
+            continue
+        if not isinstance(data, dict):
+            continue
+        spel_id = fil[len("game_"):-len(".json")]
+        store.save(spel_id, data)
+        imported.append(spel_id)
+    return imported
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if len(argv) != 2 or argv[0] != "import":
+        print("Usage: python -m segment_store import <speldata-dir>")
+        return 2
+    imported = import_data_dir(argv[1], store_for(argv[1]))
+    print(f"Imported {len(imported)} game(s) into segment folders in {argv[1]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Signed (stateless) team access tokens.
+
+A signed token carries its game, team, issue time and the game's token
+generation, followed by an HMAC over them keyed with the app ``SECRET_KEY``
+and the game's own ``token_salt``::
+
+    s1.<base64url(json [spel_id, team, issued, generation])>.<base64url(mac)>
+
+Checking one needs only the salt and the current generation, which
+``models`` keeps in memory per game, so a team request is authenticated
+without reading the game. Raising the game's ``token_generation``
+(``models.reissue_team_tokens``) revokes every token issued before.
+
+Random tokens from older games are not signed; they keep working through
+the stored ``team_tokens``. Signed tokens are stored there too, so links
+survive a changed ``SECRET_KEY`` until the GM issues new ones.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+
+from flask import current_app, has_app_context
+
+PREFIX = "s1."
+DEV_SECRET_KEY = "dev-secret-key-change-in-production"
+MAC_BYTES = 16
+
+
+def new_salt():
+    return secrets.token_urlsafe(12)
+
+
+def _secret():
+    if has_app_context():
+        key = current_app.config.get("SECRET_KEY")
+        if key:
+            return str(key)
+    return os.environ.get("SECRET_KEY") or DEV_SECRET_KEY
+
+
+def _b64(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _unb64(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _mac(salt, body):
+    key = f"{_secret()}:{salt}".encode("utf-8")
+    return hmac.new(key, body.encode("ascii"), hashlib.sha256).digest()[:MAC_BYTES]
+
+
+def is_signed(token):
+    return isinstance(token, str) and token.startswith(PREFIX)
+
+
+def sign(spel_id, team, salt, generation=0, issued=None):
+    """New signed token for ``team`` in ``spel_id``."""
+    issued = int(time.time()) if issued is None else int(issued)
+    claims = json.dumps([str(spel_id), team, issued, int(generation)], ensure_ascii=False, separators=(",", ":"))
+    body = _b64(claims.encode("utf-8"))
+    return f"{PREFIX}{body}.{_b64(_mac(salt, body))}"
+
+
+def verify(token, spel_id, salt, generation):
+    """Team name if ``token`` is a valid, current token for ``spel_id``, else None."""
+    if not is_signed(token) or not salt:
+        return None
+    body, _, mac = token[len(PREFIX):].partition(".")
+    try:
+        if not hmac.compare_digest(_unb64(mac), _mac(salt, body)):
+            return None
+        token_game, team, _issued, token_generation = json.loads(_unb64(body))
+    except (ValueError, TypeError):
+        return None
+    if token_game != str(spel_id) or token_generation != int(generation or 0):
+        return None
+    return team if isinstance(team, str) else None
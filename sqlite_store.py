@@ -0,0 +1,403 @@
+"""
+SQLite storage for games (``STABSSPEL_STORAGE=sqlite``).
+
+Same contract as the JSON files behind ``load_game_data`` /
+``save_game_data``: a game is one dict, loaded as a private copy and saved
+whole. Inside the database the bulky, often-changing parts live in their
+own indexed tables so a save only touches the rows that changed:
+
+- ``games``          the rest of the document plus a few summary columns
+- ``orders``         one row per round and team (``team_orders``)
+- ``gm_log``         one row per log entry, with ``kind`` indexed
+- ``llm_resolution`` one row per round (rolls and imported result)
+
+``load(spel_id, segments)`` reads the document plus only the named tables,
+with the same segment names and partial marker as ``segment_store``, so
+``models.load_game_segments`` (timers, projector, public display) skips
+the orders, log and resolution rows in this mode too.
+
+The database runs in WAL mode. Every save is one ``BEGIN IMMEDIATE``
+transaction, so saves from several gunicorn workers serialise in SQLite
+rather than overwriting each other's files.
+
+Import an existing data directory with::
+
+    python -m sqlite_store import speldata
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import uuid
+
+from game_cache import GameCache
+import game_journal
+from segment_store import ORDERS, PARTIAL_KEY
+
+SQLITE_FILENAME = "stabsspel.sqlite3"
+
+# Top-level keys kept in their own tables. The document keeps a
+# placeholder so key order survives a round trip; a value of another type
+# (None included) stays in the document as it is.
+_ORDERS = "team_orders"
+_GM_LOG = "gm_log"
+_RESOLUTION = "llm_resolution"
+_TABLE_TYPES = {_ORDERS: dict, _GM_LOG: list, _RESOLUTION: dict}
+_IN_TABLE = "<rows>"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id TEXT PRIMARY KEY,
+    doc TEXT NOT NULL,
+    revision INTEGER NOT NULL DEFAULT 0,
+    stamp TEXT,
+    skapad TEXT,
+    datum TEXT,
+    plats TEXT,
+    runda INTEGER,
+    fas TEXT,
+    avslutat INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS orders (
+    spel_id TEXT NOT NULL,
+    round_key TEXT NOT NULL,
+    team TEXT NOT NULL,
+    pos INTEGER NOT NULL,
+    final INTEGER NOT NULL DEFAULT 0,
+    record TEXT NOT NULL,
+    PRIMARY KEY (spel_id, round_key, team)
+);
+CREATE TABLE IF NOT EXISTS gm_log (
+    spel_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    at REAL,
+    kind TEXT,
+    entry TEXT NOT NULL,
+    PRIMARY KEY (spel_id, seq)
+);
+CREATE INDEX IF NOT EXISTS gm_log_kind ON gm_log (spel_id, kind, seq);
+CREATE TABLE IF NOT EXISTS llm_resolution (
+    spel_id TEXT NOT NULL,
+    round_key TEXT NOT NULL,
+    pos INTEGER NOT NULL,
+    record TEXT NOT NULL,
+    PRIMARY KEY (spel_id, round_key)
+);
+"""
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+class SqliteGameStore:
+    """Games stored in one SQLite file. Safe to share between threads."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._cache = GameCache(signature=self.signature)
+        with self._transaction() as db:
+            db.executescript(SCHEMA)
+
+    def _connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            # Same promise as the fsync'ed JSON files: a save that returned
+            # survives a power cut.
+            db.execute("PRAGMA synchronous=FULL")
+            self._local.db = db
+        return db
+
+    def _transaction(self):
+        return _Transaction(self._connection())
+
+    def close(self):
+        db = getattr(self._local, "db", None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+    # Whole documents ---------------------------------------------------
+
+    def revision(self, spel_id):
+        row = self._connection().execute(
+            "SELECT revision FROM games WHERE id = ?", (spel_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def signature(self, spel_id):
+        # The stamp tells a recreated database apart from one with the same
+        # revision numbers.
+        row = self._connection().execute(
+            "SELECT revision, stamp FROM games WHERE id = ?", (spel_id,)
+        ).fetchone()
+        return tuple(row) if row else None
+
+    def load(self, spel_id, segments=None):
+        """The game (private copy), or only core plus ``segments``; None if missing.
+
+        ``segments`` uses the names of ``segment_store``: ``"orders"`` or
+        ``"orders/<round>"``, ``"gm_log"``, ``"llm_resolution"``. Only their
+        rows are read, and the result is marked partial so it cannot be saved.
+        """
+        if segments is None:
+            cached = self._cache.get(spel_id)
+            if cached is not None:
+                return cached
+        with self._transaction() as db:
+            # One read transaction: a concurrent save cannot tear the rows.
+            db.execute("BEGIN")
+            row = db.execute(
+                "SELECT doc, revision, stamp FROM games WHERE id = ?", (spel_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            data = json.loads(row[0])
+            if data.get(_ORDERS) == _IN_TABLE:
+                rounds = self._wanted_rounds(segments)
+                if rounds == ():
+                    del data[_ORDERS]
+                else:
+                    data[_ORDERS] = self._read_orders(db, spel_id, rounds)
+            for key, query in (
+                (_GM_LOG, "SELECT entry FROM gm_log WHERE spel_id = ? ORDER BY seq"),
+                (_RESOLUTION, "SELECT round_key, record FROM llm_resolution WHERE spel_id = ? ORDER BY pos"),
+            ):
+                if data.get(key) != _IN_TABLE:
+                    continue
+                if segments is not None and key not in segments:
+                    del data[key]
+                elif key == _GM_LOG:
+                    data[key] = [json.loads(entry) for (entry,) in db.execute(query, (spel_id,))]
+                else:
+                    data[key] = {name: json.loads(record) for name, record in db.execute(query, (spel_id,))}
+        if segments is not None:
+            data[PARTIAL_KEY] = sorted(segments)
+            return data
+        self._cache.put(spel_id, data, (row[1], row[2]))
+        return data
+
+    @staticmethod
+    def _wanted_rounds(segments):
+        """None for every round, else the round keys named in ``segments``."""
+        if segments is None or ORDERS in segments:
+            return None
+        prefix = ORDERS + "/"
+        return tuple(name[len(prefix):] for name in segments if name.startswith(prefix))
+
+    @staticmethod
+    def _read_orders(db, spel_id, rounds):
+        query = "SELECT round_key, team, record FROM orders WHERE spel_id = ?"
+        params = [spel_id]
+        if rounds is not None:
+            query += f" AND round_key IN ({', '.join('?' for _ in rounds)})"
+            params.extend(rounds)
+        orders = {}
+        for round_key, team, record in db.execute(query + " ORDER BY pos", params):
+            orders.setdefault(round_key, {})[team] = json.loads(record)
+        return orders
+
+    def save(self, spel_id, data, synchronous="FULL"):
+        """Store ``data``; ``synchronous`` is the PRAGMA for this transaction."""
+        if PARTIAL_KEY in data:
+            raise ValueError("Ett delvis laddat spel kan inte sparas")
+        data = json.loads(_dumps(data))
+        doc = dict(data)
+        tables = {}
+        for key, kind in _TABLE_TYPES.items():
+            if isinstance(doc.get(key), kind):
+                tables[key] = doc[key]
+                doc[key] = _IN_TABLE
+        with self._transaction() as db:
+            db.execute(f"PRAGMA synchronous={synchronous}")
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute("SELECT revision FROM games WHERE id = ?", (spel_id,)).fetchone()
+            revision = (row[0] if row else 0) + 1
+            stamp = uuid.uuid4().hex
+            db.execute(
+                "INSERT OR REPLACE INTO games "
+                "(id, doc, revision, stamp, skapad, datum, plats, runda, fas, avslutat) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    spel_id, _dumps(doc), revision, stamp,
+                    data.get("skapad"), data.get("datum"), data.get("plats"),
+                    data.get("runda"), data.get("fas"), 1 if data.get("avslutat") else 0,
+                ),
+            )
+            self._sync_orders(db, spel_id, tables.get(_ORDERS) or {})
+            self._sync_gm_log(db, spel_id, tables.get(_GM_LOG) or [])
+            self._sync_resolution(db, spel_id, tables.get(_RESOLUTION) or {})
+        self._cache.put(spel_id, data, (revision, stamp))
+        return revision
+
+    def delete(self, spel_id):
+        with self._transaction() as db:
+            db.execute("BEGIN IMMEDIATE")
+            removed = db.execute("DELETE FROM games WHERE id = ?", (spel_id,)).rowcount > 0
+            for table in ("orders", "gm_log", "llm_resolution"):
+                db.execute(f"DELETE FROM {table} WHERE spel_id = ?", (spel_id,))
+        self._cache.invalidate(spel_id)
+        return removed
+
+    def list_ids(self):
+        return [
+            spel_id for (spel_id,) in self._connection().execute("SELECT id FROM games ORDER BY id")
+        ]
+
+    # Row syncing -------------------------------------------------------
+
+    @staticmethod
+    def _sync_rows(db, table, key_columns, spel_id, desired, extra_columns=()):
+        """Upsert ``desired`` {key tuple: (pos, record, *extra)} and drop the rest."""
+        where = " AND ".join(f"{col} = ?" for col in key_columns)
+        existing = {
+            tuple(row[:-2]): (row[-2], row[-1]) for row in db.execute(
+                f"SELECT {', '.join(key_columns)}, pos, record FROM {table} WHERE spel_id = ?",
+                (spel_id,),
+            )
+        }
+        for key in existing.keys() - desired.keys():
+            db.execute(f"DELETE FROM {table} WHERE spel_id = ? AND {where}", (spel_id, *key))
+        for key, values in desired.items():
+            if existing.get(key) == values[:2]:
+                continue
+            columns = ("spel_id", *key_columns, "pos", "record", *extra_columns)
+            db.execute(
+                f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})",
+                (spel_id, *key, *values),
+            )
+
+    def _sync_orders(self, db, spel_id, team_orders):
+        desired = {}
+        pos = 0
+        for round_key, teams in team_orders.items():
+            for team, record in (teams or {}).items():
+                final = 1 if isinstance(record, dict) and record.get("final") else 0
+                desired[(round_key, team)] = (pos, _dumps(record), final)
+                pos += 1
+        self._sync_rows(db, "orders", ("round_key", "team"), spel_id, desired, ("final",))
+
+    def _sync_resolution(self, db, spel_id, resolution):
+        desired = {
+            (round_key,): (pos, _dumps(record))
+            for pos, (round_key, record) in enumerate(resolution.items())
+        }
+        self._sync_rows(db, "llm_resolution", ("round_key",), spel_id, desired)
+
+    @staticmethod
+    def _sync_gm_log(db, spel_id, log):
+        entries = [_dumps(item) for item in log]
+        existing = db.execute(
+            "SELECT seq, entry FROM gm_log WHERE spel_id = ? ORDER BY seq", (spel_id,)
+        ).fetchall()
+        old = [entry for _seq, entry in existing]
+        # The log is capped from the front and appended at the back; find
+        # how many old rows fell off and keep the rest in place.
+        keep_from = None
+        for dropped in range(len(old) + 1):
+            kept = old[dropped:]
+            if kept and kept[0] != (entries[0] if entries else None):
+                continue
+            if entries[: len(kept)] == kept:
+                keep_from = dropped
+                break
+        if keep_from is None or keep_from == len(old):
+            db.execute("DELETE FROM gm_log WHERE spel_id = ?", (spel_id,))
+            start, next_seq = 0, (existing[-1][0] + 1 if existing else 0)
+        else:
+            if keep_from:
+                db.execute(
+                    "DELETE FROM gm_log WHERE spel_id = ? AND seq < ?",
+                    (spel_id, existing[keep_from][0]),
+                )
+            start, next_seq = len(old) - keep_from, existing[-1][0] + 1
+        for offset, (item, entry) in enumerate(zip(log[start:], entries[start:])):
+            item = item if isinstance(item, dict) else {}
+            db.execute(
+                "INSERT INTO gm_log (spel_id, seq, at, kind, entry) VALUES (?, ?, ?, ?, ?)",
+                (spel_id, next_seq + offset, item.get("at"), item.get("kind"), entry),
+            )
+
+
+class _Transaction:
+    """``with`` block that commits on success and rolls back on error."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.db.in_transaction:
+            self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+_stores_guard = threading.Lock()
+_stores = {}
+
+
+def store_for(path):
+    """Shared store per database file."""
+    path = os.path.abspath(path)
+    with _stores_guard:
+        store = _stores.get(path)
+        if store is None:
+            store = SqliteGameStore(path)
+            _stores[path] = store
+        return store
+
+
+def import_data_dir(data_dir, store):
+    """Copy every ``game_<id>.json`` (plus journal) in ``data_dir`` into ``store``.
+
+    Returns the imported ids. Games already in the database are overwritten,
+    so the import can be re-run until the switch-over.
+    """
+    imported = []
+    for fil in sorted(os.listdir(data_dir)):
+        if not fil.startswith("game_") or not fil.endswith(".json"):
+            continue
+        path = os.path.join(data_dir, fil)
+        signature = game_journal.storage_signature(path)
+        if signature is None:
+            continue
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            data = game_journal.replay(path, signature[0], data)
+        except (OSError, ValueError) as e:
+            print(f"Skipping {fil}: {e}")
+            continue
+        if not isinstance(data, dict):
+            continue
+        spel_id = fil[len("game_"):-len(".json")]
+        store.save(spel_id, data)
+        imported.append(spel_id)
+    return imported
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if len(argv) not in (2, 3) or argv[0] != "import":
+        print("Usage: python -m sqlite_store import <speldata-dir> [database-file]")
+        return 2
+    data_dir = argv[1]
+    db_path = argv[2] if len(argv) == 3 else os.path.join(data_dir, SQLITE_FILENAME)
+    imported = import_data_dir(data_dir, store_for(db_path))
+    print(f"Imported {len(imported)} game(s) into {db_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,12 @@
 /**
- * Live Game Master console: timer, keyboard, test mode, inbox poll, backlog.
+ * Live Game Master console: timer, keyboard, test mode, live stream + inbox poll, backlog.
  * News remain outside the app (LLM copy → paper → studio).
  */
 
 (function () {
   var POLL_MS = 3000;
+  // While the event stream delivers (live or ping) the poller stands down.
+  var STREAM_FRESH_MS = 20000;
   var GM_WARN_S = 300;
   var GM_DANGER_S = 60;
   var CHIP_LABELS = {
@@ -26,9 +28,16 @@
   };
   var live = null;
   var inflight = false;
-  var lastPaint = "";
+  // Latest live payload, patched together from deltas (see live_payload).
+  var model = { state: {}, html: {}, hashes: {} };
+  // Parts merged into the model but not painted yet ("s.key" / "h.name").
+  var unpainted = {};
   var writeGen = 0;
   var editing = false;
+  var stream = null;
+  var streamSeenAt = 0;
+  var streamMissed = false;
+  var liveEtag = null;
   var testModePending = false;
 
   function readState() {
@@ -378,10 +387,48 @@
     if (el.innerHTML !== html) el.innerHTML = html;
   }
 
-  function paintLive(payload) {
-    var state = payload.state || payload;
-    var html = payload.html || {};
-    if (!state) return;
+  function liveHeaders(headers) {
+    var known = Object.keys(model.hashes)
+      .map(function (key) {
+        return key + "=" + model.hashes[key];
+      })
+      .join(",");
+    if (known) headers["X-Live-Known"] = known;
+    return headers;
+  }
+
+  function mergeLive(payload) {
+    if (!payload.delta) model = { state: {}, html: {}, hashes: {} };
+    ["state", "html"].forEach(function (section) {
+      var values = payload[section] || {};
+      var prefix = section === "state" ? "s." : "h.";
+      Object.keys(values).forEach(function (key) {
+        model[section][key] = values[key];
+        unpainted[prefix + key] = true;
+      });
+    });
+    var hashes = payload.hashes || {};
+    Object.keys(hashes).forEach(function (key) {
+      model.hashes[key] = hashes[key];
+    });
+    (payload.removed || []).forEach(function (key) {
+      delete model.hashes[key];
+      delete model[key.charAt(0) === "s" ? "state" : "html"][key.slice(2)];
+      unpainted[key] = true;
+    });
+  }
+
+  function receiveLive(payload) {
+    mergeLive(payload);
+    paintLive();
+  }
+
+  function paintLive() {
+    var changed = unpainted;
+    var state = model.state;
+    var html = model.html;
+    if (!Object.keys(changed).length || !state.fas) return;
+    unpainted = {};
 
     if (
       live &&
@@ -398,63 +445,114 @@
     live.avslutat = state.avslutat;
     paintClock();
 
-    var sig = JSON.stringify({
-      inbox: state.inbox,
-      teams: state.teams,
-      backlog: state.backlog,
-      missing: state.missing_teams,
-      log: state.log,
-      undo: state.undo_available,
-      conflicts: state.conflict_count,
-      conflictsRequireReview: !!state.conflicts_require_review,
-      inboxActions: state.inbox_action_count,
-      test_mode: !!state.test_mode,
-      llm: state.llm,
+    var stateChanged = Object.keys(changed).some(function (key) {
+      return key.charAt(0) === "s" && key !== "s.remaining" && key !== "s.timer_status";
     });
-    if (sig === lastPaint) return;
-    lastPaint = sig;
-
-    paintTeams(state.teams);
-    paintTabAlerts(state);
-    paintNextConfirm(state);
-
-    setHtml("gm-attention-list", html.attention);
-    var attentionBox = document.getElementById("gm-attention");
-    var attentionList = document.getElementById("gm-attention-list");
-    if (attentionBox) {
-      attentionBox.hidden = !attentionList || !attentionList.children.length;
+    if (changed["s.teams"]) paintTeams(state.teams);
+    if (stateChanged) {
+      paintTabAlerts(state);
+      paintNextConfirm(state);
+    }
+
+    if (changed["h.attention"]) {
+      setHtml("gm-attention-list", html.attention);
+      var attentionBox = document.getElementById("gm-attention");
+      var attentionList = document.getElementById("gm-attention-list");
+      if (attentionBox) {
+        attentionBox.hidden = !attentionList || !attentionList.children.length;
+      }
     }
-    if (html.readiness != null) setHtml("gm-readiness-root", html.readiness);
-    setHtml("gm-inbox-root", html.inbox);
-    if (html.llm != null) setHtml("gm-panel-llm", html.llm);
-    var backlogAmounts = readBacklogAmounts();
-    if (!backlogAmountFocused()) {
-      setHtml("gm-backlog-root", html.backlog);
-      restoreBacklogAmounts(backlogAmounts);
+    if (changed["h.readiness"]) setHtml("gm-readiness-root", html.readiness);
+    if (changed["h.inbox"]) setHtml("gm-inbox-root", html.inbox);
+    if (changed["h.llm"]) setHtml("gm-panel-llm", html.llm);
+    if (changed["h.backlog"]) {
+      if (backlogAmountFocused()) {
+        unpainted["h.backlog"] = true;
+      } else {
+        var backlogAmounts = readBacklogAmounts();
+        setHtml("gm-backlog-root", html.backlog);
+        restoreBacklogAmounts(backlogAmounts);
+      }
     }
-    setHtml("gm-log-root", html.log);
+    if (changed["h.log"]) setHtml("gm-log-root", html.log);
 
-    var undo = document.querySelector("[data-gm-undo]");
-    if (undo) undo.disabled = !state.undo_available || !!state.avslutat;
+    if (changed["s.undo_available"] || changed["s.avslutat"]) {
+      var undo = document.querySelector("[data-gm-undo]");
+      if (undo) undo.disabled = !state.undo_available || !!state.avslutat;
+    }
 
-    if (!testModePending) {
+    if (changed["s.test_mode"] && !testModePending) {
       live.test_mode = !!state.test_mode;
       applyTestModeUi(!!state.test_mode);
     }
   }
 
+  function streamFresh() {
+    return !!stream && !streamMissed && Date.now() - streamSeenAt < STREAM_FRESH_MS;
+  }
+
+  function openStream() {
+    if (!window.EventSource || !live || !live.spel_id || stream) return;
+    stream = new EventSource("/admin/" + encodeURIComponent(live.spel_id) + "/events");
+    stream.addEventListener("live", function (ev) {
+      streamSeenAt = Date.now();
+      var payload;
+      try {
+        payload = JSON.parse(ev.data);
+      } catch (e) {
+        return;
+      }
+      if (!payload || !payload.success) return;
+      mergeLive(payload);
+      // Mid-edit or mid-write: keep the parts and let the next poll paint them.
+      if (editing || inflight) {
+        streamMissed = true;
+        return;
+      }
+      streamMissed = false;
+      paintLive();
+    });
+    stream.addEventListener("ping", function () {
+      streamSeenAt = Date.now();
+    });
+    stream.addEventListener("gone", closeStream);
+    stream.onerror = function () {
+      // The browser reconnects by itself (sending Last-Event-ID); poll meanwhile.
+      streamSeenAt = 0;
+      if (stream && stream.readyState === 2) closeStream();
+    };
+  }
+
+  function closeStream() {
+    if (stream) stream.close();
+    stream = null;
+    streamSeenAt = 0;
+  }
+
   function poll() {
     if (!live || !live.spel_id || inflight || editing || document.hidden) return;
+    if (streamFresh()) return;
     inflight = true;
     var gen = writeGen;
-    fetch("/admin/" + live.spel_id + "/live", { headers: { Accept: "application/json" } })
+    var headers = liveHeaders({ Accept: "application/json" });
+    if (liveEtag) headers["If-None-Match"] = liveEtag;
+    var etag = null;
+    fetch("/admin/" + live.spel_id + "/live", { headers: headers, cache: "no-store" })
       .then(function (res) {
+        // 304: nothing saved since the last painted poll.
+        if (res.status === 304) return null;
         if (!res.ok) throw new Error("live " + res.status);
+        etag = res.headers.get("ETag");
         return res.json();
       })
       .then(function (payload) {
         if (gen !== writeGen) return;
-        if (payload && payload.success) paintLive(payload);
+        streamMissed = false;
+        if (payload && payload.success) {
+          liveEtag = etag;
+          mergeLive(payload);
+        }
+        paintLive();
       })
       .catch(function () {})
       .then(function () {
@@ -469,7 +567,7 @@
     inflight = true;
     fetch("/admin/" + live.spel_id + "/hp", {
       method: "POST",
-      headers: { "Content-Type": "application/json", Accept: "application/json" },
+      headers: liveHeaders({ "Content-Type": "application/json", Accept: "application/json" }),
       body: JSON.stringify(body),
     })
       .then(function (res) {
@@ -480,7 +578,7 @@
       })
       .then(function (payload) {
         if (payload && payload.success) {
-          paintLive(payload);
+          receiveLive(payload);
           return;
         }
         showError((payload && payload.error) || "Kunde inte uppdatera HP.");
@@ -500,7 +598,7 @@
     inflight = true;
     fetch("/admin/" + live.spel_id + "/backlog_live", {
       method: "POST",
-      headers: { "Content-Type": "application/json", Accept: "application/json" },
+      headers: liveHeaders({ "Content-Type": "application/json", Accept: "application/json" }),
       body: JSON.stringify(body),
     })
       .then(function (res) {
@@ -511,7 +609,7 @@
       })
       .then(function (payload) {
         if (payload && payload.success) {
-          paintLive(payload);
+          receiveLive(payload);
           return;
         }
         showError((payload && payload.error) || "Kunde inte uppdatera backlog.");
@@ -532,7 +630,7 @@
     editing = false;
     fetch("/admin/" + live.spel_id + "/order_live", {
       method: "POST",
-      headers: { "Content-Type": "application/json", Accept: "application/json" },
+      headers: liveHeaders({ "Content-Type": "application/json", Accept: "application/json" }),
       body: JSON.stringify(body),
     })
       .then(function (res) {
@@ -543,7 +641,7 @@
       })
       .then(function (payload) {
         if (payload && payload.success) {
-          paintLive(payload);
+          receiveLive(payload);
           return;
         }
         showError((payload && payload.error) || "Kunde inte uppdatera order.");
@@ -652,7 +750,9 @@
     if (cancel) {
       event.preventDefault();
       editing = false;
-      lastPaint = "";
+      // Put back the inbox row the inline editor replaced.
+      unpainted["h.inbox"] = true;
+      paintLive();
       poll();
       return;
     }
@@ -715,8 +815,12 @@
   bindSingleSubmitForms();
   document.addEventListener("click", closeOpenMenus);
   tickClock();
+  openStream();
   setInterval(poll, POLL_MS);
   document.addEventListener("visibilitychange", function () {
-    if (!document.hidden) poll();
+    if (!document.hidden) {
+      openStream();
+      poll();
+    }
   });
 })();
@@ -1,10 +1,13 @@
 /**
  * Player projector: round, phase, remaining time, public HP.
- * Polls a room-safe endpoint — no orders, log, or GM controls.
+ * Listens to a room-safe event stream (polls while it is down) — no orders,
+ * log, or GM controls.
  * Audio: one chime at 5 min, one at 1 min, repeating alarm at 30s.
  */
 (function () {
   var POLL_MS = 2000;
+  // While the event stream delivers (live or ping) the poller stands down.
+  var STREAM_FRESH_MS = 20000;
   var WARN_S = 300;
   var DANGER_S = 60;
   var CRITICAL_S = 30;
@@ -13,6 +16,9 @@
   var stressfulTimer = null;
   var alertsReady = false;
   var fired = { five: false, one: false };
+  var stream = null;
+  var streamSeenAt = 0;
+  var liveEtag = null;
 
   function readState() {
     var el = document.getElementById("projector-state");
@@ -322,11 +328,51 @@
     paintProgress(next.progress);
   }
 
+  function streamFresh() {
+    return !!stream && Date.now() - streamSeenAt < STREAM_FRESH_MS;
+  }
+
+  function openStream() {
+    if (!window.EventSource || !state || !state.spel_id || stream) return;
+    stream = new EventSource("/spelarskarm/" + encodeURIComponent(state.spel_id) + "/events");
+    stream.addEventListener("live", function (ev) {
+      streamSeenAt = Date.now();
+      var payload;
+      try {
+        payload = JSON.parse(ev.data);
+      } catch (e) {
+        return;
+      }
+      if (payload && payload.success) paint(payload.state);
+    });
+    stream.addEventListener("ping", function () {
+      streamSeenAt = Date.now();
+    });
+    stream.addEventListener("gone", closeStream);
+    stream.onerror = function () {
+      // The browser reconnects by itself (sending Last-Event-ID); poll meanwhile.
+      streamSeenAt = 0;
+      if (stream && stream.readyState === 2) closeStream();
+    };
+  }
+
+  function closeStream() {
+    if (stream) stream.close();
+    stream = null;
+    streamSeenAt = 0;
+  }
+
   function poll() {
     if (!state || !state.spel_id || document.hidden) return;
-    fetch("/spelarskarm/" + state.spel_id + "/live", { headers: { Accept: "application/json" } })
+    if (streamFresh()) return;
+    var headers = { Accept: "application/json" };
+    if (liveEtag) headers["If-None-Match"] = liveEtag;
+    fetch("/spelarskarm/" + state.spel_id + "/live", { headers: headers, cache: "no-store" })
       .then(function (res) {
+        // 304: nothing saved since the last poll.
+        if (res.status === 304) return null;
         if (!res.ok) throw new Error("live " + res.status);
+        liveEtag = res.headers.get("ETag");
         return res.json();
       })
       .then(function (payload) {
@@ -353,10 +399,15 @@
       setStressful(false);
     }
   }, 1000);
+  openStream();
   setInterval(poll, POLL_MS);
   document.addEventListener("visibilitychange", function () {
-    if (document.hidden) setStressful(false);
-    else poll();
+    if (document.hidden) {
+      setStressful(false);
+    } else {
+      openStream();
+      poll();
+    }
   });
   document.addEventListener("click", unlockAudio);
   document.addEventListener("keydown", unlockAudio);
@@ -0,0 +1,93 @@
+"""
+Content-hashed URLs for files in ``static/``.
+
+Pages used to cache-bust by hand (``app.css?v=29``) while every static
+response carried ``no-store``, so each projector, GM console and phone
+downloaded ``app.css``, the scripts and the 1.5 MB alarm sound again on
+every page load. Now every HTML response is rewritten on the way out:
+each ``/static/<file>`` reference (with or without a hand-written ``?v=``)
+becomes ``/static/<file>?h=<hash>``, the hash taken from the file's
+content. A request whose ``h`` matches the current file is served with
+``immutable`` caching for a year. Any other static request (an old hash,
+no hash, a file referenced from CSS) gets ``no-cache``, so the browser
+revalidates it with the ETag Flask already sends.
+
+Changing a file changes its hash, and the HTML pages themselves are not
+cached, so the next page load fetches the new file. No build step: hashes
+are computed on first use and recomputed when a file's signature
+(inode, mtime, size) changes.
+"""
+
+import hashlib
+import os
+import re
+import threading
+
+from werkzeug.security import safe_join
+
+from game_cache import file_signature
+
+HASH_PARAM = "h"
+HASH_LENGTH = 12
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# "/static/<path>" inside a quoted attribute, a JS string or a CSS url().
+_REFERENCE = re.compile(r"""(?<=["'(])/static/([A-Za-z0-9_./-]+?)(?:\?v=[0-9A-Za-z]*)?(?=["')])""")
+
+
+class AssetManifest:
+    """Content hashes of the files under ``folder``. Safe to share between threads."""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._hashes = {}
+        self.hashed = 0
+
+    def _path(self, filename):
+        path = safe_join(self.folder, filename)
+        return path if path and os.path.isfile(path) else None
+
+    def digest(self, filename):
+        """Content hash of ``filename`` (relative to the folder), or None."""
+        path = self._path(filename)
+        if path is None:
+            return None
+        signature = file_signature(path)
+        with self._lock:
+            known = self._hashes.get(filename)
+        if known is not None and known[0] == signature:
+            return known[1]
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                sha.update(chunk)
+        value = sha.hexdigest()[:HASH_LENGTH]
+        with self._lock:
+            self._hashes[filename] = (signature, value)
+            self.hashed += 1
+        return value
+
+    def url(self, filename):
+        """Fingerprinted URL for ``filename``; the plain URL if it does not exist."""
+        value = self.digest(filename)
+        if value is None:
+            return f"/static/{filename}"
+        return f"/static/{filename}?{HASH_PARAM}={value}"
+
+    def rewrite(self, html):
+        """``html`` with every local ``/static/`` reference fingerprinted."""
+        if "/static/" not in html:
+            return html
+        return _REFERENCE.sub(lambda match: self.url(match.group(1)), html)
+
+    def cache_control(self, filename, requested_hash):
+        """Cache-Control for serving ``filename`` as requested."""
+        if requested_hash and requested_hash == self.digest(filename):
+            return IMMUTABLE
+        return REVALIDATE
+
+    def stats(self):
+        with self._lock:
+            return {"files": len(self._hashes), "hashed": self.hashed}
@@ -4,8 +4,11 @@ Handles team-specific order entry with authorization and mobile-responsive desig
 """
 
 from flask import Blueprint, request, render_template_string, redirect, url_for, jsonify, make_response, g
-from models import validate_team_token, get_team_by_token, load_game_data, save_game_data, get_phase_timer, BACKLOG, game_lock_for
+from models import get_phase_timer, BACKLOG, game_lock_for, load_game_segments
+from game_context import request_game, request_team, save_request_game
 from admin_routes import create_team_overview, check_admin_session
+from game_locks import GameLockDeadlock, GameLockTimeout
+from live_etag import live_etag, not_modified, tagged
 from gm_console import can_submit_orders, can_withdraw_orders, validate_order_hp, withdraw_order
 import json
 import time
@@ -22,7 +25,11 @@ def lock_team_game_mutation():
     if not spel_id:
         return None
     lock = game_lock_for(spel_id)
-    lock.acquire()
+    try:
+        lock.acquire(label=f"{request.method} {request.path}")
+    except (GameLockTimeout, GameLockDeadlock):
+        # The order form retries on this message.
+        return jsonify({"success": False, "error": "File temporarily locked, please try again"}), 503
     g._team_game_mutation_lock = lock
     return None
 
@@ -124,12 +131,12 @@ def team_enter_order(spel_id, token):
     """Team order entry page with authorization"""
     
     # Validate token and get team
-    team_name = get_team_by_token(spel_id, token)
+    team_name = request_team(spel_id, token)
     if not team_name:
         return "❌ Invalid or expired access token", 403
     
     # Load game data
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     if not data:
         return "❌ Game not found or corrupted", 404
     
@@ -198,12 +205,12 @@ def team_save_order(spel_id, token):
     """Save team order (auto-save)"""
     
     # Validate token and get team
-    team_name = get_team_by_token(spel_id, token)
+    team_name = request_team(spel_id, token)
     if not team_name:
         return jsonify({"success": False, "error": "Invalid token"}), 403
     
     # Load game data
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     if not data:
         return jsonify({"success": False, "error": "Game not found or corrupted"}), 404
     
@@ -249,9 +256,9 @@ def team_save_order(spel_id, token):
         saved["submitted_at"] = existing.get("submitted_at") or time.time()
     data["team_orders"][orders_key][team_name] = saved
     
-    # Save to file
+    # Save to file; drafts are written behind, GM edits of final orders at once
     try:
-        save_game_data(spel_id, data)
+        save_request_game(spel_id, data, draft=not saved.get("final"))
         return jsonify({"success": True, "message": "Order saved successfully"})
     except PermissionError:
         return jsonify({"success": False, "error": "File temporarily locked, please try again"}), 503
@@ -263,12 +270,12 @@ def team_submit_order(spel_id, token):
     """Submit final team order"""
     
     # Validate token and get team
-    team_name = get_team_by_token(spel_id, token)
+    team_name = request_team(spel_id, token)
     if not team_name:
         return jsonify({"success": False, "error": "Invalid token"}), 403
     
     # Load game data
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     if not data:
         return jsonify({"success": False, "error": "Game not found or corrupted"}), 404
     
@@ -317,7 +324,7 @@ def team_submit_order(spel_id, token):
     
     # Save to file
     try:
-        save_game_data(spel_id, data)
+        save_request_game(spel_id, data)
         return jsonify({"success": True, "message": "Order submitted successfully"})
     except PermissionError:
         return jsonify({"success": False, "error": "File temporarily locked, please try again"}), 503
@@ -328,17 +335,17 @@ def team_submit_order(spel_id, token):
 @team_order_bp.route("/team/<spel_id>/<token>/withdraw_order", methods=["POST"])
 def team_withdraw_order(spel_id, token):
     """Let a team reopen a submitted order during Orderfas."""
-    team_name = get_team_by_token(spel_id, token)
+    team_name = request_team(spel_id, token)
     if not team_name:
         return jsonify({"success": False, "error": "Invalid token"}), 403
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     if not data:
         return jsonify({"success": False, "error": "Game not found or corrupted"}), 404
     if not can_withdraw_orders(data):
         return jsonify({"success": False, "error": "Orders can only be withdrawn during Orderfas"}), 403
     try:
         withdraw_order(data, team_name)
-        save_game_data(spel_id, data)
+        save_request_game(spel_id, data)
         return jsonify({"success": True, "message": "Order reopened"})
     except ValueError as exc:
         return jsonify({"success": False, "error": str(exc)}), 400
@@ -350,23 +357,36 @@ def team_timer(spel_id, token):
     """Get remaining time for current phase"""
     
     # Validate token
-    team_name = get_team_by_token(spel_id, token)
+    team_name = request_team(spel_id, token)
     if not team_name:
         return jsonify({"error": "Invalid token"}), 403
     
-    # Load game data
-    data = load_game_data(spel_id)
+    # A stopped clock only changes with a save, so its ETag is the revision
+    # alone and a matching poll is answered without loading the game.
+    stopped_etag = live_etag(spel_id, "s")
+    unchanged = not_modified(stopped_etag)
+    if unchanged is not None:
+        return unchanged
+
+    # Only the clock is needed; in segments mode orders and log stay unread
+    data = load_game_segments(spel_id)
     if not data:
         return jsonify({"error": "Game not found or corrupted"}), 404
     
     remaining_time = get_phase_timer(data)
+    etag = stopped_etag
+    if data.get("timer_status") == "running":
+        etag = live_etag(spel_id, "r", remaining_time)
+        unchanged = not_modified(etag)
+        if unchanged is not None:
+            return unchanged
     
-    return jsonify({
+    return tagged(jsonify({
         "remaining_time": remaining_time,
         "formatted_time": format_time(remaining_time),
         "phase": data["fas"],
         "round": data["runda"]
-    })
+    }), etag)
 
 # HTML Template for the team order entry page
 TEAM_ORDER_TEMPLATE = """
@@ -1323,10 +1343,17 @@ TEAM_ORDER_TEMPLATE = """
         }
         
         function startTimer() {
+            let timerEtag = null;
             timerInterval = setInterval(() => {
-                fetch('/team/{{ spel_id }}/{{ token }}/timer')
-                    .then(response => response.json())
+                const headers = timerEtag ? { 'If-None-Match': timerEtag } : {};
+                fetch('/team/{{ spel_id }}/{{ token }}/timer', { headers: headers, cache: 'no-store' })
+                    .then(response => {
+                        if (response.status === 304) return null;
+                        timerEtag = response.headers.get('ETag');
+                        return response.json();
+                    })
                     .then(data => {
+                        if (!data) return;
                         if (data.remaining_time <= 0) {
                             // Time's up - just play sound and show warning
                             playAlarmSound();
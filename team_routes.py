@@ -1,54 +1,31 @@
 from flask import Blueprint, send_from_directory, request, make_response
-from markupsafe import Markup
 import os
-import qrcode
-import io
-import base64
-from models import DATA_DIR, load_game_data, get_team_by_token
-from orderkort import generate_team_orderkort_html
+from models import DATA_DIR
+from game_context import request_game
+from orderkort import brief_paths, generate_team_orderkort_html, team_brief_text_html
+from qr_codes import qr_data_uri, team_order_url
 
 team_bp = Blueprint('team', __name__)
 
 def generate_qr_code(data):
-    """Generate QR code as base64 string"""
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(data)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
-    
-    # Convert to base64
-    buffer = io.BytesIO()
-    img.save(buffer, format='PNG')
-    buffer.seek(0)
-    img_base64 = base64.b64encode(buffer.getvalue()).decode()
-    
-    return f"data:image/png;base64,{img_base64}"
+    """QR code for ``data`` as an image data URI (SVG, cached per URL)"""
+    return qr_data_uri(data)
 
 @team_bp.route("/team/<spel_id>/<lag_namn>")
 def team_beskrivning(spel_id, lag_namn):
     # Sökväg till beskrivning och bild
-    desc_dir = os.path.join("teambeskrivning")
-    txt_path = os.path.join(desc_dir, f"{lag_namn.lower()}.txt")
-    img_path = os.path.join(desc_dir, f"{lag_namn.lower()}.jpg")
+    _txt_path, img_path = brief_paths(lag_namn)
     
     # Load game data to get team token
-    data = load_game_data(spel_id)
+    data = request_game(spel_id)
     team_token = None
-    team_order_url = None
     qr_code_html = ""
     
     if data and "team_tokens" in data:
         team_token = data["team_tokens"].get(lag_namn)
         if team_token:
-            team_order_url = f"/team/{spel_id}/{team_token}/enter_order"
             # Generate QR code for the team order URL
-            full_url = request.url_root.rstrip('/') + team_order_url
+            full_url = team_order_url(request.url_root, spel_id, team_token)
             qr_code_data = generate_qr_code(full_url)
             qr_code_html = f'''
             <div class="qr-panel">
@@ -66,20 +43,7 @@ def team_beskrivning(spel_id, lag_namn):
             '''
     
     # Läs beskrivningstext
-    if os.path.exists(txt_path):
-        with open(txt_path, encoding="utf-8") as f:
-            text = f.read()
-        # Enkel formattering: radbrytningar till <br>, rubriker (rad som slutar med ":") till <b>
-        lines = text.splitlines()
-        html_lines = []
-        for line in lines:
-            if line.strip().endswith(":"):
-                html_lines.append(f'<b>{line.strip()}</b>')
-            else:
-                html_lines.append(line)
-        text_html = "<br>".join(html_lines)
-    else:
-        text_html = "<i>Ingen beskrivning hittades för detta lag.</i>"
+    text_html = team_brief_text_html(lag_namn)
     # Bild om den finns, placeras längst ner och på egen sida vid utskrift
     img_html = ""
     if os.path.exists(img_path):
@@ -112,7 +76,7 @@ def team_beskrivning(spel_id, lag_namn):
         </div>
         <h1>{lag_namn}</h1>
         {qr_code_html}
-        <div>{Markup(text_html)}</div>
+        <div>{text_html}</div>
         {img_html}
         </div>
         </body>
@@ -73,7 +73,7 @@ class TestAppRunning(unittest.TestCase):
     def test_models_functions(self):
         """Test that key model functions work"""
         try:
-            from models import TEAMS, BACKLOG, FASER, MAX_RUNDA, skapa_nytt_spel
+            from models import DATA_DIR, TEAMS, BACKLOG, FASER, MAX_RUNDA, skapa_nytt_spel
             
             # Test constants
             self.assertIsInstance(TEAMS, list)
@@ -86,7 +86,7 @@ class TestAppRunning(unittest.TestCase):
             self.assertIsInstance(game_id, str)
             
             # Clean up test file
-            game_file = os.path.join('speldata', f"game_{game_id}.json")
+            game_file = os.path.join(DATA_DIR, f"game_{game_id}.json")
             if os.path.exists(game_file):
                 os.remove(game_file)
                 
@@ -109,8 +109,9 @@ class TestAppRunning(unittest.TestCase):
     
     def test_directories_exist(self):
         """Test that required directories exist"""
+        from models import DATA_DIR
         required_dirs = [
-            'speldata',
+            DATA_DIR,
             'static',
             'teambeskrivning'
         ]
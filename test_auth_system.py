@@ -7,7 +7,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from models import generate_team_token, generate_team_tokens, validate_team_token, get_team_by_token, skapa_nytt_spel, load_game_data
+from models import DATA_DIR, generate_team_token, generate_team_tokens, validate_team_token, get_team_by_token, skapa_nytt_spel, load_game_data
 
 def test_auth_system():
     """Test the authorization token system"""
@@ -103,7 +103,7 @@ def test_auth_system():
     
     # Clean up test file
     try:
-        os.remove(os.path.join("speldata", f"game_{created_spel_id}.json"))
+        os.remove(os.path.join(DATA_DIR, f"game_{created_spel_id}.json"))
         print(f"🧹 Cleaned up test file: game_{created_spel_id}.json")
     except:
         print("⚠️ Could not clean up test file")
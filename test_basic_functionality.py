@@ -9,7 +9,7 @@ from unittest.mock import patch
 import sys
 sys.path.append('.')
 
-from models import TEAMS, BACKLOG, FASER, MAX_RUNDA, skapa_nytt_spel, get_next_fas, clone_backlog_for_teams
+from models import DATA_DIR, TEAMS, BACKLOG, FASER, MAX_RUNDA, skapa_nytt_spel, get_next_fas, clone_backlog_for_teams
 
 class TestBasicFunctionality(unittest.TestCase):
     """Basic functionality tests that can be run quickly"""
@@ -62,7 +62,7 @@ class TestBasicFunctionality(unittest.TestCase):
         self.assertGreater(len(game_id), 0)
         
         # Check that game file was created
-        game_file = os.path.join('speldata', f"game_{game_id}.json")
+        game_file = os.path.join(DATA_DIR, f"game_{game_id}.json")
         self.assertTrue(os.path.exists(game_file))
         
         # Load and check game data
@@ -150,8 +150,8 @@ class TestBasicFunctionality(unittest.TestCase):
     
     def test_speldata_directory(self):
         """Test that speldata directory exists and is accessible"""
-        self.assertTrue(os.path.exists('speldata'), "speldata directory does not exist")
-        self.assertTrue(os.path.isdir('speldata'), "speldata is not a directory")
+        self.assertTrue(os.path.exists(DATA_DIR), "speldata directory does not exist")
+        self.assertTrue(os.path.isdir(DATA_DIR), "speldata is not a directory")
     
     def test_static_files(self):
         """Test that static files exist"""
@@ -215,7 +215,7 @@ class TestDataConsistency(unittest.TestCase):
         game_id = skapa_nytt_spel("2025-01-01", "Test", 20, 10, 15, "test123")
         
         # Load the created game data
-        game_file = os.path.join('speldata', f"game_{game_id}.json")
+        game_file = os.path.join(DATA_DIR, f"game_{game_id}.json")
         with open(game_file, 'r', encoding='utf-8') as f:
             game_data = json.load(f)
         
@@ -9,7 +9,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from models import skapa_nytt_spel, load_game_data
+from models import DATA_DIR, skapa_nytt_spel, load_game_data
 
 def test_complete_system():
     """Test the complete team order system"""
@@ -167,7 +167,7 @@ def test_complete_system():
     
     # Clean up
     try:
-        os.remove(os.path.join("speldata", f"game_{spel_id}.json"))
+        os.remove(os.path.join(DATA_DIR, f"game_{spel_id}.json"))
         print(f"🧹 Cleaned up test file: game_{spel_id}.json")
     except:
         print("⚠️ Could not clean up test file")
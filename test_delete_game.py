@@ -6,7 +6,7 @@ Test script to debug the delete game functionality
 import requests
 import time
 import os
-from models import skapa_nytt_spel, load_game_data
+from models import DATA_DIR, skapa_nytt_spel, load_game_data
 
 def test_delete_game():
     """Test the delete game functionality"""
@@ -25,7 +25,7 @@ def test_delete_game():
     print(f"   ✅ Test game created: {spel_id}")
     
     # Verify the game file exists
-    game_file = f"speldata/game_{spel_id}.json"
+    game_file = os.path.join(DATA_DIR, f"game_{spel_id}.json")
     if os.path.exists(game_file):
         print(f"   ✅ Game file exists: {game_file}")
     else:
@@ -7,7 +7,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from models import skapa_nytt_spel, load_game_data
+from models import DATA_DIR, skapa_nytt_spel, load_game_data
 import json
 
 def test_team_order_system():
@@ -95,7 +95,7 @@ def test_team_order_system():
         
         # Clean up
         try:
-            os.remove(os.path.join("speldata", f"game_{spel_id}.json"))
+            os.remove(os.path.join(DATA_DIR, f"game_{spel_id}.json"))
             print(f"🧹 Cleaned up test file: game_{spel_id}.json")
         except:
             print("⚠️ Could not clean up test file")
@@ -1 +1,16 @@
 # Tests package for Stabsspel
+import atexit
+import os
+import shutil
+import tempfile
+
+# Games, the game index and lock files go to a scratch folder, not the
+# repository's speldata/ (models.DATA_DIR).
+if "STABSSPEL_DATA_DIR" not in os.environ:
+    _data_dir = tempfile.mkdtemp(prefix="stabsspel-tests-")
+    atexit.register(shutil.rmtree, _data_dir, ignore_errors=True)
+    os.environ["STABSSPEL_DATA_DIR"] = _data_dir
+
+# Every read of the incrementally kept backlog totals is checked against a
+# full recompute while the suite runs (gm_console.BACKLOG_TOTALS_VERIFY).
+os.environ.setdefault("STABSSPEL_VERIFY_BACKLOG", "1")
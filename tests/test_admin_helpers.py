@@ -9,6 +9,9 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from admin_helpers import add_no_cache_headers, create_team_info_js, create_compact_header, create_action_buttons, create_script_references, create_timer_controls, create_delete_game_modal, create_delete_game_button
+from static_assets import AssetManifest
+
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
 
 class TestAdminHelpers(unittest.TestCase):
     """Test cases for admin_helpers functionality"""
@@ -99,14 +102,16 @@ class TestAdminHelpers(unittest.TestCase):
         
         # Check that it contains expected script reference
         self.assertIn('<script src="/static/admin.js"></script>', script_refs)
-        self.assertIn('<script src="/static/gm-console.js?v=15"></script>', script_refs)
+        self.assertIn('<script src="/static/gm-console.js"></script>', script_refs)
+        rewritten = AssetManifest(STATIC_FOLDER).rewrite(script_refs)
+        self.assertRegex(rewritten, r'<script src="/static/gm-console\.js\?h=[0-9a-f]+"></script>')
 
     def test_create_delete_game_modal(self):
         html = create_delete_game_modal()
         self.assertIn('id="deleteGameModal"', html)
         self.assertIn('class="modal"', html)
         self.assertIn('name="password"', html)
-        self.assertIn('/static/admin.js?v=5', html)
+        self.assertIn('src="/static/admin.js"', html)
         self.assertIn('name="next"', html)
         self.assertIn('value="/"', html)
 
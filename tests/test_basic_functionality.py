@@ -6,12 +6,17 @@ import json
 import tempfile
 import os
 import shutil
+import gzip
+import re
 import sys
 
 # Add parent directory to path to import modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app import app
+from app import app, assets
+from static_assets import AssetManifest
+import image_variants
+from compression import CompressionMiddleware, negotiate
 
 class TestBasicFunctionality(unittest.TestCase):
     """Test basic functionality of the application"""
@@ -52,5 +57,112 @@ class TestBasicFunctionality(unittest.TestCase):
         self.assertEqual(data['service'], 'Stabsspel')
         self.assertIn('timestamp', data)
 
+    def test_pages_reference_fingerprinted_assets_cached_for_good(self):
+        """Static URLs in pages carry a content hash and are served immutable"""
+        html = self.app.get('/').get_data(as_text=True)
+        digest = assets.digest('app.css')
+        self.assertIn(f'/static/app.css?h={digest}', html)
+        self.assertNotIn('app.css?v=', html)
+
+        fresh = self.app.get(f'/static/app.css?h={digest}')
+        self.assertEqual(fresh.status_code, 200)
+        self.assertIn('immutable', fresh.headers['Cache-Control'])
+        fresh.close()
+        stale = self.app.get('/static/app.css?h=000000000000')
+        self.assertEqual(stale.headers['Cache-Control'], 'no-cache')
+        stale.close()
+
+    def test_asset_hash_follows_file_content(self):
+        """Editing a static file changes its fingerprinted URL"""
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        path = os.path.join(folder, 'site.css')
+        with open(path, 'w') as f:
+            f.write('body { color: red; }')
+        manifest = AssetManifest(folder)
+        page = '<link href="/static/site.css?v=3"><img src="/static/missing.png">'
+        first = manifest.rewrite(page)
+        self.assertIn(f'/static/site.css?h={manifest.digest("site.css")}', first)
+        self.assertIn('/static/missing.png"', first)
+        self.assertIsNone(manifest.digest('../etc/passwd'))
+
+        with open(path, 'w') as f:
+            f.write('body { color: blue; margin: 0; }')
+        self.assertNotEqual(manifest.rewrite(page), first)
+
+    def test_background_variants_are_scaled_webp_and_progressive_jpeg(self):
+        """The offline image step writes every width in both formats, once"""
+        from PIL import Image
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        Image.new('RGBA', (1500, 900), (200, 30, 30, 128)).save(os.path.join(folder, 'bg-test.png'))
+
+        written = image_variants.build_folder(folder)
+        self.assertEqual(len(written), 6)
+        with Image.open(image_variants.variant_path(folder, 'bg-test', 640, 'jpg')) as small:
+            self.assertEqual(small.size, (640, 384))
+            self.assertTrue(small.info.get('progressive'))
+        with Image.open(image_variants.variant_path(folder, 'bg-test', 1500, 'webp')) as full:
+            self.assertEqual((full.format, full.size), ('WEBP', (1500, 900)))
+        self.assertEqual(image_variants.build_folder(folder), [])
+
+    def test_stylesheet_only_uses_existing_background_variants(self):
+        """Every image app.css points at is committed in static/"""
+        static = app.static_folder
+        with open(os.path.join(static, 'app.css'), encoding='utf-8') as f:
+            css = f.read()
+        referenced = set(re.findall(r'url\("/static/(backgrounds/[^"]+)"\)', css))
+        self.assertTrue(referenced)
+        for path in referenced:
+            self.assertIn('/variants/', path)
+            self.assertTrue(os.path.isfile(os.path.join(static, path)), path)
+
+    def test_pages_and_static_text_are_gzipped_for_clients_that_accept_it(self):
+        """HTML and CSS go out compressed; the alarm sound does not"""
+        page = self.app.get('/', headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(page.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', page.headers['Vary'])
+        self.assertIn(b'Stabsspelet', gzip.decompress(page.data))
+        self.assertNotIn('Content-Encoding', self.app.get('/').headers)
+
+        css = self.app.get('/static/app.css', headers={'Accept-Encoding': 'gzip'})
+        with open(os.path.join(app.static_folder, 'app.css'), 'rb') as f:
+            self.assertEqual(gzip.decompress(css.data), f.read())
+        self.assertEqual(int(css.headers['Content-Length']), len(css.data))
+        self.assertTrue(css.headers['ETag'].startswith('W/'))
+        css.close()
+        again = self.app.get('/static/app.css', headers={'Accept-Encoding': 'gzip', 'If-None-Match': css.headers['ETag']})
+        self.assertEqual(again.status_code, 304)
+
+        sound = self.app.get('/static/alarm.mp3', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', sound.headers)
+        sound.close()
+
+    def test_compression_streams_chunks_and_skips_event_streams_and_small_bodies(self):
+        """Streamed text is compressed per chunk; SSE and tiny bodies pass through"""
+        def wsgi(environ, start_response):
+            kind = environ['PATH_INFO']
+            if kind == '/stream':
+                start_response('200 OK', [('Content-Type', 'text/html; charset=utf-8')])
+                return (f'<tr><td>rad {i}</td></tr>'.encode() for i in range(200))
+            if kind == '/events':
+                start_response('200 OK', [('Content-Type', 'text/event-stream')])
+                return [b'data: {}\n\n' * 200]
+            start_response('200 OK', [('Content-Type', 'application/json'), ('Content-Length', '2')])
+            return [b'{}']
+
+        from werkzeug.test import Client
+        client = Client(CompressionMiddleware(wsgi, minimum_size=100))
+        streamed = client.get('/stream', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(streamed.headers['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', streamed.headers)
+        self.assertEqual(gzip.decompress(streamed.data).count(b'<tr>'), 200)
+        self.assertNotIn('Content-Encoding', client.get('/events', headers={'Accept-Encoding': 'gzip'}).headers)
+        self.assertNotIn('Content-Encoding', client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers)
+
+        self.assertEqual(negotiate('gzip;q=0.5, br', ('br', 'gzip')), 'br')
+        self.assertEqual(negotiate('br;q=0, *', ('br', 'gzip')), 'gzip')
+        self.assertIsNone(negotiate('identity', ('br', 'gzip')))
+
 if __name__ == '__main__':
     unittest.main()
@@ -5,6 +5,7 @@ These protect game-state rules that would silently corrupt a live event:
 phases, HP, order budgets, undo, timers, and roster size.
 They do not render the GUI.
 """
+import threading
 import time
 import json
 import tempfile
@@ -28,14 +29,18 @@ from gm_console import (
     apply_new_round,
     apply_next_phase,
     apply_previous_phase,
+    activity_index,
     apply_undo,
+    backlog_totals,
     build_backlog_board,
+    build_public_progress,
     build_inbox,
     build_live_state,
     build_llm_export_text,
     build_public_state,
     build_team_strip,
     can_submit_orders,
+    compute_backlog_totals,
     current_order_refs,
     effective_hp,
     end_game,
@@ -53,27 +58,57 @@ from gm_console import (
     parse_positive_amount,
     pending_hp_totals,
     push_undo,
+    reset_backlog_totals,
     set_regeringsstod,
     spent_hp_for_team,
     team_order_status,
     transfer_hp,
     update_activity,
     validate_order_hp,
+    verify_backlog_totals,
     withdraw_order,
 )
+from draft_buffer import DraftBuffer
+import durability
+import game_backups
+from game_cache import GameCache, file_signature
+import game_delta
+import game_journal
+import game_locks
+import live_view
+import models
+import projector_hub
+import segment_store
+import sqlite_store
 from models import (
     AKTIVITETSKORT,
     MAX_RUNDA,
+    compact_game,
+    delete_game_data,
+    flush_drafts,
+    game_lock_for,
+    list_game_summaries,
+    list_restore_points,
+    load_restore_point,
+    list_saved_games,
+    rebuild_game_index,
     SESSION_TIMEOUT_SECONDS,
     create_game_session,
     encrypt_password,
     get_next_fas,
     get_phase_timer,
+    game_etag,
+    game_revision,
     get_team_base_hp,
+    get_team_by_token,
     is_declaration_period,
     is_game_session_valid,
     is_large_game,
+    load_game_data,
+    load_game_segments,
     refresh_game_session,
+    reissue_team_tokens,
+    save_game_data,
     skapa_nytt_spel,
     suggest_teams,
     verify_password,
@@ -429,6 +464,45 @@ class TestUndo(unittest.TestCase):
             push_undo(data, f"step {i}")
         self.assertEqual(len(data["gm_undo"]), UNDO_LIMIT)
 
+    def test_only_newest_undo_entry_holds_a_full_state(self):
+        data = create_game_state()
+        for i in range(UNDO_LIMIT + 3):
+            push_undo(data, f"step {i}")
+            data["poang"]["Alfa"]["aktuell"] -= 1
+        stack = data["gm_undo"]
+
+        self.assertIn("state", stack[-1])
+        self.assertTrue(all("state" not in entry and "patch" in entry for entry in stack[:-1]))
+        full_size = len(json.dumps(stack[-1]))
+        self.assertTrue(all(len(json.dumps(entry)) * 4 < full_size for entry in stack[:-1]))
+
+    def test_repeated_undo_walks_back_through_patched_entries(self):
+        data = create_game_state()
+        for hp in (20, 15, 10):
+            push_undo(data, f"HP {hp}")
+            data["poang"]["Alfa"]["aktuell"] = hp
+            data["gm_log"].append({"message": str(hp)})
+        data = json.loads(json.dumps(data))
+
+        seen = []
+        while True:
+            data, label = apply_undo(data)
+            if label is None:
+                break
+            seen.append((label, data["poang"]["Alfa"]["aktuell"], len(data["gm_log"])))
+        self.assertEqual(seen, [("HP 10", 15, 2), ("HP 15", 20, 1), ("HP 20", 25, 0)])
+
+    def test_legacy_stack_with_full_states_still_undoes_and_mixes(self):
+        legacy_state = {k: v for k, v in create_game_state(runda=2).items() if k != "gm_undo"}
+        data = create_game_state(runda=3, gm_undo=[{"action": "Gammal", "at": 1, "state": legacy_state}])
+        push_undo(data, "Ny")
+        data["runda"] = 4
+
+        data, label = apply_undo(data)
+        self.assertEqual((label, data["runda"]), ("Ny", 3))
+        data, label = apply_undo(data)
+        self.assertEqual((label, data["runda"]), ("Gammal", 2))
+
 
 class TestRosterAndCalendar(unittest.TestCase):
     def test_spy_belongs_to_bs_and_fm_only_knows_about_it(self):
@@ -629,6 +703,57 @@ class TestBacklogSpend(unittest.TestCase):
         self.assertEqual(alfa["items"][0]["spent"], 5)
         self.assertGreater(alfa["estimated"], 0)
 
+    def test_backlog_totals_follow_spend_without_recompute(self):
+        data = create_game_state()
+        backlog_totals(data)
+        add_backlog_spend(data, "Alfa", "alfa_1", 100)
+        add_backlog_spend(data, "Bravo", "bravo_1_Krav", 4)
+        add_backlog_spend(data, "STT", "stt_4", 3)
+        totals = data["backlog_totals"]
+        self.assertEqual(totals, compute_backlog_totals(data))
+        self.assertEqual(totals["teams"]["Alfa"]["tasks"]["alfa_1"]["spent"], 15)
+        self.assertEqual(totals["teams"]["Bravo"]["spent"], 4)
+        stt = totals["teams"]["STT"]
+        self.assertEqual((stt["spent"], stt["public_spent"]), (3, 0))
+        self.assertEqual(totals["all"]["spent"], 22)
+
+    def test_reading_stored_totals_does_not_touch_the_backlog_template(self):
+        data = create_game_state()
+        totals = backlog_totals(data)
+        with patch("gm_console.clone_backlog_for_teams") as clone, \
+                patch("gm_console.compute_backlog_totals") as compute, \
+                patch("gm_console.BACKLOG_TOTALS_VERIFY", False):
+            self.assertIs(backlog_totals(data), totals)
+        clone.assert_not_called()
+        compute.assert_not_called()
+
+    def test_new_round_moves_spent_into_previous(self):
+        data = create_game_state()
+        add_backlog_spend(data, "Alfa", "alfa_1", 5)
+        backlog_totals(data)
+        apply_new_round(data)
+        alfa = data["backlog_totals"]["teams"]["Alfa"]
+        self.assertEqual((alfa["spent"], alfa["previous"]), (5, 5))
+        verify_backlog_totals(data)
+        board = next(team for team in build_backlog_board(data) if team["team"] == "Alfa")
+        self.assertEqual(board["items"][0]["previous"], 5)
+
+    def test_progress_reads_public_totals(self):
+        data = create_game_state()
+        add_backlog_spend(data, "STT", "stt_4", 3)
+        stt = next(team for team in build_public_progress(data) if team["team"] == "STT")
+        self.assertEqual(stt["spent"], 0)
+        self.assertEqual(stt["estimated"], data["backlog_totals"]["teams"]["STT"]["public_estimated"])
+
+    def test_verification_catches_direct_backlog_edits(self):
+        data = create_game_state()
+        backlog_totals(data)
+        data["backlog"]["Alfa"][0]["spenderade_hp"] = 9
+        with self.assertRaises(RuntimeError):
+            verify_backlog_totals(data)
+        reset_backlog_totals(data)
+        self.assertEqual(backlog_totals(data)["teams"]["Alfa"]["spent"], 9)
+
 
 class TestOrderWithdrawAndEdit(unittest.TestCase):
     def test_team_can_withdraw_during_order_phase(self):
@@ -679,6 +804,32 @@ class TestOrderWithdrawAndEdit(unittest.TestCase):
             8,
         )
 
+    def test_gm_edit_updates_conflicts(self):
+        data = create_game_state()
+        data["team_orders"] = {
+            "orders_round_1": {
+                "Alfa": order_record([activity(name="API", hp=8)], final=True),
+                "Bravo": order_record([activity(name="Radar", hp=8)], final=True),
+            }
+        }
+        self.assertFalse(any(row["conflict"] for row in build_inbox(data)))
+        update_activity(data, "Bravo", 0, {"aktivitet": "API"})
+        self.assertEqual(activity_index(data)["conflicts"]["name:api"], {"Alfa": 1, "Bravo": 1})
+        self.assertTrue(all(row["conflict"] for row in build_inbox(data)))
+        self.assertNotIn("activity_index", data)
+
+    def test_activity_index_follows_in_place_edits(self):
+        data = create_game_state()
+        data["team_orders"] = {
+            "orders_round_1": {
+                "Alfa": order_record([activity(name="API", hp=8, backlog_selected="alfa_1")], final=True),
+            }
+        }
+        self.assertEqual(activity_index(data)["selected"], {"alfa_1": [["Alfa", 0]]})
+        edited = data["team_orders"]["orders_round_1"]["Alfa"]["orders"]["activities"][0]
+        edited.update(aktivitet="Radar", backlog_selected="alfa_2")
+        self.assertEqual(activity_index(data)["selected"], {"alfa_2": [["Alfa", 0]]})
+
 
 class TestPublicProjector(unittest.TestCase):
     def test_public_state_has_hp_but_not_orders_or_log(self):
@@ -1646,5 +1797,911 @@ class TestGameCreation(unittest.TestCase):
             self.assertTrue(os.path.exists(os.path.join(data_dir, f"game_{second}.json")))
 
 
+class TestTeamTokens(unittest.TestCase):
+    def test_new_games_get_random_tokens_by_default(self):
+        with tempfile.TemporaryDirectory() as data_dir, patch("models.DATA_DIR", data_dir):
+            spel_id = skapa_nytt_spel("2025-01-02", "A", 20, 10, 10)
+            tokens = load_game_data(spel_id)["team_tokens"]
+            self.assertFalse(any(token.startswith("s1.") for token in tokens.values()))
+            self.assertEqual(get_team_by_token(spel_id, tokens["Alfa"]), "Alfa")
+
+    def test_opt_in_signed_tokens_are_checked_without_storage(self):
+        with tempfile.TemporaryDirectory() as data_dir, patch("models.DATA_DIR", data_dir), \
+                patch("models.TEAM_TOKEN_SCHEME", "signed"):
+            spel_id = skapa_nytt_spel("2025-01-02", "A", 20, 10, 10)
+            tokens = load_game_data(spel_id)["team_tokens"]
+            self.assertTrue(all(token.startswith("s1.") for token in tokens.values()))
+            self.assertEqual(get_team_by_token(spel_id, tokens["Alfa"]), "Alfa")
+            with patch("models._token_validator", side_effect=AssertionError("storage read")):
+                self.assertEqual(get_team_by_token(spel_id, tokens["Bravo"]), "Bravo")
+            self.assertIsNone(get_team_by_token(spel_id, tokens["Alfa"][:-2] + "xx"))
+            self.assertIsNone(get_team_by_token("other-game", tokens["Alfa"]))
+
+    def test_reissue_revokes_signed_and_legacy_tokens(self):
+        with tempfile.TemporaryDirectory() as data_dir, patch("models.DATA_DIR", data_dir):
+            data = create_game_state(team_tokens={"Alfa": "legacy-random-token"})
+            save_game_data("tok", data)
+            self.assertEqual(get_team_by_token("tok", "legacy-random-token"), "Alfa")
+
+            reissue_team_tokens("tok", data)
+            first = data["team_tokens"]["Alfa"]
+            save_game_data("tok", data)
+            self.assertIsNone(get_team_by_token("tok", "legacy-random-token"))
+            self.assertEqual(get_team_by_token("tok", first), "Alfa")
+
+            push_undo(data, "Före nya länkar")
+            reissue_team_tokens("tok", data)
+            data, _label = apply_undo(data)
+            save_game_data("tok", data)
+            self.assertIsNone(get_team_by_token("tok", first))
+            self.assertEqual(get_team_by_token("tok", data["team_tokens"]["Alfa"]), "Alfa")
+
+
+class TestGameStorageCache(unittest.TestCase):
+    def test_loaded_games_are_independent_copies(self):
+        with tempfile.TemporaryDirectory() as data_dir, patch("models.DATA_DIR", data_dir):
+            save_game_data("cache", create_game_state())
+            first = load_game_data("cache")
+            first["team_orders"]["2"] = {"mutated": True}
+            first["lag"].append("Extra")
+
+            second = load_game_data("cache")
+            self.assertNotIn("2", second["team_orders"])
+            self.assertNotIn("Extra", second["lag"])
+
+    def test_save_bumps_revision_and_is_visible_to_next_load(self):
+        with tempfile.TemporaryDirectory() as data_dir, patch("models.DATA_DIR", data_dir):
+            data = create_game_state()
+            save_game_data("cache", data)
+            before = game_revision("cache")
+            data["runda"] = 3
+            save_game_data("cache", data)
+
+            self.assertGreater(game_revision("cache"), before)
+            self.assertEqual(load_game_data("cache")["runda"], 3)
+
+    def test_stored_revision_only_increases_and_is_read_from_the_cache(self):
+        with tempfile.TemporaryDirectory() as data_dir, patch("models.DATA_DIR", data_dir):
+            old = create_game_state()
+            save_game_data("cache", old)
+            newer = load_game_data("cache")
+            save_game_data("cache", newer)
+            self.assertEqual(game_etag("cache"), "2")
+            # An undo/reset writes back a dict that still carries revision 1.
+            save_game_data("cache", create_game_state(revision=1))
+            with patch("models.load_game_data") as load:
+                self.assertEqual(game_etag("cache"), "3")
+            load.assert_not_called()
+            self.assertIsNone(game_etag("missing"))
+
+    def test_save_after_a_cache_miss_does_not_read_the_game(self):
+        with tempfile.TemporaryDirectory() as data_dir, patch("models.DATA_DIR", data_dir):
+            save_game_data("cache", create_game_state())
+            save_game_data("cache", load_game_data("cache"))
+            models._game_cache.clear()
+            with patch("models._load_game_file", side_effect=AssertionError("full load")):
+                save_game_data("cache", create_game_state(revision=1))
+            self.assertEqual(game_etag("cache"), "3")
+
+    def test_token_check_after_a_cache_miss_uses_the_callers_load(self):
+        with tempfile.TemporaryDirectory() as data_dir, patch("models.DATA_DIR", data_dir):
+            save_game_data("tok", create_game_state(team_tokens={"Alfa": "token-a"}))
+            request_copy = load_game_data("tok")
+            models._game_cache.clear()
+            models._forget_team_tokens("tok")
+
+            with patch("models.load_game_data", side_effect=AssertionError("own read")), \
+                    patch("models._load_game_file", side_effect=AssertionError("own read")):
+                self.assertEqual(get_team_by_token("tok", "token-a", load=lambda _id: request_copy), "Alfa")
+
+    def test_file_replaced_behind_the_cache_is_reloaded(self):
+        with tempfile.TemporaryDirectory() as data_dir, patch("models.DATA_DIR", data_dir):
+            save_game_data("cache", create_game_state())
+            load_game_data("cache")
+            edited = create_game_state(runda=4)
+            path = os.path.join(data_dir, "game_cache.json")
+            tmp = path + ".edit"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(edited, f)
+            os.replace(tmp, path)
+
+            self.assertEqual(load_game_data("cache")["runda"], 4)
+
+    def test_deleted_game_is_not_served_from_cache(self):
+        with tempfile.TemporaryDirectory() as data_dir, patch("models.DATA_DIR", data_dir):
+            save_game_data("cache", create_game_state())
+            os.remove(os.path.join(data_dir, "game_cache.json"))
+
+            self.assertIsNone(load_game_data("cache"))
+            self.assertIsNone(game_revision("cache"))
+
+    def test_lru_evicts_oldest_game(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            cache = GameCache(max_games=2)
+            paths = []
+            for name in ("a", "b", "c"):
+                path = os.path.join(data_dir, name)
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(name)
+                cache.put(path, {"name": name}, file_signature(path))
+                paths.append(path)
+
+            self.assertIsNone(cache.get(paths[0]))
+            self.assertEqual(cache.get(paths[2]), {"name": "c"})
+            self.assertEqual(cache.stats()["evictions"], 1)
+
+
+class TestDraftWriteBehind(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.drafts = DraftBuffer(models._flush_draft, 60, 60)
+        for target, value in (("models.DATA_DIR", self.tmp.name), ("models._drafts", self.drafts)):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.path = os.path.join(self.tmp.name, "game_draft.json")
+        save_game_data("draft", create_game_state())
+
+    def _stored(self):
+        with open(self.path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _draft(self, runda):
+        data = load_game_data("draft")
+        data["runda"] = runda
+        save_game_data("draft", data, draft=True)
+
+    def test_draft_bursts_are_served_from_memory_and_written_once(self):
+        self._draft(2)
+        self._draft(3)
+
+        self.assertEqual(load_game_data("draft")["runda"], 3)
+        self.assertEqual(game_etag("draft"), "3")
+        self.assertEqual(self._stored()["runda"], 1)
+
+        self.assertEqual(flush_drafts(), 1)
+        self.assertEqual(self._stored()["runda"], 3)
+        self.assertEqual(self._stored()["revision"], 3)
+        stats = self.drafts.stats()
+        self.assertEqual((stats["drafts"], stats["coalesced"], stats["flushes"], stats["pending"]), (2, 1, 1, 0))
+
+    def test_pending_draft_changes_the_revision_watchers_see(self):
+        before = game_revision("draft")
+        self._draft(2)
+        during = game_revision("draft")
+        self.assertNotEqual(during, before)
+        self._draft(3)
+        self.assertNotEqual(game_revision("draft"), during)
+
+    def test_write_behind_needs_the_single_worker_assertion(self):
+        if "STABSSPEL_DRAFT_FLUSH_SECONDS" not in os.environ:
+            self.assertEqual(models.DRAFT_FLUSH_SECONDS, 0)
+        with patch("models.DRAFT_FLUSH_SECONDS", 5):
+            with patch("models.SINGLE_WORKER", False):
+                self.assertEqual(models._draft_flush_seconds(), 0)
+            with patch("models.SINGLE_WORKER", True):
+                self.assertEqual(models._draft_flush_seconds(), 5)
+
+    def test_normal_save_writes_the_pending_draft_at_once(self):
+        self._draft(2)
+        data = load_game_data("draft")
+        data["fas"] = "Diplomatifas"
+        save_game_data("draft", data)
+
+        self.assertEqual(self.drafts.stats()["pending"], 0)
+        self.assertEqual((self._stored()["runda"], self._stored()["fas"]), (2, "Diplomatifas"))
+        self.assertEqual(flush_drafts(), 0)
+
+    def test_draft_is_dropped_when_the_stored_game_changes_underneath(self):
+        self._draft(2)
+        tmp = self.path + ".edit"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(create_game_state(runda=4), f)
+        os.replace(tmp, self.path)
+
+        self.assertEqual(load_game_data("draft")["runda"], 4)
+        self.assertEqual(flush_drafts(), 0)
+        self.assertEqual(self.drafts.stats()["lost"], 1)
+
+    def test_flusher_writes_an_idle_draft(self):
+        self.drafts.idle = 0.05
+        self._draft(2)
+        deadline = time.monotonic() + 5
+        while self.drafts.stats()["pending"] and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(self._stored()["runda"], 2)
+
+
+class TestDurability(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.group = durability.GroupCommit(60)
+        for target, value in (("models.DATA_DIR", self.tmp.name), ("durability._group", self.group)):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _fsyncs(self, level):
+        return durability.durability_metrics()["levels"][level]["fsyncs"]
+
+    def test_call_site_then_game_then_test_mode_pick_the_level(self):
+        self.assertEqual(durability.resolve({}), durability.DEFAULT_DURABILITY)
+        self.assertEqual(durability.resolve({"test_mode": True}), "relaxed")
+        self.assertEqual(durability.resolve({"test_mode": True, "durability": "batched"}), "batched")
+        self.assertEqual(durability.resolve({"durability": "relaxed"}, "strict"), "strict")
+        self.assertEqual(durability.at_most("strict", "batched"), "batched")
+        self.assertEqual(durability.at_most("relaxed", "batched"), "relaxed")
+        with self.assertRaises(ValueError):
+            durability.resolve({"durability": "sometimes"})
+
+    def test_strict_save_keeps_a_restore_point_and_fsyncs(self):
+        save_game_data("dur", create_game_state())
+        before = self._fsyncs("strict")
+        save_game_data("dur", create_game_state(runda=2), durability="strict")
+        self.assertEqual(self._fsyncs("strict"), before + 1)
+        self.assertEqual(len(list_restore_points("dur")), 2)
+
+    def test_relaxed_test_mode_save_skips_restore_point_and_fsync(self):
+        before = self._fsyncs("relaxed")
+        save_game_data("dur", create_game_state(test_mode=True))
+        save_game_data("dur", create_game_state(test_mode=True, runda=2))
+        self.assertEqual(self._fsyncs("relaxed"), before)
+        self.assertEqual(list_restore_points("dur"), [])
+        self.assertEqual(load_game_data("dur")["runda"], 2)
+        self.assertGreaterEqual(durability.durability_metrics()["levels"]["relaxed"]["saves"], 2)
+
+    def test_batched_saves_share_one_group_commit(self):
+        for runda in (1, 2, 3):
+            save_game_data("dur", create_game_state(runda=runda), durability="batched")
+        save_game_data("other", create_game_state(), durability="batched")
+        stats = self.group.stats()
+        self.assertEqual((stats["pending"], stats["coalesced"]), (2, 2))
+
+        before = self._fsyncs("batched")
+        self.assertEqual(self.group.commit(), 2)
+        self.assertEqual(self._fsyncs("batched"), before + 2)
+        self.assertEqual(self.group.stats()["batches"], 1)
+        self.assertEqual(load_game_data("dur")["runda"], 3)
+
+
+class TestRestorePoints(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = patch("models.DATA_DIR", self.tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.path = os.path.join(self.tmp.name, "game_rp.json")
+
+    def test_each_save_links_the_snapshot_instead_of_copying(self):
+        save_game_data("rp", create_game_state())
+        save_game_data("rp", create_game_state(runda=2))
+        points = list_restore_points("rp")
+
+        self.assertEqual([point.runda for point in points], [2, 1])
+        self.assertEqual(os.stat(points[0].path).st_ino, os.stat(self.path).st_ino)
+        self.assertFalse(os.path.exists(self.path + ".backup"))
+        self.assertEqual(load_restore_point("rp", points[1].name)["runda"], 1)
+        with self.assertRaises(ValueError):
+            load_restore_point("rp", "../game_rp.json")
+
+    def test_thinning_keeps_the_last_minute_and_one_per_phase(self):
+        source = os.path.join(self.tmp.name, "source.json")
+        with open(source, "w", encoding="utf-8") as f:
+            f.write("{}")
+        saves = [
+            (1000, 1, "Orderfas"), (1010, 1, "Orderfas"), (1020, 1, "Diplomatifas"),
+            (2000, 2, "Orderfas"), (2030, 2, "Orderfas"), (2050, 2, "Orderfas"), (2100, 2, "Orderfas"),
+        ]
+        for revision, (at, runda, fas) in enumerate(saves, start=1):
+            data = create_game_state(runda=runda, fas=fas, revision=revision)
+            game_backups.keep(self.path, source, data, now=at)
+
+        kept = [(int(point.saved_at), point.runda, point.fas) for point in game_backups.restore_points(self.path)]
+        self.assertEqual(kept, [(2100, 2, "Orderfas"), (2050, 2, "Orderfas"), (1020, 1, "Diplomatifas"), (1010, 1, "Orderfas")])
+
+    def test_corrupt_snapshot_falls_back_through_generations(self):
+        save_game_data("rp", create_game_state())
+        save_game_data("rp", create_game_state(runda=2))
+        newest = list_restore_points("rp")[0]
+        # A torn write shows up in the snapshot and in its own (linked) generation.
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write('{"runda": ')
+        self.assertEqual(os.stat(newest.path).st_ino, os.stat(self.path).st_ino)
+
+        self.assertEqual(load_game_data("rp")["runda"], 1)
+
+    def test_delete_removes_restore_points(self):
+        save_game_data("rp", create_game_state())
+        delete_game_data("rp")
+        self.assertEqual(list_restore_points("rp"), [])
+
+
+class TestGameDelta(unittest.TestCase):
+    def _round_trip(self, old, new):
+        ops = game_delta.diff(old, new)
+        patched = game_delta.apply(json.loads(json.dumps(old)), json.loads(json.dumps(ops)))
+        self.assertEqual(patched, json.loads(json.dumps(new)))
+        return ops
+
+    def test_nested_change_is_a_single_small_op(self):
+        old = create_game_state()
+        new = create_game_state()
+        new["poang"]["Alfa"]["aktuell"] = 17
+        ops = self._round_trip(old, new)
+        self.assertEqual(ops, [["set", ["poang", "Alfa", "aktuell"], 17]])
+
+    def test_capped_list_trims_and_extends(self):
+        old = {"gm_log": [{"n": i} for i in range(5)]}
+        new = {"gm_log": [{"n": i} for i in range(1, 7)]}
+        ops = self._round_trip(old, new)
+        self.assertEqual([op[0] for op in ops], ["trim", "ext"])
+
+    def test_popped_list_truncates(self):
+        ops = self._round_trip({"gm_undo": [1, 2, 3]}, {"gm_undo": [1, 2]})
+        self.assertEqual(ops, [["trunc", ["gm_undo"], 2]])
+
+    def test_removed_keys_type_changes_and_int_keys(self):
+        old = {"a": 1, "b": {"x": 1}, "flag": 1}
+        new = {"b": [1], "flag": True, 2: "two"}
+        self._round_trip(old, new)
+
+    def test_mismatched_delta_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            game_delta.apply({}, [["ext", ["missing"], [1]]])
+
+
+class TestJournalStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        for target, value in (("models.DATA_DIR", self.tmp.name), ("models.STORAGE_MODE", "journal")):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.snapshot = os.path.join(self.tmp.name, "game_j.json")
+        self.journal = os.path.join(self.tmp.name, "game_j.journal")
+
+    def _reload_from_disk(self):
+        import models
+        models._game_cache.clear()
+        return load_game_data("j")
+
+    def test_saves_append_to_journal_without_rewriting_snapshot(self):
+        save_game_data("j", create_game_state())
+        snapshot_before = file_signature(self.snapshot)
+        data = load_game_data("j")
+        data["poang"]["Alfa"]["aktuell"] = 12
+        data["gm_log"].append({"text": "HP"})
+        save_game_data("j", data)
+
+        self.assertEqual(file_signature(self.snapshot), snapshot_before)
+        with open(self.journal, encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 2)
+        reloaded = self._reload_from_disk()
+        self.assertEqual(reloaded["poang"]["Alfa"]["aktuell"], 12)
+        self.assertEqual(reloaded["gm_log"], [{"text": "HP"}])
+
+    def test_legacy_json_game_is_extended_then_compacted(self):
+        with open(self.snapshot, "w", encoding="utf-8") as f:
+            json.dump(create_game_state(), f)
+        data = load_game_data("j")
+        data["runda"] = 2
+        save_game_data("j", data)
+        self.assertTrue(os.path.exists(self.journal))
+
+        self.assertTrue(compact_game("j"))
+        with open(self.snapshot, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["runda"], 2)
+        self.assertEqual(self._reload_from_disk()["runda"], 2)
+
+    def test_replaced_snapshot_ignores_old_journal(self):
+        save_game_data("j", create_game_state())
+        data = load_game_data("j")
+        data["runda"] = 3
+        save_game_data("j", data)
+        uploaded = os.path.join(self.tmp.name, "upload.json")
+        with open(uploaded, "w", encoding="utf-8") as f:
+            json.dump(create_game_state(fas="Diplomatifas"), f)
+        os.replace(uploaded, self.snapshot)
+
+        reloaded = self._reload_from_disk()
+        self.assertEqual(reloaded["runda"], 1)
+        self.assertEqual(reloaded["fas"], "Diplomatifas")
+
+    def test_torn_tail_is_ignored_and_next_save_compacts(self):
+        save_game_data("j", create_game_state())
+        data = load_game_data("j")
+        data["runda"] = 2
+        save_game_data("j", data)
+        with open(self.journal, "a", encoding="utf-8") as f:
+            f.write('{"ops": [["set", ["runda"], 4')
+
+        data = self._reload_from_disk()
+        self.assertEqual(data["runda"], 2)
+        data["fas"] = "Resultatfas"
+        save_game_data("j", data)
+        with open(self.snapshot, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["fas"], "Resultatfas")
+
+    def test_bad_middle_record_is_not_appended_after(self):
+        save_game_data("j", create_game_state())
+        for runda in (2, 3, 4):
+            data = load_game_data("j")
+            data["runda"] = runda
+            save_game_data("j", data)
+        revision = load_game_data("j")["revision"]
+        with open(self.journal, encoding="utf-8") as f:
+            lines = f.readlines()
+        lines[2] = '{"ops": [["set", ["runda"]\n'
+        with open(self.journal, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+
+        data = self._reload_from_disk()
+        self.assertEqual(data["runda"], 2)
+        self.assertEqual(game_journal.status(self.snapshot, file_signature(self.snapshot))[0], "torn")
+        data["fas"] = "Resultatfas"
+        save_game_data("j", data)
+        reloaded = self._reload_from_disk()
+        self.assertEqual(reloaded["fas"], "Resultatfas")
+        self.assertEqual(reloaded["runda"], 2)
+        self.assertGreater(reloaded["revision"], revision)
+
+
+class TestSegmentStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        for target, value in (("models.DATA_DIR", self.tmp.name), ("models.STORAGE_MODE", "segments")):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.store = segment_store.store_for(self.tmp.name)
+        self.folder = os.path.join(self.tmp.name, "game_seg")
+
+    def _game(self):
+        return create_game_state(
+            team_orders={
+                "orders_round_1": {"Alfa": order_record([activity(name="Först", hp=5, id=1)], final=True)},
+                "orders_round_2": {},
+            },
+            gm_log=[{"at": 1, "kind": "hp", "message": "Start"}],
+            gm_undo=[{"action": "Start", "at": 1, "state": {"runda": 1}}],
+            llm_resolution={"1": {"rolls": {"Alfa-1": 42}}},
+        )
+
+    def _reload_from_disk(self):
+        fresh = segment_store.SegmentGameStore(self.tmp.name)
+        return fresh.load("seg")
+
+    def test_round_trip_keeps_every_part_of_the_game(self):
+        game = self._game()
+        save_game_data("seg", json.loads(json.dumps(game)))
+        reloaded = self._reload_from_disk()
+        game["revision"] = 1
+        self.assertEqual(reloaded, game)
+        self.assertEqual(list(reloaded), list(game))
+        segments = sorted(name.split(".r")[0] for name in os.listdir(self.folder) if name != "core.json")
+        self.assertEqual(
+            segments,
+            ["gm_log", "gm_undo", "llm_resolution", "orders%2Forders_round_1", "orders%2Forders_round_2"],
+        )
+
+    def test_only_changed_segments_are_written(self):
+        save_game_data("seg", self._game())
+        files_before = set(os.listdir(self.folder))
+        writes = self.store.segment_writes
+
+        data = load_game_data("seg")
+        data["timer_status"] = "running"
+        save_game_data("seg", data)
+        self.assertEqual(self.store.segment_writes, writes)
+        self.assertEqual(set(os.listdir(self.folder)), files_before)
+
+        data = load_game_data("seg")
+        push_undo(data, "HP")
+        data["team_orders"]["orders_round_2"]["Bravo"] = order_record([activity(name="Ny", hp=3, id=1)])
+        save_game_data("seg", data)
+        self.assertEqual(self.store.segment_writes, writes + 2)
+        self.assertEqual(len(set(os.listdir(self.folder)) - files_before), 2)
+        self.assertEqual(len(os.listdir(self.folder)), len(files_before))
+        self.assertIn("Bravo", self._reload_from_disk()["team_orders"]["orders_round_2"])
+
+    def test_public_reads_load_core_only_and_cannot_be_saved(self):
+        save_game_data("seg", self._game())
+        core = load_game_segments("seg")
+        self.assertNotIn("team_orders", core)
+        self.assertNotIn("gm_undo", core)
+        self.assertEqual(build_public_state(core)["runda"], 1)
+        with self.assertRaises(ValueError):
+            save_game_data("seg", core)
+
+        orders = load_game_segments("seg", ("orders",))
+        self.assertEqual(list(orders["team_orders"]), ["orders_round_1", "orders_round_2"])
+        self.assertNotIn("gm_log", orders)
+
+    def test_revision_needs_no_load_and_follows_other_writers(self):
+        save_game_data("seg", self._game())
+        self.store._cache.clear()
+        with patch.object(self.store, "load", side_effect=AssertionError("load")):
+            first = game_revision("seg")
+            self.assertIsNotNone(first)
+            self.assertEqual(game_revision("seg"), first)
+            hub = projector_hub.ProjectorHub("seg")
+            self.assertEqual(hub.event_id(), projector_hub._revision_event_id(first))
+
+        other = segment_store.SegmentGameStore(self.tmp.name)
+        data = other.load("seg")
+        data["fas"] = "Diplomatifas"
+        other.save("seg", data)
+        self.assertNotEqual(game_revision("seg"), first)
+        self.assertEqual(hub.public_state()["fas"], "Diplomatifas")
+        self.assertIsNone(game_revision("missing"))
+
+    def test_manifest_written_by_another_process_is_followed(self):
+        save_game_data("seg", self._game())
+        other = segment_store.SegmentGameStore(self.tmp.name)
+        data = other.load("seg")
+        data["gm_log"].append({"at": 2, "kind": "hp", "message": "Annan"})
+        other.save("seg", data)
+
+        self.assertEqual(len(load_game_data("seg")["gm_log"]), 2)
+        self.assertTrue(delete_game_data("seg"))
+        self.assertFalse(os.path.exists(self.folder))
+
+    def test_json_games_can_be_imported(self):
+        with open(os.path.join(self.tmp.name, "game_seg.json"), "w", encoding="utf-8") as f:
+            json.dump(self._game(), f)
+        self.assertEqual(segment_store.import_data_dir(self.tmp.name, self.store), ["seg"])
+        self.assertEqual(load_game_data("seg")["llm_resolution"], {"1": {"rolls": {"Alfa-1": 42}}})
+        self.assertEqual([game["id"] for game in list_saved_games()], ["g1"])
+
+
+class TestSqliteStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        for target, value in (("models.DATA_DIR", self.tmp.name), ("models.STORAGE_MODE", "sqlite")):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.store = sqlite_store.store_for(os.path.join(self.tmp.name, sqlite_store.SQLITE_FILENAME))
+        self.addCleanup(self.store.close)
+
+    def _game(self):
+        return create_game_state(
+            id="s1",
+            team_orders={"orders_round_1": {
+                "Bravo": order_record([activity(name="B")]),
+                "Alfa": order_record([activity(name="A")], final=True),
+            }},
+            gm_log=[{"at": 1.0, "kind": "hp", "message": "a"}, {"at": 2.0, "kind": "phase", "message": "b"}],
+            llm_resolution={"1": {"rolls": {"Alfa-1": 42}, "result": None}},
+        )
+
+    def test_round_trip_keeps_content_and_order(self):
+        game = self._game()
+        save_game_data("s1", game)
+        self.store._cache.clear()
+        loaded = load_game_data("s1")
+
+        self.assertEqual(loaded, game)
+        self.assertEqual(list(loaded), list(game))
+        self.assertEqual(list(loaded["team_orders"]["orders_round_1"]), ["Bravo", "Alfa"])
+        self.assertEqual(list_saved_games()[0]["id"], "s1")
+
+    def test_partial_reads_and_revision(self):
+        save_game_data("s1", self._game())
+        first = game_revision("s1")
+        data = load_game_data("s1")
+        data["poang"]["Alfa"]["aktuell"] = 9
+        save_game_data("s1", data)
+        self.assertEqual(game_revision("s1"), first + 1)
+
+        self.store._cache.clear()
+        core = load_game_segments("s1")
+        self.assertEqual(core["poang"]["Alfa"]["aktuell"], 9)
+        for key in ("team_orders", "gm_log", "llm_resolution"):
+            self.assertNotIn(key, core)
+        orders = load_game_segments("s1", ("orders/orders_round_1", "gm_log"))
+        self.assertEqual(list(orders["team_orders"]["orders_round_1"]), ["Bravo", "Alfa"])
+        self.assertEqual([e["message"] for e in orders["gm_log"]], ["a", "b"])
+        self.assertNotIn("llm_resolution", orders)
+        with self.assertRaises(ValueError):
+            save_game_data("s1", orders)
+        self.assertEqual(self.store._cache.stats()["games"], 0)
+
+    def test_none_and_odd_values_round_trip(self):
+        game = self._game()
+        game["team_orders"] = None
+        game["llm_resolution"] = []
+        save_game_data("s1", game)
+        self.store._cache.clear()
+        loaded = load_game_data("s1")
+        self.assertIsNone(loaded["team_orders"])
+        self.assertEqual(loaded["llm_resolution"], [])
+        self.assertIsNone(load_game_segments("s1", ("orders",))["team_orders"])
+
+    def test_capped_gm_log_keeps_surviving_rows(self):
+        save_game_data("s1", self._game())
+        data = load_game_data("s1")
+        data["gm_log"] = data["gm_log"][1:] + [{"at": 3.0, "kind": "hp", "message": "c"}]
+        save_game_data("s1", data)
+        seqs = [row[0] for row in self.store._connection().execute(
+            "SELECT seq FROM gm_log WHERE spel_id = 's1' ORDER BY seq")]
+
+        self.assertEqual(seqs, [1, 2])
+        self.store._cache.clear()
+        self.assertEqual([e["message"] for e in load_game_data("s1")["gm_log"]], ["b", "c"])
+
+    def test_delete_removes_game_and_rows(self):
+        save_game_data("s1", self._game())
+        self.assertTrue(delete_game_data("s1"))
+        self.assertIsNone(load_game_data("s1"))
+        self.assertEqual(self.store._connection().execute(
+            "SELECT COUNT(*) FROM orders WHERE spel_id = 's1'").fetchone()[0], 0)
+
+    def test_import_data_dir_replays_journal(self):
+        legacy = os.path.join(self.tmp.name, "legacy")
+        os.makedirs(legacy)
+        with patch("models.DATA_DIR", legacy), patch("models.STORAGE_MODE", "journal"):
+            save_game_data("old", self._game())
+            data = load_game_data("old")
+            data["runda"] = 3
+            save_game_data("old", data)
+
+        self.assertEqual(sqlite_store.import_data_dir(legacy, self.store), ["old"])
+        self.assertEqual(load_game_data("old")["runda"], 3)
+
+
+class TestGameIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = patch("models.DATA_DIR", self.tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.index_path = os.path.join(self.tmp.name, "games_index.json")
+
+    def _save(self, spel_id, **overrides):
+        save_game_data(spel_id, create_game_state(id=spel_id, **overrides))
+
+    def test_saves_and_deletes_maintain_the_index(self):
+        self._save("a", skapad="2026-01-01")
+        self._save("b", skapad="2026-02-01", avslutat=True)
+        self._save("c", skapad="2026-03-01")
+        games, total = list_game_summaries()
+
+        self.assertEqual(total, 3)
+        self.assertEqual([g["id"] for g in games], ["c", "a", "b"])
+        self.assertEqual(games[0]["lag"], ["Alfa", "Bravo", "STT"])
+
+        delete_game_data("a")
+        self.assertEqual([g["id"] for g in list_game_summaries()[0]], ["c", "b"])
+
+    def test_autosave_without_summary_change_leaves_index_untouched(self):
+        self._save("a")
+        before = file_signature(self.index_path)
+        data = load_game_data("a")
+        data["team_orders"] = {"orders_round_1": {"Alfa": order_record([activity()])}}
+        save_game_data("a", data)
+        self.assertEqual(file_signature(self.index_path), before)
+
+        data["fas"] = "Diplomatifas"
+        save_game_data("a", data)
+        self.assertEqual(list_game_summaries()[0][0]["fas"], "Diplomatifas")
+
+    def test_missing_index_is_built_from_game_files_and_paginates(self):
+        for i in range(5):
+            with open(os.path.join(self.tmp.name, f"game_g{i}.json"), "w", encoding="utf-8") as f:
+                json.dump(create_game_state(id=f"g{i}", skapad=f"2026-01-0{i + 1}"), f)
+
+        games, total = list_game_summaries(offset=2, limit=2)
+        self.assertEqual(total, 5)
+        self.assertEqual([g["id"] for g in games], ["g2", "g1"])
+        self.assertTrue(os.path.exists(self.index_path))
+
+        os.remove(os.path.join(self.tmp.name, "game_g4.json"))
+        self.assertEqual(rebuild_game_index(), 4)
+
+    def test_first_save_after_upgrade_indexes_existing_games(self):
+        with open(os.path.join(self.tmp.name, "game_old.json"), "w", encoding="utf-8") as f:
+            json.dump(create_game_state(id="old"), f)
+        self._save("new")
+
+        self.assertEqual(sorted(g["id"] for g in list_game_summaries()[0]), ["new", "old"])
+
+
+class TestGameLocks(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = patch("models.DATA_DIR", self.tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_lock_is_reentrant_and_released_by_outermost_hold(self):
+        lock = game_lock_for("lk-reentrant")
+        with lock:
+            with lock:
+                pass
+            self.assertIsNotNone(lock._owner)
+        self.assertIsNone(lock._owner)
+        self.assertTrue(lock.acquire(blocking=False))
+        lock.release()
+
+    @unittest.skipIf(game_locks.fcntl is None, "needs fcntl")
+    def test_other_process_holding_the_file_blocks_with_diagnostics(self):
+        import fcntl
+        lock = game_lock_for("lk-file")
+        path = os.path.join(self.tmp.name, "locks", "game_lk-file.lock")
+        os.makedirs(os.path.dirname(path))
+        with open(path, "w", encoding="utf-8") as other:
+            other.write("pid=999 thread=worker-2 POST /team/x/save_order")
+            other.flush()
+            fcntl.flock(other.fileno(), fcntl.LOCK_EX)
+            self.assertFalse(lock.acquire(timeout=0.05))
+            with patch("game_locks.GAME_LOCK_TIMEOUT", 0.05):
+                with self.assertRaises(game_locks.GameLockTimeout) as ctx:
+                    lock.acquire()
+            self.assertIn("pid=999", str(ctx.exception))
+            fcntl.flock(other.fileno(), fcntl.LOCK_UN)
+        with lock:
+            with open(path, encoding="utf-8") as f:
+                self.assertIn(f"pid={os.getpid()}", f.read())
+
+    @unittest.skipIf(game_locks.fcntl is None, "needs fcntl")
+    def test_delete_removes_the_lock_file_and_waiters_lock_a_new_one(self):
+        save_game_data("lk-del", create_game_state(id="lk-del"))
+        path = os.path.join(self.tmp.name, "locks", "game_lk-del.lock")
+        self.assertTrue(os.path.exists(path))
+        self.assertTrue(delete_game_data("lk-del"))
+        self.assertFalse(os.path.exists(path))
+
+        lock = game_lock_for("lk-del")
+        stale = game_locks.GameLock("lk-del-other", lambda: path)
+        with lock:
+            opened = os.open(path, os.O_RDWR)
+            lock.remove_file()
+        os.close(opened)
+        with stale:
+            self.assertTrue(os.path.exists(path))
+            self.assertTrue(game_locks.GameLock._is_current(stale._fd, path))
+
+    def test_crossed_waits_raise_deadlock_instead_of_hanging(self):
+        first, second = game_lock_for("lk-a"), game_lock_for("lk-b")
+        holding = threading.Event()
+        release = threading.Event()
+
+        def hold_b_then_wait_for_a():
+            with second:
+                holding.set()
+                first.acquire(timeout=2)
+                first.release()
+                release.wait(2)
+
+        with first:
+            worker = threading.Thread(target=hold_b_then_wait_for_a)
+            worker.start()
+            self.assertTrue(holding.wait(1))
+            deadline = time.time() + 1
+            while game_locks._waiting_for.get(worker.ident) is not first and time.time() < deadline:
+                time.sleep(0.005)
+            before = game_locks.lock_metrics()["deadlocks"]
+            with self.assertRaises(game_locks.GameLockDeadlock):
+                second.acquire()
+            self.assertEqual(game_locks.lock_metrics()["deadlocks"], before + 1)
+        release.set()
+        worker.join(2)
+        self.assertFalse(worker.is_alive())
+
+
+class TestLiveView(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = patch("models.DATA_DIR", self.tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        live_view.clear_live_views()
+        save_game_data("lv-1", create_game_state(id="lv-1"))
+
+    def test_state_is_shared_per_revision_with_a_fresh_clock(self):
+        with patch("live_view.build_live_state", wraps=build_live_state) as build:
+            first = live_view.live_view("lv-1", load_game_data("lv-1"))
+            with patch("live_view.get_phase_timer", return_value=42):
+                second = live_view.live_view("lv-1", load_game_data("lv-1"))
+            self.assertEqual(build.call_count, 1)
+            self.assertIs(second.html, first.html)
+            self.assertEqual(second.state["remaining"], 42)
+            self.assertNotEqual(second.hashes["s.remaining"], first.hashes["s.remaining"])
+            self.assertEqual(second.hashes["h.inbox"], first.hashes["h.inbox"])
+
+            saved = load_game_data("lv-1")
+            saved["fas"] = "Diplomatifas"
+            save_game_data("lv-1", saved)
+            third = live_view.live_view("lv-1", saved)
+            self.assertEqual(build.call_count, 2)
+            self.assertEqual(third.state["fas"], "Diplomatifas")
+
+    def test_entries_are_bounded(self):
+        with patch("live_view.LIVE_VIEW_MAX_ENTRIES", 1):
+            save_game_data("lv-2", create_game_state(id="lv-2"))
+            live_view.live_view("lv-1", load_game_data("lv-1"))
+            live_view.live_view("lv-2", load_game_data("lv-2"))
+            self.assertEqual(live_view.live_view_metrics()["entries"], 1)
+
+
+class TestProjectorHub(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = patch("models.DATA_DIR", self.tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.game = create_game_state(id="hub-1")
+        save_game_data("hub-1", self.game)
+        self.hub = projector_hub.ProjectorHub("hub-1")
+
+    def test_public_state_is_computed_once_per_revision(self):
+        with patch("projector_hub.build_public_state", wraps=build_public_state) as build:
+            first = self.hub.public_state()
+            for _ in range(5):
+                self.assertEqual(self.hub.public_state(), first)
+            self.assertEqual(build.call_count, 1)
+            self.game["fas"] = "Diplomatifas"
+            save_game_data("hub-1", self.game)
+            self.assertEqual(self.hub.public_state()["fas"], "Diplomatifas")
+            self.assertEqual(build.call_count, 2)
+
+    def test_running_clock_is_brought_up_to_date_for_late_readers(self):
+        snap = projector_hub._Snapshot("x-1", {"timer_status": "running", "remaining": 100})
+        snap.computed_at -= 30
+        self.assertEqual(snap.fresh_state()["remaining"], 70)
+        self.assertEqual(snap.state["remaining"], 100)
+
+    def test_subscribers_get_current_state_and_slow_ones_are_dropped(self):
+        with patch("projector_hub.HUB_QUEUE_SIZE", 2), patch("projector_hub.HUB_CHECK_SECONDS", 0.01):
+            fast = self.hub.subscribe()
+            slow = self.hub.subscribe()
+            first = fast.queue.get_nowait()
+            self.assertEqual(first.state["fas"], "Orderfas")
+            resumed = self.hub.subscribe(last_event_id=first.event_id)
+            self.assertTrue(resumed.queue.empty())
+
+            self.hub._publish(first)
+            self.assertFalse(slow.dropped)
+            self.hub._publish(first)
+            self.assertTrue(slow.dropped)
+            self.assertNotIn(slow, self.hub._subscribers)
+            self.assertIn(fast, self.hub._subscribers)
+            items = [slow.queue.get_nowait() for _ in range(slow.queue.qsize())]
+            self.assertIs(items[-1], projector_hub._GONE)
+            for subscriber in (fast, resumed):
+                self.hub.unsubscribe(subscriber)
+
+    def test_revision_subscribers_get_event_ids_without_building_public_state(self):
+        with patch("projector_hub.build_public_state", wraps=build_public_state) as build, \
+                patch("projector_hub.HUB_CHECK_SECONDS", 0.01):
+            gm = self.hub.subscribe(public=False)
+            first = gm.queue.get(timeout=1)
+            self.assertEqual(first, self.hub.event_id())
+            self.game["fas"] = "Diplomatifas"
+            save_game_data("hub-1", self.game)
+            changed = first
+            while changed == first:
+                changed = gm.queue.get(timeout=1)
+            self.assertEqual(changed, self.hub.event_id())
+            self.assertEqual(build.call_count, 0)
+
+            screen = self.hub.subscribe()
+            self.assertEqual(screen.queue.get(timeout=1).state["fas"], "Diplomatifas")
+            self.assertEqual(build.call_count, 1)
+            for subscriber in (gm, screen):
+                self.hub.unsubscribe(subscriber)
+
+
 if __name__ == "__main__":
     unittest.main()
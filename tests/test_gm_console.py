@@ -22,7 +22,10 @@ from gm_console import (
     transfer_hp,
 )
 from models import get_phase_timer
-from gm_console_ui import create_projector_html
+from gm_console_ui import create_projector_html, live_payload, parse_live_known
+from static_assets import AssetManifest
+
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
 
 
 def sample_game():
@@ -102,6 +105,23 @@ class TestGmConsole(unittest.TestCase):
         self.assertEqual(data["poang"]["Bravo"]["aktuell"], 30)
         self.assertTrue(data["gm_log"])
 
+    def test_live_payload_sends_only_parts_the_client_lacks(self):
+        data = sample_game()
+        full = live_payload("g1", build_live_state(data))
+        self.assertNotIn("delta", full)
+        self.assertIn("h.inbox", full["hashes"])
+
+        adjust_hp(data, "Alfa", -5, "spion")
+        delta = live_payload("g1", build_live_state(data), dict(full["hashes"], **{"s.gone": "x"}))
+        self.assertTrue(delta["delta"])
+        self.assertIn("teams", delta["state"])
+        self.assertNotIn("fas", delta["state"])
+        self.assertNotIn("inbox", delta["html"])
+        self.assertEqual(set(delta["hashes"]), {f"s.{k}" for k in delta["state"]} | {f"h.{k}" for k in delta["html"]})
+        self.assertEqual(delta["removed"], ["s.gone"])
+        self.assertEqual(parse_live_known("s.fas=ab12, h.log=cd34"), {"s.fas": "ab12", "h.log": "cd34"})
+        self.assertIsNone(parse_live_known(""))
+
     def test_undo_restores_hp(self):
         data = sample_game()
         push_undo(data, "HP")
@@ -320,8 +340,10 @@ class TestGmConsoleHtml(unittest.TestCase):
         self.assertIn("projector-progress", html)
         self.assertIn("projector-audio-hint", html)
         self.assertIn("Klicka för ljudvarningar", html)
-        self.assertIn("projector.js?v=4", html)
-        self.assertIn("app.css?v=36", html)
+        self.assertIn('src="/static/projector.js"', html)
+        rewritten = AssetManifest(STATIC_FOLDER).rewrite(html)
+        self.assertRegex(rewritten, r'src="/static/projector\.js\?h=[0-9a-f]+"')
+        self.assertRegex(rewritten, r'href="/static/app\.css\?h=[0-9a-f]+"')
         self.assertIn("Denna runda", html)
         self.assertIn("Nästa runda", html)
         self.assertIn("projector-team is-loss", html)
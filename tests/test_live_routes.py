@@ -8,8 +8,14 @@ import time
 import unittest
 from unittest.mock import patch
 
+import game_context
+import models
+from draft_buffer import DraftBuffer
+import print_pack
+import projector_hub
+import qr_codes
 from app import app
-from models import create_game_session, game_lock_for
+from models import create_game_session, game_lock_for, save_game_data
 from tests.game_fixtures import activity, create_game_state, order_record
 
 
@@ -57,6 +63,20 @@ class TestLiveRoutes(unittest.TestCase):
             session[f"game_session_{self.spel_id}"] = create_game_session(self.spel_id)
         return client
 
+    def test_home_page_lists_games_one_page_at_a_time(self):
+        for i in range(26):
+            save_game_data(f"page-{i:02d}", create_game_state(
+                id=f"page-{i:02d}", datum="2026-08-18", plats=f"Plats {i:02d}", skapad=f"2026-08-18 {i:02d}"))
+
+        first = app.test_client().get("/").get_data(as_text=True)
+        second = app.test_client().get("/?sida=2").get_data(as_text=True)
+
+        self.assertIn("Plats 25", first)
+        self.assertIn("Sida 1 av 2", first)
+        self.assertIn('href="/?sida=2"', first)
+        self.assertNotIn("Plats 25", second)
+        self.assertIn("Nyare spel", second)
+
     def test_gm_live_state_requires_admin_session(self):
         secret = "hemlig order"
         data = self._read_game()
@@ -76,6 +96,96 @@ class TestLiveRoutes(unittest.TestCase):
         response = self._admin_client().get(f"/admin/{self.spel_id}/live")
         self.assertEqual(response.status_code, 200)
 
+    def test_live_polls_get_304_until_the_game_is_saved(self):
+        client = self._admin_client()
+        urls = (f"/admin/{self.spel_id}/live", f"/spelarskarm/{self.spel_id}/live",
+                f"/team/{self.spel_id}/{self.token}/timer")
+        etags = {}
+        for url in urls:
+            first = client.get(url)
+            etags[url] = first.headers["ETag"]
+            self.assertEqual(first.status_code, 200, url)
+            again = client.get(url, headers={"If-None-Match": etags[url]})
+            self.assertEqual(again.status_code, 304, url)
+            self.assertEqual(again.get_data(), b"")
+
+        data = self._read_game()
+        data["fas"] = "Diplomatifas"
+        save_game_data(self.spel_id, data)
+        for url in urls:
+            changed = client.get(url, headers={"If-None-Match": etags[url]})
+            self.assertEqual(changed.status_code, 200, url)
+
+    def test_gm_live_304_does_not_load_the_game(self):
+        client = self._admin_client()
+        etag = client.get(f"/admin/{self.spel_id}/live").headers["ETag"]
+        with patch("game_context.load_game_data") as load:
+            again = client.get(f"/admin/{self.spel_id}/live", headers={"If-None-Match": etag})
+        self.assertEqual(again.status_code, 304)
+        load.assert_not_called()
+        self.assertEqual(client.get("/admin/missing/live").status_code, 401)
+
+    def test_gm_live_sends_deltas_against_known_hashes(self):
+        client = self._admin_client()
+        full = client.get(f"/admin/{self.spel_id}/live").get_json()
+        known = ",".join(f"{key}={digest}" for key, digest in full["hashes"].items())
+
+        same = client.get(f"/admin/{self.spel_id}/live", headers={"X-Live-Known": known}).get_json()
+        self.assertTrue(same["delta"])
+        self.assertNotIn("inbox", same["html"])
+        self.assertNotIn("fas", same["state"])
+
+        changed = client.post(
+            f"/admin/{self.spel_id}/hp",
+            json={"op": "plus5", "team": "Alfa"},
+            headers={"X-Live-Known": known},
+        ).get_json()
+        self.assertTrue(changed["success"], changed)
+        self.assertIn("teams", changed["state"])
+        self.assertNotIn("inbox", changed["html"])
+
+    def test_gm_event_stream_requires_admin_session(self):
+        response = app.test_client().get(f"/admin/{self.spel_id}/events")
+        self.assertEqual(response.status_code, 401)
+
+    def test_gm_event_stream_pushes_live_state_and_honours_last_event_id(self):
+        client = self._admin_client()
+        with patch("projector_hub.SSE_MAX_SECONDS", 0.05), patch("projector_hub.HUB_CHECK_SECONDS", 0.01):
+            response = client.get(f"/admin/{self.spel_id}/events")
+            body = response.get_data(as_text=True)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.mimetype.startswith("text/event-stream"))
+            self.assertIn("event: live", body)
+            self.assertIn('"success": true', body)
+            event_id = next(line[4:] for line in body.splitlines() if line.startswith("id: "))
+
+            again = client.get(f"/admin/{self.spel_id}/events", headers={"Last-Event-ID": event_id})
+            self.assertNotIn("event: live", again.get_data(as_text=True))
+
+    def test_projector_event_stream_pushes_public_state_only(self):
+        with patch("projector_hub.SSE_MAX_SECONDS", 0.05):
+            response = app.test_client().get(f"/spelarskarm/{self.spel_id}/events")
+            body = response.get_data(as_text=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("event: live", body)
+        self.assertIn('"fas": "Orderfas"', body)
+        self.assertNotIn(self.token, body)
+        self.assertEqual(app.test_client().get("/spelarskarm/missing/events").status_code, 404)
+
+    def test_event_streams_past_the_cap_are_told_to_poll(self):
+        with patch("projector_hub.SSE_MAX_STREAMS", 1), patch("projector_hub.SSE_MAX_SECONDS", 0.05):
+            open_stream = app.test_client().get(f"/spelarskarm/{self.spel_id}/events", buffered=False)
+            refused = app.test_client().get(f"/spelarskarm/{self.spel_id}/events")
+            self.assertEqual(refused.status_code, 503)
+            self.assertTrue(refused.get_json()["poll"])
+            self.assertEqual(projector_hub.hub_metrics()["streams_open"], 1)
+            open_stream.get_data()
+            open_stream.close()
+            self.assertEqual(projector_hub.hub_metrics()["streams_open"], 0)
+            again = app.test_client().get(f"/spelarskarm/{self.spel_id}/events")
+            self.assertEqual(again.status_code, 200)
+            again.close()
+
     def test_team_cannot_overwrite_an_already_submitted_order(self):
         data = self._read_game()
         data["team_orders"] = {
@@ -139,6 +249,35 @@ class TestLiveRoutes(unittest.TestCase):
         self.assertTrue(saved["edited_by_gm"])
         self.assertEqual(saved["orders"]["activities"][0]["aktivitet"], "GM ändrade")
 
+    def test_team_mutation_gets_retryable_503_when_lock_times_out(self):
+        held = threading.Event()
+        done = threading.Event()
+
+        def hold_lock():
+            with game_lock_for(self.spel_id):
+                held.set()
+                done.wait(2)
+
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        try:
+            self.assertTrue(held.wait(1))
+            with patch("game_locks.GAME_LOCK_TIMEOUT", 0.05):
+                response = app.test_client().post(
+                    f"/team/{self.spel_id}/{self.token}/save_order",
+                    json={"activities": [activity(name="Låst", hp=5, id=1)]},
+                )
+        finally:
+            done.set()
+            holder.join(2)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("temporarily locked", response.get_json()["error"])
+        self.assertEqual(app.test_client().get("/metrics").status_code, 404)
+        with patch("app.METRICS_ENABLED", True):
+            metrics = app.test_client().get("/metrics").get_json()
+        self.assertGreaterEqual(metrics["game_locks"]["timeouts"], 1)
+
     def test_team_mutation_waits_for_the_per_game_lock(self):
         lock = game_lock_for(self.spel_id)
         started = threading.Event()
@@ -174,6 +313,153 @@ class TestLiveRoutes(unittest.TestCase):
             "Låst",
         )
 
+    def test_team_autosave_loads_the_game_once_and_follows_token_changes(self):
+        client = app.test_client()
+        body = {"activities": [activity(name="Utkast", hp=5, id=1)]}
+        url = f"/team/{self.spel_id}/{self.token}/save_order"
+        self.assertEqual(client.post(url, json=body).status_code, 200)
+
+        with patch("game_context.load_game_data", wraps=models.load_game_data) as load:
+            self.assertEqual(client.post(url, json=body).status_code, 200)
+        self.assertEqual(load.call_count, 1)
+
+        data = self._read_game()
+        data["team_tokens"] = {"Alfa": "new-token"}
+        self._write_game(data)
+        self.assertEqual(client.post(url, json=body).status_code, 403)
+        self.assertEqual(
+            client.post(f"/team/{self.spel_id}/new-token/save_order", json=body).status_code,
+            200,
+        )
+
+    def test_team_drafts_are_written_behind_and_submit_writes_them(self):
+        drafts = DraftBuffer(models._flush_draft, 60, 60)
+        client = app.test_client()
+        body = {"activities": [activity(name="Utkast", hp=5, id=1)]}
+        with patch("models._drafts", drafts):
+            for name in ("Utkast", "Utkast 2"):
+                body["activities"][0]["name"] = name
+                response = client.post(f"/team/{self.spel_id}/{self.token}/save_order", json=body)
+                self.assertEqual(response.status_code, 200)
+            self.assertNotIn("Alfa", self._read_game().get("team_orders", {}).get("orders_round_1", {}))
+            self.assertEqual(drafts.stats()["pending"], 1)
+
+            response = client.post(f"/team/{self.spel_id}/{self.token}/submit_order", json=body)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(drafts.stats()["pending"], 0)
+            stored = self._read_game()["team_orders"]["orders_round_1"]["Alfa"]
+            self.assertTrue(stored["final"])
+            self.assertEqual(stored["orders"]["activities"][0]["name"], "Utkast 2")
+
+    def test_admin_mutation_loads_and_saves_the_game_once(self):
+        client = self._admin_client()
+        with patch("game_context.load_game_data", wraps=models.load_game_data) as load, \
+                patch("game_context.save_game_data", wraps=models.save_game_data) as save:
+            response = client.post(f"/admin/{self.spel_id}/hp", json={"op": "plus5", "team": "Alfa"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((load.call_count, save.call_count), (1, 1))
+
+        with app.test_request_context():
+            data = game_context.request_game(self.spel_id)
+            self.assertIs(game_context.request_game(self.spel_id), data)
+            game_context.save_request_game(self.spel_id, data)
+            with self.assertRaises(game_context.GameSavedTwice):
+                game_context.save_request_game(self.spel_id, data)
+
+    def test_gm_can_issue_new_team_links(self):
+        body = {"activities": [activity(name="Utkast", hp=5, id=1)]}
+        with patch("models.TEAM_TOKEN_SCHEME", "signed"):
+            self.assertEqual(
+                self._admin_client().post(f"/admin/{self.spel_id}/team_tokens").status_code, 302
+            )
+        new_token = self._read_game()["team_tokens"]["Alfa"]
+        self.assertTrue(new_token.startswith("s1."))
+        client = app.test_client()
+        self.assertEqual(
+            client.post(f"/team/{self.spel_id}/{self.token}/save_order", json=body).status_code, 403
+        )
+        self.assertEqual(
+            client.post(f"/team/{self.spel_id}/{new_token}/save_order", json=body).status_code, 200
+        )
+        page = client.get(f"/team/{self.spel_id}/Alfa").get_data(as_text=True)
+        self.assertIn(f"/team/{self.spel_id}/{new_token}/enter_order", page)
+
+    def test_gm_lists_restore_points_and_rolls_back_with_undo(self):
+        client = self._admin_client()
+        for _ in range(2):
+            client.post(f"/admin/{self.spel_id}/hp", json={"op": "plus5", "team": "Alfa"})
+        points = models.list_restore_points(self.spel_id)
+        self.assertEqual([point.revision for point in points], [2, 1])
+
+        page = client.get(f"/admin/{self.spel_id}/restore_points").get_data(as_text=True)
+        self.assertIn("Nuvarande", page)
+        self.assertIn(f"/admin/{self.spel_id}/restore_points/{points[1].name}", page)
+
+        response = client.post(f"/admin/{self.spel_id}/restore_points/{points[1].name}")
+        self.assertEqual(response.status_code, 302)
+        data = self._read_game()
+        self.assertEqual(data["poang"]["Alfa"]["aktuell"], 30)
+        self.assertEqual(data["team_tokens"], {"Alfa": self.token})
+        self.assertIn("Återställde sparpunkt", data["gm_log"][-1]["message"])
+
+        client.post(f"/admin/{self.spel_id}/undo")
+        self.assertEqual(self._read_game()["poang"]["Alfa"]["aktuell"], 35)
+        self.assertEqual(client.post(f"/admin/{self.spel_id}/restore_points/missing.json").status_code, 404)
+
+    def test_qr_sheet_is_cached_until_new_team_links_are_issued(self):
+        client = self._admin_client()
+        self.assertEqual(app.test_client().get(f"/admin/{self.spel_id}/qr_sheet").status_code, 302)
+
+        before = qr_codes.qr_metrics()
+        sheet = client.get(f"/admin/{self.spel_id}/qr_sheet").get_data(as_text=True)
+        self.assertIn(f"http://localhost/team/{self.spel_id}/{self.token}/enter_order", sheet)
+        self.assertEqual(sheet.count("<svg"), 1)
+        self.assertEqual(client.get(f"/admin/{self.spel_id}/qr_sheet").get_data(as_text=True), sheet)
+        self.assertEqual(qr_codes.qr_metrics()["sheet_hits"], before["sheet_hits"] + 1)
+
+        rendered = qr_codes.qr_metrics()["rendered"]
+        team_page = app.test_client().get(f"/team/{self.spel_id}/Alfa").get_data(as_text=True)
+        self.assertIn("data:image/svg+xml;base64,", team_page)
+        self.assertEqual(qr_codes.qr_metrics()["rendered"], rendered)
+
+        client.post(f"/admin/{self.spel_id}/team_tokens")
+        tokens = self._read_game()["team_tokens"]
+        renewed = client.get(f"/admin/{self.spel_id}/qr_sheet").get_data(as_text=True)
+        self.assertNotIn(self.token, renewed)
+        self.assertEqual(renewed.count("<svg"), len(tokens))
+        for token in tokens.values():
+            self.assertIn(f"/team/{self.spel_id}/{token}/enter_order", renewed)
+
+    def test_print_pack_streams_every_printable_and_is_cached_per_revision(self):
+        briefs = os.path.join(self.temp_dir.name, "briefs")
+        os.makedirs(briefs)
+        with open(os.path.join(briefs, "alfa.txt"), "w", encoding="utf-8") as handle:
+            handle.write("Uppdrag:\nSkydda valet")
+        patcher = patch("orderkort.BRIEF_DIR", briefs)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        client = self._admin_client()
+
+        before = print_pack.print_pack_metrics()
+        response = client.get(f"/admin/{self.spel_id}/print_pack")
+        self.assertTrue(response.is_streamed)
+        pack = response.get_data(as_text=True)
+        self.assertEqual(pack.count("class=\"orderkort-page\""), 3 * models.MAX_RUNDA)
+        self.assertEqual(pack.count("class='print-pack-team force-break'"), 3)
+        self.assertIn("<b>Uppdrag:</b><br>Skydda valet", pack)
+        self.assertIn(f"/team/{self.spel_id}/{self.token}/enter_order", pack)
+        self.assertIn("Bravo Kort 10: Blankt", pack)
+
+        self.assertEqual(client.get(f"/admin/{self.spel_id}/print_pack").get_data(as_text=True), pack)
+        self.assertEqual(print_pack.print_pack_metrics()["hits"], before["hits"] + 1)
+
+        with open(os.path.join(briefs, "alfa.txt"), "w", encoding="utf-8") as handle:
+            handle.write("Uppdrag:\nSkydda valet och elnätet")
+        self.assertIn("Skydda valet och elnätet", client.get(f"/admin/{self.spel_id}/print_pack").get_data(as_text=True))
+        client.post(f"/admin/{self.spel_id}/hp", json={"op": "plus5", "team": "Alfa"})
+        client.get(f"/admin/{self.spel_id}/print_pack").get_data()
+        self.assertEqual(print_pack.print_pack_metrics()["built"], before["built"] + 3)
+
     def test_reset_clears_old_llm_state_and_undo_restores_it(self):
         data = self._read_game()
         data["team_orders"] = {